@@ -0,0 +1,19 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Micro-benchmarks for the Python SDK runtime. They live outside of `lib` so that they aren't packaged with the SDK.
+Each module in this package can be run directly from `sdk/python`, with the SDK installed or on the path, for example:
+
+    PYTHONPATH=lib python -m bench.transport --resources 5000
+"""
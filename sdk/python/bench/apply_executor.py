@@ -0,0 +1,68 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures registering resources whose inputs are computed by CPU-heavy applies, here rendering a template and hashing
+it, with the applies run on the event loop, on the apply executor's thread pool, and on a process pool.
+
+    python -m bench.apply_executor --resources 200 --lines 20000
+"""
+import argparse
+import functools
+import hashlib
+from concurrent import futures
+
+from pulumi import CustomResource, Output
+from pulumi.runtime import set_apply_executor
+
+from .util import MonitorEndpoint, run_program, report
+
+
+class Config(CustomResource):
+    def __init__(self, name, content_hash):
+        CustomResource.__init__(self, "bench:index:Config", name, props={"contentHash": content_hash})
+
+
+def render(lines: int, name: str) -> str:
+    # Runs in the executor, which may be in another process, so it must be picklable.
+    content = "".join(f"{name}.setting{i} = {i * 31 % 97}\n" for i in range(lines))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument('--resources', type=int, default=200, help='The number of resources to register')
+    ap.add_argument('--lines', type=int, default=20000, help='The number of lines in each rendered template')
+    args = ap.parse_args()
+
+    with futures.ProcessPoolExecutor() as processes:
+        cases = [("inline", False, None), ("threads", True, None), ("processes", True, processes)]
+        for name, run_in_executor, executor in cases:
+            def program():
+                if executor is not None:
+                    set_apply_executor(executor)
+                for i in range(args.resources):
+                    content_hash = Output.from_input(f"config-{i}").apply(
+                        functools.partial(render, args.lines), run_in_executor=run_in_executor)
+                    Config(f"config-{i}", content_hash)
+
+            endpoint = MonitorEndpoint()
+            try:
+                elapsed = run_program(program, endpoint)
+            finally:
+                endpoint.stop()
+            report(name, elapsed, args.resources)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures the latency of compressing large monitor requests, and estimates the wire size it saves, using the workload of
+the `large_resource` integration test: resources and a stack output that each carry a multi-megabyte string.
+
+    python -m bench.compression --resources 20 --size-mb 5
+"""
+import argparse
+import base64
+import gzip
+import os
+
+import pulumi
+from pulumi import CustomResource
+
+from .util import MonitorEndpoint, run_program, report
+
+
+class BenchResource(CustomResource):
+    def __init__(self, name, value):
+        CustomResource.__init__(self, "bench:index:Resource", name, props={"value": value})
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument('--resources', type=int, default=20, help='The number of large resources to register')
+    ap.add_argument('--size-mb', type=float, default=5, help='The size of the string each resource carries')
+    ap.add_argument('--threshold', type=int, default=64 * 1024,
+                    help='The request size above which requests are compressed')
+    args = ap.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    payloads = [
+        # The large_resource test's payload, which compresses extremely well.
+        ("repetitive", "a" * size),
+        # Encoded binary data (certificates, archives, ...), which compresses far less.
+        ("random", base64.b64encode(os.urandom(size * 3 // 4)).decode()),
+    ]
+
+    for payload_name, payload in payloads:
+        def program():
+            for i in range(args.resources):
+                BenchResource(f"res-{i}", payload)
+            pulumi.export("long_string", payload)
+
+        # Each resource and the stack outputs carry the payload once.
+        requests = args.resources + 1
+        raw_size = len(payload) * requests
+        compressed_size = len(gzip.compress(payload.encode(), compresslevel=6)) * requests
+
+        for name, threshold in [("uncompressed", None), ("gzip", args.threshold)]:
+            endpoint = MonitorEndpoint()
+            try:
+                elapsed = run_program(program, endpoint, compression_threshold=threshold)
+            finally:
+                endpoint.stop()
+            # gRPC doesn't report the bytes it sends, so the size on the wire is estimated from the payload alone,
+            # compressed locally at gzip's default level.
+            wire = raw_size if threshold is None else compressed_size
+            report(f"{payload_name}/{name}", elapsed, args.resources)
+            print(f"{'':<32} ~{wire / (1024 * 1024):10.2f} MB on the wire (estimated)")
+
+
+if __name__ == "__main__":
+    main()
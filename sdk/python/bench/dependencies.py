@@ -0,0 +1,96 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures tracking the resources that Outputs depend on in graphs with a lot of fan-in: a long chain of Outputs that
+each combine the one before with an output of another resource, and layers of Outputs that each combine many outputs
+of the layer below. Every Output made is then serialized, as it would be when passed to a resource, which collects the
+resources it depends on.
+
+    python -m bench.dependencies --chain 5000 --width 200 --layers 4
+"""
+import argparse
+import asyncio
+import time
+
+from pulumi import Output
+from pulumi.runtime import rpc, settings
+
+from .util import report
+
+
+class Resource:
+    pass
+
+
+def leaf(i: int) -> Output:
+    value, known = asyncio.Future(), asyncio.Future()
+    value.set_result(i)
+    known.set_result(True)
+    return Output({Resource()}, value, known)
+
+
+def chain(length: int):
+    outputs = [leaf(0)]
+    for i in range(1, length):
+        outputs.append(Output.all(outputs[-1], leaf(i)).apply(lambda v: v[1]))
+    return outputs
+
+
+def layers(width: int, depth: int):
+    outputs = []
+    layer = [leaf(i) for i in range(width)]
+    for _ in range(depth):
+        # Each output of the next layer combines a window of the outputs of this one, so they overlap heavily.
+        layer = [Output.all(*layer[i:] + layer[:i // 2]).apply(len) for i in range(width)]
+        outputs.extend(layer)
+    return outputs
+
+
+async def serialize(outputs) -> int:
+    deps_count = 0
+    for output in outputs:
+        deps = {}
+        await rpc.serialize_properties({"value": output}, deps, None)
+        deps_count += len(deps["value"])
+    return deps_count
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument('--chain', type=int, default=5000, help='The length of the chain of Outputs')
+    ap.add_argument('--width', type=int, default=200, help='The number of Outputs in each layer')
+    ap.add_argument('--layers', type=int, default=4, help='The number of layers of Outputs')
+    args = ap.parse_args()
+
+    settings.configure(settings.Settings(dry_run=False))
+    cases = [("chain", lambda: chain(args.chain)), ("layers", lambda: layers(args.width, args.layers))]
+    for name, make in cases:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            start = time.perf_counter()
+            outputs = make()
+            loop.run_until_complete(asyncio.gather(*[o.future() for o in outputs]))
+            made = time.perf_counter() - start
+            report(f"{name}/make", made, len(outputs), unit="outputs")
+
+            start = time.perf_counter()
+            loop.run_until_complete(serialize(outputs))
+            report(f"{name}/serialize", time.perf_counter() - start, len(outputs), unit="outputs")
+        finally:
+            loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures `rpc.deserialize_properties` on the `object` of wide and deep `RegisterResourceResponse`s, with and without
+secrets nested inside them, as the engine would send them for resources with large state.
+
+    python -m bench.deserialize --width 2000 --depth 10 --iterations 20
+"""
+import argparse
+import time
+
+from google.protobuf import struct_pb2
+from pulumi.runtime import rpc
+from pulumi.runtime.proto import resource_pb2
+
+from .util import report
+
+
+def secret(value):
+    return {rpc._special_sig_key: rpc._special_secret_sig, "value": value}
+
+
+def wide(width: int, secrets: bool):
+    return {f"prop{i}": {
+        "name": f"name-{i}",
+        "labels": {"app": "bench", "tier": "backend" if i % 2 else "frontend"},
+        "ports": [80, 443],
+        "enabled": True,
+        "token": secret(f"token-{i}") if secrets else f"token-{i}",
+    } for i in range(width)}
+
+
+def deep(depth: int, fanout: int, secrets: bool):
+    if depth == 0:
+        return secret("leaf") if secrets else "leaf"
+    return {
+        "items": [deep(depth - 1, fanout, secrets) for _ in range(fanout)],
+        "kind": "node",
+    }
+
+
+def count_nodes(value) -> int:
+    count = 0
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        count += 1
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return count
+
+
+def response(props) -> resource_pb2.RegisterResourceResponse:
+    obj = struct_pb2.Struct()
+    obj.update(props)
+    resp = resource_pb2.RegisterResourceResponse(urn="urn", id="id", object=obj)
+    # Decode the response from the wire, as the language host would receive it.
+    return resource_pb2.RegisterResourceResponse.FromString(resp.SerializeToString())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument('--width', type=int, default=2000, help='The number of top-level properties in the wide object')
+    ap.add_argument('--depth', type=int, default=10, help='The depth of the deep object')
+    ap.add_argument('--fanout', type=int, default=2, help='The number of children of each node in the deep object')
+    ap.add_argument('--iterations', type=int, default=20, help='The number of times to deserialize each object')
+    args = ap.parse_args()
+
+    cases = [
+        ("wide", lambda: wide(args.width, False)),
+        ("wide/secrets", lambda: wide(args.width, True)),
+        ("deep", lambda: {"root": deep(args.depth, args.fanout, False)}),
+        ("deep/secrets", lambda: {"root": deep(args.depth, args.fanout, True)}),
+    ]
+
+    for name, make_props in cases:
+        props = make_props()
+        resp = response(props)
+        nodes = count_nodes(props) * args.iterations
+
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            rpc.deserialize_properties(resp.object)
+        report(name, time.perf_counter() - start, nodes, unit="nodes")
+
+
+if __name__ == "__main__":
+    main()
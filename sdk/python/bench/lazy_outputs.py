@@ -0,0 +1,69 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures registering resources with large state, such as Kubernetes manifests, of which the program only reads back
+one output property, with output properties decoded eagerly and lazily.
+
+    python -m bench.lazy_outputs --resources 150 --entries 200
+"""
+import argparse
+import tracemalloc
+
+from pulumi import CustomResource
+
+from .util import MonitorEndpoint, run_program, report
+
+
+class Manifest(CustomResource):
+    def __init__(self, name, spec):
+        CustomResource.__init__(self, "bench:index:Manifest", name, props={"name": name, "spec": spec, "status": None})
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument('--resources', type=int, default=150, help='The number of resources to register')
+    ap.add_argument('--entries', type=int, default=200, help='The number of entries in the spec of each resource')
+    args = ap.parse_args()
+
+    spec = {f"container{i}": {
+        "image": f"registry.example.com/app:{i}",
+        "ports": [{"containerPort": 8080 + i, "protocol": "TCP"}],
+        "env": [{"name": "MODE", "value": "production"}],
+    } for i in range(args.entries)}
+
+    def program():
+        for i in range(args.resources):
+            Manifest(f"manifest-{i}", spec).name.apply(lambda name: name)
+
+    for name, lazy in [("eager", False), ("lazy", True)]:
+        endpoint = MonitorEndpoint()
+        try:
+            elapsed = run_program(program, endpoint, lazy_outputs_enabled=lazy)
+        finally:
+            endpoint.stop()
+        report(name, elapsed, args.resources)
+
+        endpoint = MonitorEndpoint()
+        tracemalloc.start()
+        try:
+            run_program(program, endpoint, lazy_outputs_enabled=lazy)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            endpoint.stop()
+        print(f"{'':<32} {peak / (1024 * 1024):8.1f} MB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures making and resolving many Outputs, the way programs with tens of thousands of them do: Outputs of prompt
+values, applies and chains of applies on them and on pending outputs, chains of attribute and index lookups on pending
+outputs, combinations of them with `Output.all` and `Output.concat`, and Outputs
+of dicts that `Output.from_input` unwraps, both small ones and wide and deeply nested ones whose leaves are the pending
+outputs of resources. Each case reports its throughput and the memory held by the Outputs once they have resolved.
+
+    python -m bench.outputs --outputs 50000
+"""
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from pulumi import Output
+from pulumi.output import _OutputState
+
+from .util import report
+
+
+def prompt(count: int):
+    return [Output.from_input(i) for i in range(count)]
+
+
+def applies(count: int):
+    return [Output.from_input(i).apply(lambda v: v + 1) for i in range(count)]
+
+
+def chains(count: int):
+    outputs = []
+    for i in range(count // 4):
+        out = Output.from_input(i)
+        for _ in range(4):
+            out = out.apply(lambda v: v + 1)
+        outputs.append(out)
+    return outputs
+
+
+def concats(count: int):
+    return [Output.concat("name-", Output.from_input(str(i))) for i in range(count)]
+
+
+def alls(count: int):
+    return [Output.all(Output.from_input(i), Output.from_input(i + 1)) for i in range(count)]
+
+
+def dicts(count: int):
+    return [Output.from_input({"name": f"name-{i}", "index": i}) for i in range(count // 4)]
+
+
+def pending(value):
+    """
+    Returns an Output that resolves on the next turn of the event loop, like an output of a resource.
+    """
+    loop = asyncio.get_event_loop()
+    state = loop.create_future()
+    loop.call_soon(state.set_result, _OutputState(value, True, False, set()))
+    return Output._from_state(state)
+
+
+def pending_chains(count: int):
+    outputs = []
+    for i in range(count // 4):
+        out = pending(i)
+        for _ in range(4):
+            out = out.apply(lambda v: v + 1)
+        outputs.append(out)
+    return outputs
+
+
+def lookups(count: int):
+    # Lookups like `res.status["load_balancer"]["ingress"][0].ip`, which component code is full of.
+    return [pending({"a": {"b": [{"c": i}]}})["a"]["b"][0]["c"] for i in range(count)]
+
+
+def wide(count: int):
+    # Tags dicts with a thousand entries, each an output of another resource.
+    return [Output.from_input({f"tag{j}": pending(j) for j in range(1000)}) for i in range(count // 1000)]
+
+
+def deep(count: int):
+    def nested(depth: int):
+        return {"value": pending(depth), "nested": nested(depth - 1) if depth else [pending(depth)]}
+    # Structures nested ten levels deep, with an output of another resource at each level.
+    return [Output.from_input(nested(10)) for i in range(count // 10)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument('--outputs', type=int, default=50000, help='The number of Outputs to make in each case')
+    args = ap.parse_args()
+
+    cases = [("prompt", prompt), ("apply", applies), ("apply/chain", chains), ("all", alls),
+             ("concat", concats), ("from_input/dict", dicts),
+             ("from_input/wide", wide), ("from_input/deep", deep),
+             ("apply/pending chain", pending_chains), ("lookup/chain", lookups)]
+    for name, make in cases:
+        elapsed, count = run(make, args.outputs)
+        report(name, elapsed, count, unit="outputs")
+
+        # Memory is measured separately, since tracing allocations slows everything down.
+        gc.collect()
+        tracemalloc.start()
+        try:
+            outputs = run(make, args.outputs, keep=True)
+            held, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        print(f"{'':<32} {held / count:8.0f} bytes held per Output")
+        del outputs
+
+
+def run(make, count: int, keep: bool = False):
+    """
+    Makes Outputs with `make` on a fresh event loop and waits for all of them to resolve. Returns the elapsed time and
+    the number of Outputs made, or, if `keep` is set, the Outputs themselves.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        start = time.perf_counter()
+        outputs = make(count)
+        loop.run_until_complete(asyncio.gather(*[o.future() for o in outputs]))
+        elapsed = time.perf_counter() - start
+    finally:
+        loop.close()
+    return outputs if keep else (elapsed, len(outputs))
+
+
+if __name__ == "__main__":
+    main()
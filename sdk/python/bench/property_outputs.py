@@ -0,0 +1,72 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures registering many resources with many properties, of which the program only passes the ids along, as most
+large stacks do, with and without deferred outputs. Reports the throughput and the memory held by the resources once
+they have all been registered.
+
+    python -m bench.property_outputs --resources 10000 --properties 20
+"""
+import argparse
+import gc
+import tracemalloc
+
+from pulumi import CustomResource
+
+from .util import MonitorEndpoint, run_program, report
+
+
+class Subnet(CustomResource):
+    def __init__(self, name, props):
+        CustomResource.__init__(self, "bench:index:Subnet", name, props=props)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument('--resources', type=int, default=10000, help='The number of resources to register')
+    ap.add_argument('--properties', type=int, default=20, help='The number of properties of each resource')
+    args = ap.parse_args()
+
+    def program(resources):
+        props = {f"property{i}": f"value-{i}" for i in range(args.properties)}
+        previous = None
+        for i in range(args.resources):
+            subnet = Subnet(f"subnet-{i}", dict(props, previous_id=previous.id if previous else None))
+            resources.append(subnet)
+            previous = subnet
+
+    for name, deferred in [("eager", False), ("deferred", True)]:
+        endpoint = MonitorEndpoint()
+        try:
+            elapsed = run_program(lambda: program([]), endpoint, deferred_outputs_enabled=deferred)
+            report(name, elapsed, args.resources)
+
+            # Memory is measured separately, since tracing allocations slows everything down.
+            resources: list = []
+            gc.collect()
+            tracemalloc.start()
+            try:
+                run_program(lambda: program(resources), endpoint, deferred_outputs_enabled=deferred)
+                gc.collect()
+                held, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            print(f"{'':<32} {held / args.resources:8.0f} bytes held and {peak / args.resources:8.0f} bytes at peak "
+                  "per resource")
+        finally:
+            endpoint.stop()
+
+
+if __name__ == "__main__":
+    main()
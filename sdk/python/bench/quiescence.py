@@ -0,0 +1,74 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures waiting for a program's RPCs to complete before shutting down: many resources registered without a monitor,
+so that the RPCs themselves cost next to nothing, and a chain of resources that are each made in an apply on the id of
+the one before, registered with the stand-in monitor, which shutdown must wait for even though no RPC is outstanding
+while each apply runs.
+
+    python -m bench.quiescence --resources 50000 --chain 200
+"""
+import argparse
+import resource
+import time
+
+from pulumi import CustomResource
+
+from .util import MonitorEndpoint, run_program, report
+
+
+class Queue(CustomResource):
+    def __init__(self, name, previous_id=None):
+        CustomResource.__init__(self, "bench:index:Queue", name, props={"previousId": previous_id})
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument('--resources', type=int, default=50000, help='The number of resources to register')
+    ap.add_argument('--chain', type=int, default=200, help='The number of resources made in applies')
+    args = ap.parse_args()
+
+    finished = []
+
+    def wide():
+        for i in range(args.resources):
+            Queue(f"queue-{i}")
+        finished.append(time.perf_counter())
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    elapsed = run_program(wide)
+    report("wide", elapsed, args.resources)
+    shutdown = time.perf_counter() - finished[0]
+    print(f"{'':<32} {shutdown:8.3f}s after the program returned, "
+          f"{(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss) / 1024:.0f} MiB more peak RSS")
+
+    def chain():
+        def make(i, previous_id):
+            if i < args.chain:
+                Queue(f"queue-{i}", previous_id).id.apply(lambda id: make(i + 1, id))
+
+        make(0, None)
+
+    endpoint = MonitorEndpoint()
+    try:
+        elapsed = run_program(chain, endpoint)
+    finally:
+        registered = endpoint.stop()
+    report("chain", elapsed, args.chain)
+    # The stack itself is registered as well.
+    print(f"{'':<32} {registered - 1} of {args.chain} resources registered")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures the memory used to register resources with large inputs, such as rendered configuration files, that the
+program doesn't keep, with and without bounded memory. Reports the throughput, and the memory still held once every
+registration has completed and at its peak, per resource.
+
+    python -m bench.registration_memory --resources 1000 --size 100000
+"""
+import argparse
+import functools
+import gc
+import tracemalloc
+
+from pulumi import CustomResource, Output
+
+from .util import MonitorEndpoint, run_program, report
+
+
+class ConfigFile(CustomResource):
+    def __init__(self, name, content):
+        CustomResource.__init__(self, "bench:index:ConfigFile", name, props={"path": f"/etc/{name}", "content": content})
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument('--resources', type=int, default=1000, help='The number of resources to register')
+    ap.add_argument('--size', type=int, default=100000, help='The size of the inputs of each resource, in bytes')
+    ap.add_argument('--parallel', type=int, default=16, help='The number of registrations in flight at a time')
+    args = ap.parse_args()
+
+    def program(memory):
+        def measure(_):
+            # Runs once the last file has been registered, while the finished registrations are still around if
+            # anything keeps them.
+            gc.collect()
+            memory.append(tracemalloc.get_traced_memory()[0])
+
+        previous = None
+        for i in range(args.resources):
+            # Each file is only rendered once the one before it has been registered, the way large programs tend to
+            # stream them out.
+            content = Output.from_input(previous.id if previous else None).apply(
+                lambda _, i=i: f"{i:08}" * (args.size // 8))
+            previous = ConfigFile(f"file-{i}", content)
+        ConfigFile("measured", previous.id.apply(measure))
+
+    for name, bounded_memory in [("default", False), ("bounded memory", True)]:
+        endpoint = MonitorEndpoint()
+        try:
+            memory: list = []
+            gc.collect()
+            tracemalloc.start()
+            try:
+                elapsed = run_program(functools.partial(program, memory), endpoint, parallel=args.parallel,
+                                      bounded_memory_enabled=bounded_memory)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        finally:
+            endpoint.stop()
+        report(name, elapsed, args.resources)
+        print(f"{'':<32} {memory[0] / args.resources:8.0f} bytes held and {peak / args.resources:8.0f} bytes at peak "
+              "per resource")
+
+
+if __name__ == "__main__":
+    main()
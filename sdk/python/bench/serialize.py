@@ -0,0 +1,127 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Measures `rpc.serialize_properties` on wide and deep input bags, both made of plain values and of inputs that take a
+while to resolve, such as Outputs of upstream resources that have not been created yet, and on a chain of nested
+lists that is deeper than the recursion limit. The nested chain is measured with `rpc.serialize_property` alone, since
+converting it to a Protobuf struct is itself recursive. Last, it measures serializing the inputs of many resources that
+are all passed the same Output of a large map, which is only serialized once.
+
+    python -m bench.serialize --width 200 --depth 8 --delay-ms 5 --nesting 2000 --resources 1000
+"""
+import argparse
+import asyncio
+import time
+
+from pulumi import Output
+from pulumi.runtime import rpc, settings
+
+from .util import report
+
+
+async def slow(value, delay: float):
+    await asyncio.sleep(delay)
+    return value
+
+
+def wide(width: int, leaf):
+    return {f"prop{i}": leaf(i) for i in range(width)}
+
+
+def deep(depth: int, fanout: int, leaf):
+    if depth == 0:
+        return leaf(0)
+    return {f"child{i}": deep(depth - 1, fanout, leaf) for i in range(fanout)}
+
+
+def nested(nesting: int):
+    value = "leaf"
+    for _ in range(nesting):
+        value = [value]
+    return value
+
+
+def count_nodes(value) -> int:
+    count = 0
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        count += 1
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return count
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument('--width', type=int, default=200, help='The number of top-level properties in the wide bag')
+    ap.add_argument('--depth', type=int, default=8, help='The depth of the deep bag')
+    ap.add_argument('--fanout', type=int, default=2, help='The number of children of each node in the deep bag')
+    ap.add_argument('--delay-ms', type=float, default=5, help='How long each slow input takes to resolve')
+    ap.add_argument('--nesting', type=int, default=2000, help='How deeply the lists of the nested bag are nested')
+    ap.add_argument('--iterations', type=int, default=20, help='The number of times to serialize each plain bag')
+    ap.add_argument('--resources', type=int, default=1000, help='The number of resources sharing an Output')
+    args = ap.parse_args()
+    delay = args.delay_ms / 1000
+
+    def properties(bag):
+        return rpc.serialize_properties(bag, {})
+
+    def property(value):  # pylint: disable=redefined-builtin
+        return rpc.serialize_property(value, [])
+
+    cases = [
+        ("wide/plain", lambda: wide(args.width, lambda i: i), properties, args.iterations),
+        ("wide/slow", lambda: wide(args.width, lambda i: slow(i, delay)), properties, 1),
+        ("deep/plain", lambda: deep(args.depth, args.fanout, lambda i: i), properties, args.iterations),
+        ("deep/slow", lambda: deep(args.depth, args.fanout, lambda i: slow(i, delay)), properties, 1),
+        ("nested", lambda: nested(args.nesting), property, args.iterations),
+    ]
+
+    loop = asyncio.new_event_loop()
+    try:
+        for name, make_bag, serialize, iterations in cases:
+            bags = [make_bag() for _ in range(iterations)]
+            nodes = count_nodes(bags[0]) * iterations
+
+            start = time.perf_counter()
+            try:
+                for bag in bags:
+                    loop.run_until_complete(serialize(bag))
+            except RecursionError:
+                print(f"{name}: exceeded the recursion limit")
+                continue
+            report(name, time.perf_counter() - start, nodes, unit="nodes")
+
+        asyncio.set_event_loop(loop)
+        shared = Output.from_input(wide(args.width, lambda i: {"key": f"key-{i}", "value": f"value-{i}"}))
+        loop.run_until_complete(shared.future())
+        bags = [{"name": f"resource-{i}", "tags": shared} for i in range(args.resources)]
+        start = time.perf_counter()
+        loop.run_until_complete(asyncio.gather(*[properties(bag) for bag in bags]))
+        report("shared", time.perf_counter() - start, args.resources, unit="resources")
+        stats = settings.SETTINGS.serialization_memo().stats()
+        print(f"(serialization memo: {stats.hits} hits, {stats.misses} misses)")
+    finally:
+        loop.close()
+
+    print(f"(one slow input takes {args.delay_ms}ms; awaiting them in turn would take at least "
+          f"{args.width * args.delay_ms:.0f}ms for the wide bag and "
+          f"{args.fanout ** args.depth * args.delay_ms:.0f}ms for the deep bag)")
+
+
+if __name__ == "__main__":
+    main()
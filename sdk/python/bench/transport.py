@@ -0,0 +1,54 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Compares the executor-based and grpc.aio transports by registering N resources against a local stand-in monitor.
+
+    python -m bench.transport --resources 5000 --parallel 32
+"""
+import argparse
+
+from pulumi import CustomResource
+
+from .util import MonitorEndpoint, run_program, report
+
+
+class BenchResource(CustomResource):
+    def __init__(self, name, value):
+        CustomResource.__init__(self, "bench:index:Resource", name, props={"value": value})
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument('--resources', type=int, default=2000, help='The number of resources to register')
+    ap.add_argument('--parallel', type=int, default=0,
+                    help='The maximum number of in-flight resource operations (default=unbounded)')
+    args = ap.parse_args()
+
+    def program():
+        for i in range(args.resources):
+            BenchResource(f"res-{i}", i)
+
+    for name, aio in [("executor", False), ("grpc.aio", True)]:
+        endpoint = MonitorEndpoint()
+        try:
+            elapsed = run_program(program, endpoint, grpc_aio_enabled=aio, parallel=args.parallel)
+        finally:
+            reg_count = endpoint.stop()
+        # The stack resource is registered in addition to the benchmark resources.
+        assert reg_count == args.resources + 1
+        report(name, elapsed, args.resources)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Shared helpers for the runtime benchmarks: a local stand-in for the resource monitor and engine, and a driver that runs
+a Pulumi program against it.
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+from multiprocessing.connection import Connection
+from typing import Callable, Optional
+
+import grpc
+import grpc.aio
+from google.protobuf import empty_pb2
+from pulumi.runtime import proto, settings
+from pulumi.runtime.proto import engine_pb2_grpc, resource_pb2_grpc
+from pulumi.runtime.stack import run_in_stack
+
+# Keep gRPC from logging to stderr when the stand-in server shuts down.
+logging.disable(level=logging.CRITICAL)
+
+# _MAX_RPC_MESSAGE_SIZE raises the gRPC Max Message size from `4194304` (4mb) to `419430400` (400mb)
+_MAX_RPC_MESSAGE_SIZE = 1024 * 1024 * 400
+_GRPC_CHANNEL_OPTIONS = [('grpc.max_receive_message_length', _MAX_RPC_MESSAGE_SIZE)]
+
+# gRPC C-core servers cancel incoming calls once too many are waiting to be matched with a handler. The engine has no
+# such limit, so lift it for the stand-in.
+_GRPC_SERVER_OPTIONS = _GRPC_CHANNEL_OPTIONS + [
+    ('grpc.server.max_pending_requests', 1 << 20),
+    ('grpc.server.max_pending_requests_hard_limit', 1 << 20),
+]
+
+
+class BenchResourceMonitor(proto.ResourceMonitorServicer):
+    """
+    A resource monitor that accepts every registration and echoes the inputs back as outputs. It does no work of its
+    own, so the time spent in a benchmark is dominated by the SDK and the transport.
+    """
+
+    def __init__(self):
+        self.reg_count = 0
+
+    async def SupportsFeature(self, request, context):
+        return proto.SupportsFeatureResponse(hasSupport=True)
+
+    async def Invoke(self, request, context):
+        return proto.InvokeResponse(**{"return": request.args})
+
+    async def ReadResource(self, request, context):
+        return proto.ReadResourceResponse(urn=f"urn:{request.type}::{request.name}", properties=request.properties)
+
+    async def RegisterResource(self, request, context):
+        self.reg_count += 1
+        return proto.RegisterResourceResponse(
+            urn=f"urn:{request.type}::{request.name}", id=request.name, object=request.object)
+
+    async def RegisterResourceOutputs(self, request, context):
+        return empty_pb2.Empty()
+
+
+class BenchEngine(proto.EngineServicer):
+    async def Log(self, request, context):
+        return empty_pb2.Empty()
+
+
+def _serve(conn: Connection):
+    async def serve():
+        monitor = BenchResourceMonitor()
+        server = grpc.aio.server(options=_GRPC_SERVER_OPTIONS)
+        resource_pb2_grpc.add_ResourceMonitorServicer_to_server(monitor, server)
+        engine_pb2_grpc.add_EngineServicer_to_server(BenchEngine(), server)
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        conn.send(port)
+
+        # Serve until asked to stop, then report the number of registrations we saw.
+        await asyncio.get_event_loop().run_in_executor(None, conn.recv)
+        await server.stop(None)
+        conn.send(monitor.reg_count)
+
+    asyncio.new_event_loop().run_until_complete(serve())
+
+
+class MonitorEndpoint:
+    """
+    A stand-in resource monitor and engine, served from a separate process so that, like the real engine, it does not
+    compete with the program for the GIL.
+    """
+
+    address: str
+
+    def __init__(self):
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(target=_serve, args=(child_conn,), daemon=True)
+        self._process.start()
+        self.address = f"127.0.0.1:{self._conn.recv()}"
+
+    def stop(self) -> int:
+        """
+        Stops the stand-in monitor and returns the number of resources that were registered with it.
+        """
+        self._conn.send(None)
+        reg_count = self._conn.recv()
+        self._process.join()
+        return reg_count
+
+
+def run_program(program: Callable[[], None], endpoint: Optional[MonitorEndpoint] = None, **kwargs) -> float:
+    """
+    Runs `program` inside a new stack on a fresh event loop, connected to the given stand-in monitor, and returns the
+    elapsed wall-clock time in seconds. Extra keyword arguments are passed to `Settings`.
+    """
+    address = endpoint.address if endpoint is not None else None
+    settings.configure(settings.Settings(monitor=address,
+                                         engine=address,
+                                         project="bench",
+                                         stack="bench",
+                                         dry_run=False,
+                                         test_mode_enabled=endpoint is None,
+                                         **kwargs))
+    settings.ROOT = None
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    start = time.perf_counter()
+    try:
+        loop.run_until_complete(run_in_stack(program))
+    finally:
+        elapsed = time.perf_counter() - start
+        loop.close()
+    return elapsed
+
+
+def report(name: str, elapsed: float, count: int, unit: str = "resources"):
+    print(f"{name:<32} {elapsed:8.3f}s  {count / elapsed:12.1f} {unit}/s")
@@ -53,6 +53,13 @@ const (
 
 	// The runtime expects the config object to be saved to this environment variable.
 	pulumiConfigVar = "PULUMI_CONFIG"
+
+	// The runtime only sends its own debug messages to the engine when this environment variable is "true".
+	pulumiDebugLoggingVar = "PULUMI_ENABLE_DEBUG_LOGGING"
+
+	// The log level, flowed to the language host by the engine with --logflow, at which the engine logs the debug
+	// messages it receives.
+	debugLogLevel = 3
 )
 
 // Launches the language host RPC endpoint, which in turn fires up an RPC server implementing the
@@ -188,9 +195,13 @@ func (host *pythonLanguageHost) Run(ctx context.Context, req *pulumirpc.RunReque
 		}
 	}
 
+	// Formatting and sending the runtime's debug messages is costly, so they are only turned on when the engine has
+	// asked for a log level at which it will show them.
+	debugLogging := bool(logging.V(debugLogLevel))
+
 	cmd.Stdout = os.Stdout
 	cmd.Stderr = os.Stderr
-	if virtualenv != "" || config != "" {
+	if virtualenv != "" || config != "" || debugLogging {
 		env := os.Environ()
 		if virtualenv != "" {
 			env = python.ActivateVirtualEnv(env, virtualenv)
@@ -198,6 +209,9 @@ func (host *pythonLanguageHost) Run(ctx context.Context, req *pulumirpc.RunReque
 		if config != "" {
 			env = append(env, pulumiConfigVar+"="+config)
 		}
+		if debugLogging {
+			env = append(env, pulumiDebugLoggingVar+"=true")
+		}
 		cmd.Env = env
 	}
 	if err := cmd.Run(); err != nil {
@@ -16,9 +16,14 @@
 Utility functions for logging messages to the diagnostic stream of the Pulumi CLI.
 """
 import asyncio
+import collections
 import sys
-from typing import Optional, TYPE_CHECKING
+import threading
+from typing import Any, Callable, Deque, Optional, Set, Tuple, Union, TYPE_CHECKING
 
+import grpc
+
+from .runtime import settings
 from .runtime.settings import get_engine
 from .runtime.proto import engine_pb2
 
@@ -26,18 +31,87 @@ if TYPE_CHECKING:
     from .resource import Resource
 
 
-def debug(msg: str, resource: Optional['Resource'] = None, stream_id: Optional[int] = None, ephemeral: Optional[bool] = None) -> None:
+_MAX_QUEUED_MESSAGES = 10000
+"""
+The number of log messages that may wait for the background sender before logging applies backpressure.
+"""
+
+_MAX_BATCH_SIZE = 256
+"""
+The largest number of log messages that the background sender delivers in a single trip to the RPC executor.
+"""
+
+_queue: Deque[Tuple[Any, engine_pb2.LogRequest]] = collections.deque()
+"""
+Log requests waiting for the background sender, in the order they were logged, along with the engine to send them to.
+"""
+
+_droppable: Set[int] = set()
+"""
+The ids of queued requests for the runtime's own debug messages, which may be dropped rather than delivered when the
+queue is full.
+"""
+
+_send_lock = threading.Lock()
+"""
+Held while log requests are taken off the queue and sent through the blocking engine client, so that messages are
+delivered in the order they were logged, whether by the background sender or synchronously.
+"""
+
+_sender: Optional['asyncio.Future'] = None
+_sender_loop: Optional[asyncio.AbstractEventLoop] = None
+
+_pending: Set['asyncio.Future'] = set()
+"""
+The background sender and the tasks waiting on a resource's URN before queueing a message, which must be allowed to
+finish before the program exits.
+"""
+
+_dropped = 0
+"""
+The number of the runtime's debug messages dropped because the queue was full.
+"""
+
+_failed = 0
+"""
+The number of messages the background sender failed to deliver. Only updated while holding the send lock.
+"""
+
+_failure: Optional[Exception] = None
+"""
+The first error the background sender ran into, raised once everything has been flushed. Only updated while holding
+the send lock.
+"""
+
+
+def is_debug_enabled() -> bool:
+    """
+    Returns whether the runtime's own debug messages are logged. They are off unless enabled through the runtime
+    settings (PULUMI_ENABLE_DEBUG_LOGGING, which the language host sets when the engine flows a log level that shows
+    debug messages), since formatting and sending them is a large part of the cost of registering resources. Messages
+    that programs log with `debug` are always sent.
+    """
+    return bool(settings.SETTINGS.debug_logging_enabled)
+
+
+def debug(msg: Union[str, Callable[[], str]], resource: Optional['Resource'] = None, stream_id: Optional[int] = None, ephemeral: Optional[bool] = None) -> None:
     """
     Logs a message to the Pulumi CLI's debug channel, associating it with a resource
     and stream_id if provided.
 
-    :param str msg: The message to send to the Pulumi CLI.
+    :param msg: The message to send to the Pulumi CLI, or a function returning it. A function is only called, and
+           its message only sent, if debug logging is enabled, which avoids formatting messages that would be discarded.
     :param Optional[Resource] resource: If provided, associate this message with the given resource in the Pulumi CLI.
     :param Optional[int] stream_id: If provided, associate this message with a stream of other messages.
     """
+    droppable = callable(msg)
+    if callable(msg):
+        if not is_debug_enabled():
+            return
+        msg = msg()
     engine = get_engine()
     if engine is not None:
-        _log(engine, engine_pb2.DEBUG, msg, resource, stream_id, ephemeral)
+        _log(engine, engine_pb2.DEBUG, msg, resource, stream_id, ephemeral, droppable)
     else:
         print("debug: " + msg, file=sys.stderr)
 
@@ -90,24 +164,139 @@ def error(msg: str, resource: Optional['Resource'] = None, stream_id: Optional[i
         print("error: " + msg, file=sys.stderr)
 
 
-def _log(engine, severity, message, resource, stream_id, ephemeral):
+def _log(engine, severity, message, resource, stream_id, ephemeral, droppable=False):
     if stream_id is None:
         stream_id = 0
 
-    # If we can log synchronously, do so. The worst thing we can do with a log message is exit
-    # before we have the chance to send the message.
-    #
-    # We can log synchronously as long as we haven't been given a resource to attach to. If we have,
-    # we have to asynchronously resolve the URN first.
-    async def do_log():
-        resolved_urn = await resource.urn.future()
-        req = engine_pb2.LogRequest(severity=severity, message=message, urn=resolved_urn,
+    # Outside of the event loop (for example, when reporting a failure after the program has finished) there is no
+    # sender to hand the message to, so deliver anything still queued and then this message synchronously. The worst
+    # thing we can do with a log message is exit before we have the chance to send it.
+    if resource is None and asyncio._get_running_loop() is None:  # type: ignore # pylint: disable=protected-access
+        req = engine_pb2.LogRequest(severity=severity, message=message, urn="",
                                     streamId=stream_id, ephemeral=ephemeral)
-        engine.Log(req)
+        _drain_sync()
+        with _send_lock:
+            engine.Log(req)
+        return
 
+    # Messages attached to a resource have to wait for its URN, so they join the queue once it has resolved.
     if resource is not None:
-        asyncio.ensure_future(do_log())
+        async def enqueue_with_urn():
+            try:
+                resolved_urn = await resource.urn.future()
+            except Exception:  # pylint: disable=broad-except
+                # The resource failed to register. The message is still worth delivering, just not attached to it.
+                resolved_urn = ""
+            _enqueue(engine, engine_pb2.LogRequest(severity=severity, message=message, urn=resolved_urn,
+                                                   streamId=stream_id, ephemeral=ephemeral), droppable)
+
+        _track(asyncio.ensure_future(enqueue_with_urn()))
     else:
-        req = engine_pb2.LogRequest(severity=severity, message=message, urn="",
-                                    streamId=stream_id, ephemeral=ephemeral)
-        engine.Log(req)
+        _enqueue(engine, engine_pb2.LogRequest(severity=severity, message=message, urn="",
+                                               streamId=stream_id, ephemeral=ephemeral), droppable)
+
+
+def _track(task: 'asyncio.Future'):
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+def _enqueue(engine, req: engine_pb2.LogRequest, droppable: bool = False):
+    global _dropped, _sender, _sender_loop  # pylint: disable=global-statement
+
+    if len(_queue) >= _MAX_QUEUED_MESSAGES:
+        # Only the runtime's own debug messages are dropped. Messages that the program logged itself, at any
+        # severity, are always delivered.
+        if droppable:
+            _dropped += 1
+            return
+        # The sender has fallen behind. Rather than grow without bound or lose a message that matters, deliver
+        # everything that is queued right here, holding up the program until the engine has caught up.
+        _drain_sync()
+
+    _queue.append((engine, req))
+    if droppable:
+        _droppable.add(id(req))
+
+    loop = asyncio.get_event_loop()
+    if _sender is None or _sender.done() or _sender_loop is not loop:
+        sender = asyncio.ensure_future(_send_queued())
+        _sender, _sender_loop = sender, loop
+        _track(sender)
+
+
+def _dequeue() -> Tuple[Any, engine_pb2.LogRequest]:
+    engine, req = _queue.popleft()
+    _droppable.discard(id(req))
+    return engine, req
+
+
+async def _send_queued():
+    while _queue:
+        if settings.SETTINGS.engine_aio() is not None:
+            # The asyncio transport sends each message on the event loop, one at a time so they arrive in order.
+            _, req = _dequeue()
+            try:
+                await settings.engine_rpc("Log", req)
+            except Exception as exn:  # pylint: disable=broad-except
+                with _send_lock:
+                    _delivery_failed(exn)
+        else:
+            await settings.SETTINGS.rpc_executor().run(_send_batch)
+
+
+def _send_batch():
+    # Messages are only taken off the queue once the lock is held, so a batch can't be overtaken by newer messages
+    # delivered synchronously in the meantime.
+    with _send_lock:
+        for _ in range(min(len(_queue), _MAX_BATCH_SIZE)):
+            engine, req = _dequeue()
+            try:
+                engine.Log(req)
+            except Exception as exn:  # pylint: disable=broad-except
+                _delivery_failed(exn)
+
+
+def _delivery_failed(exn: Exception):
+    global _failed, _failure  # pylint: disable=global-statement
+
+    # If the engine has gone away, the deployment is over and there is nobody left to deliver to.
+    # pylint: disable=no-member
+    if isinstance(exn, grpc.RpcError) and exn.code() == grpc.StatusCode.UNAVAILABLE:
+        sys.exit(0)
+
+    # Any other failure must not hold up the messages queued behind this one. The first error is raised once
+    # everything has been flushed.
+    _failed += 1
+    if _failure is None:
+        _failure = exn
+
+
+def _drain_sync():
+    with _send_lock:
+        while _queue:
+            engine, req = _dequeue()
+            engine.Log(req)
+
+
+async def _flush():
+    """
+    Waits for every message logged so far, including those waiting on a resource's URN, to be delivered, and then
+    raises the first error the background sender ran into, if any.
+    """
+    global _dropped, _failed, _failure  # pylint: disable=global-statement
+    while True:
+        while _pending:
+            await asyncio.gather(*list(_pending), return_exceptions=True)
+        if not _dropped:
+            break
+        dropped, _dropped = _dropped, 0
+        warn(f"{dropped} debug messages were dropped because the log queue was full")
+
+    with _send_lock:
+        failed, _failed = _failed, 0
+        failure, _failure = _failure, None
+    if failure is not None:
+        # The engine is what failed to take them, so this can't go through it.
+        print(f"warning: {failed} log messages could not be delivered to the engine", file=sys.stderr)
+        raise failure
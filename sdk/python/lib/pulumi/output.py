@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import asyncio
-from functools import reduce
+import functools
 from inspect import isawaitable
 from typing import (
     TypeVar,
@@ -24,13 +24,17 @@ from typing import (
     cast,
     Mapping,
     Any,
+    Dict,
     List,
+    NamedTuple,
     Optional,
+    Tuple,
     TYPE_CHECKING
 )
 
 from . import runtime
 from .runtime import rpc
+from .runtime.rpc_manager import RPC_MANAGER
 
 if TYPE_CHECKING:
     from .resource import Resource
@@ -51,55 +55,127 @@ class Output(Generic[T]):
     dependency graph' to be created, which properly tracks the relationship between resources.
     """
 
-    _is_known: Awaitable[bool]
-    """
-    Whether or not this 'Output' should actually perform .apply calls.  During a preview,
-    an Output value may not be known (because it would have to actually be computed by doing an
-    'update').  In that case, we don't want to perform any .apply calls as the callbacks
-    may not expect an undefined value.  So, instead, we just transition to another Output
-    value that itself knows it should not perform .apply calls.
-    """
+    # Programs may still set attributes of their own on an Output, so it keeps a __dict__ for them, which is only
+    # allocated if they do.
+    __slots__ = ("_state", "_inputs", "_has_unknowns", "__dict__", "__weakref__")
 
-    _is_secret: Awaitable[bool]
+    _state: Optional['asyncio.Future[_OutputState]']
     """
-    Whether or not this 'Output' should be treated as containing secret data. Secret outputs are tagged when
-    flowing across the RPC interface to the resource monitor, such that when they are persisted to disk in
-    our state file, they are encrypted instead of being in plaintext.
+    The future of everything this 'Output' resolves to: its value, whether it is known and secret, and the resources
+    it depends on. These are always known together, so one future stands in for all of them.
     """
 
-    _future: Awaitable[T]
+    _inputs: Union[Tuple[Any, Any, Any, Any], '_Projection', None]
     """
-    Future that actually produces the concrete value of this output.
+    The awaitables this 'Output' was made from, or the lookups it projects out of another output, until they are
+    combined into _state. Outputs made from futures that have not resolved yet are only combined once something asks
+    for them, so that an Output whose value is produced on demand is not forced as soon as it is created.
     """
 
-    _resources: Awaitable[Set['Resource']]
+    _has_unknowns: Optional[bool]
     """
-    The list of resources that this output value depends on.
+    Whether the value of this 'Output' contains unknowns, once something has checked.
     """
 
     def __init__(self, resources: Union[Awaitable[Set['Resource']], Set['Resource']],
                  future: Awaitable[T], is_known: Awaitable[bool],
                  is_secret: Optional[Awaitable[bool]] = None) -> None:
-        is_known = asyncio.ensure_future(is_known)
-        future = asyncio.ensure_future(future)
+        self._state = None
+        self._inputs = (resources, future, is_known, is_secret)
+        self._has_unknowns = None
 
-        async def is_value_known() -> bool:
-            return await is_known and not contains_unknowns(await future)
+        awaitables = [future, is_known]
+        if is_secret is not None:
+            awaitables.append(is_secret)
+        if not isinstance(resources, set):
+            awaitables.append(resources)
+        if all(isinstance(a, asyncio.Future) and a.done() and not a.cancelled() and a.exception() is None
+               for a in awaitables):
+            # Outputs of values that have already resolved, which are most of them, are resolved straight away.
+            self._state = _resolved(_OutputState(
+                cast(asyncio.Future, future).result(),
+                cast(asyncio.Future, is_known).result(),
+                is_secret is not None and cast(asyncio.Future, is_secret).result(),
+                resources if isinstance(resources, set) else cast(asyncio.Future, resources).result()))
+            self._inputs = None
+        elif not all(isinstance(a, asyncio.Future) for a in awaitables):
+            # Coroutines are scheduled straight away, as they would be if they were awaited separately.
+            self._get_state()
 
-        if isinstance(resources, set):
-            self._resources = asyncio.Future()
-            self._resources.set_result(resources)
-        else:
-            self._resources = asyncio.ensure_future(resources)
+    @staticmethod
+    def _from_state(state: 'asyncio.Future[_OutputState]') -> 'Output[Any]':
+        """
+        Makes an Output that resolves to the given state.
+        """
+        output: Output[Any] = Output.__new__(Output)
+        output._state = state
+        output._inputs = None
+        output._has_unknowns = None
+        return output
 
-        self._future = future
-        self._is_known = asyncio.ensure_future(is_value_known())
+    def _resolved_state(self) -> Optional['_OutputState']:
+        """
+        Returns the state of this output if it has already resolved successfully, or None otherwise.
+        """
+        state = self._state
+        if state is None or not state.done() or state.cancelled() or state.exception() is not None:
+            return None
+        return state.result()
+
+    def _get_state(self) -> 'asyncio.Future[_OutputState]':
+        state = self._state
+        if state is None:
+            inputs = self._inputs
+            if isinstance(inputs, _Projection):
+                state = self._state = _chain(inputs.root._get_state(), inputs.run)
+            else:
+                assert inputs is not None
+                state = self._state = asyncio.ensure_future(_combine(*inputs))
+            self._inputs = None
+        return state
+
+    def _is_state_known(self, state: '_OutputState') -> bool:
+        return state.known and not self._value_contains_unknowns(state.value)
+
+    def _value_contains_unknowns(self, value: T) -> bool:
+        # The value of an Output never changes, so it is only walked once however many consumers look at it.
+        if self._has_unknowns is None:
+            self._has_unknowns = contains_unknowns(value)
+        return self._has_unknowns
+
+    @property
+    def _is_known(self) -> Awaitable[bool]:
+        """
+        Whether or not this 'Output' should actually perform .apply calls.  During a preview,
+        an Output value may not be known (because it would have to actually be computed by doing an
+        'update').  In that case, we don't want to perform any .apply calls as the callbacks
+        may not expect an undefined value.  So, instead, we just transition to another Output
+        value that itself knows it should not perform .apply calls.
+        """
+        return _then(self._get_state(), self._is_state_known)
 
-        if is_secret is not None:
-            self._is_secret = asyncio.ensure_future(is_secret)
-        else:
-            self._is_secret = asyncio.Future()
-            self._is_secret.set_result(False)
+    @property
+    def _is_secret(self) -> Awaitable[bool]:
+        """
+        Whether or not this 'Output' should be treated as containing secret data. Secret outputs are tagged when
+        flowing across the RPC interface to the resource monitor, such that when they are persisted to disk in
+        our state file, they are encrypted instead of being in plaintext.
+        """
+        return _then(self._get_state(), lambda state: state.secret)
+
+    @property
+    def _future(self) -> Awaitable[T]:
+        """
+        Future that actually produces the concrete value of this output.
+        """
+        return _then(self._get_state(), lambda state: state.value)
+
+    @property
+    def _resources(self) -> Awaitable[Set['Resource']]:
+        """
+        The list of resources that this output value depends on.
+        """
+        return _then(self._get_state(), lambda state: state.all_resources())
 
     # Private implementation details - do not document.
     def resources(self) -> Awaitable[Set['Resource']]:
@@ -108,10 +184,9 @@ class Output(Generic[T]):
     def future(self, with_unknowns: Optional[bool] = None) -> Awaitable[Optional[T]]:
         # If the caller did not explicitly ask to see unknown values and the value of this output contains unnkowns,
         # return None. This preserves compatibility with earlier versios of the Pulumi SDK.
-        async def get_value() -> Optional[T]:
-            val = await self._future
-            return None if not with_unknowns and contains_unknowns(val) else val
-        return asyncio.ensure_future(get_value())
+        def get_value(state: _OutputState) -> Optional[T]:
+            return None if not with_unknowns and self._value_contains_unknowns(state.value) else state.value
+        return _then(self._get_state(), get_value)
 
     def is_known(self) -> Awaitable[bool]:
         return self._is_known
@@ -120,7 +195,8 @@ class Output(Generic[T]):
         return self._is_secret
     # End private implementation details.
 
-    def apply(self, func: Callable[[T], Input[U]], run_with_unknowns: Optional[bool] = None) -> 'Output[U]':
+    def apply(self, func: Callable[[T], Input[U]], run_with_unknowns: Optional[bool] = None,
+              run_in_executor: Optional[bool] = None) -> 'Output[U]':
         """
         Transforms the data of the output with the provided func.  The result remains a
         Output so that dependent resources can be properly tracked.
@@ -136,80 +212,71 @@ class Output(Generic[T]):
         :param Callable[[T],Input[U]] func: A function that will, given this Output's value, transform the value to
                an Input of some kind, where an Input is either a prompt value, a Future, or another Output of the given
                type.
+        :param Optional[bool] run_in_executor: Whether to run 'func' on the apply executor rather than on the event
+               loop, so that a callback that takes a long time to compute doesn't hold up the rest of the program. The
+               executor is a thread pool unless one is set with `pulumi.runtime.set_apply_executor`. 'func' must not
+               make Outputs, and if the executor runs it in another process, it and this Output's value must be
+               picklable.
         :return: A transformed Output obtained from running the transformation function on this Output's value.
         :rtype: Output[U]
         """
-        result_resources: asyncio.Future[Set['Resource']] = asyncio.Future()
-        result_is_known: asyncio.Future[bool] = asyncio.Future()
-        result_is_secret: asyncio.Future[bool] = asyncio.Future()
+        # The apply runs as soon as this output resolves, which is straight away if it already has. Only a callback
+        # that returns an Output or awaitable that hasn't resolved yet needs a task to wait on it.
+        return cast('Output[U]', Output._from_state(
+            _chain(self._get_state(),
+                   lambda state: self._apply_to_state(state, func, run_with_unknowns, run_in_executor))))
 
-        # The "run" coroutine actually runs the apply.
-        async def run() -> U:
-            try:
-                # Await this output's details.
-                resources = await self._resources
-                is_known = await self._is_known
-                is_secret = await self._is_secret
-                value = await self._future
-
-                if runtime.is_dry_run():
-                    # During previews only perform the apply if the engine was able to give us an actual value for this
-                    # Output or if the caller is able to tolerate unknown values.
-                    apply_during_preview = is_known or run_with_unknowns
-
-                    if not apply_during_preview:
-                        # We didn't actually run the function, our new Output is definitely
-                        # **not** known.
-                        result_resources.set_result(resources)
-                        result_is_known.set_result(False)
-                        result_is_secret.set_result(is_secret)
-                        return cast(U, None)
-
-                    # If we are running with unknown values and the value is explicitly unknown but does not actually
-                    # contain any unknown values, collapse its value to the unknown value. This ensures that callbacks
-                    # that expect to see unknowns during preview in outputs that are not known will always do so.
-                    if not is_known and run_with_unknowns and not contains_unknowns(value):
-                        value = cast(T, UNKNOWN)
-
-                transformed: Input[U] = func(value)
-                # Transformed is an Input, meaning there are three cases:
-                #  1. transformed is an Output[U]
-                if isinstance(transformed, Output):
-                    transformed_as_output = cast(Output[U], transformed)
-                    # Forward along the inner output's _resources, _is_known and _is_secret values.
-                    transformed_resources = await transformed_as_output._resources
-                    result_resources.set_result(resources | transformed_resources)
-                    result_is_known.set_result(await transformed_as_output._is_known)
-                    result_is_secret.set_result(await transformed_as_output._is_secret or is_secret)
-                    return await transformed.future(with_unknowns=True)
-
-                #  2. transformed is an Awaitable[U]
-                if isawaitable(transformed):
-                    # Since transformed is not an Output, it is known.
-                    result_resources.set_result(resources)
-                    result_is_known.set_result(True)
-                    result_is_secret.set_result(is_secret)
-                    return await cast(Awaitable[U], transformed)
-
-                #  3. transformed is U. It is trivially known.
-                result_resources.set_result(resources)
-                result_is_known.set_result(True)
-                result_is_secret.set_result(is_secret)
-                return cast(U, transformed)
-            finally:
-                # Always resolve the future if it hasn't been done already.
-                if not result_is_known.done():
-                    # Try and set the result. This might fail if we're shutting down,
-                    # so swallow that error if that occurs.
-                    try:
-                        result_resources.set_result(resources)
-                        result_is_known.set_result(False)
-                        result_is_secret.set_result(False)
-                    except RuntimeError:
-                        pass
-
-        run_fut = asyncio.ensure_future(run())
-        return Output(result_resources, run_fut, result_is_known, result_is_secret)
+    def _project(self, func: Callable[[Any], Any]) -> 'Output[Any]':
+        """
+        Returns the Output of an attribute or index lookup on the value of this output. Lookups have no side effects,
+        so on an output that hasn't resolved yet they are only run once something asks for their result, and a chain
+        of them runs in one go.
+        """
+        state = self._state
+        if state is not None and state.done():
+            return self.apply(func, True)
+
+        inputs = self._inputs
+        projection = (inputs.extend(self, func) if state is None and isinstance(inputs, _Projection)
+                      else _Projection(self, ((self, func),)))
+        output: Output[Any] = Output.__new__(Output)
+        output._state = None
+        output._inputs = projection
+        output._has_unknowns = None
+        return output
+
+    def _apply_to_state(self, state: '_OutputState', func: Callable[[T], Input[U]], run_with_unknowns: Optional[bool],
+                        run_in_executor: Optional[bool] = None) -> Union['_OutputState', Awaitable['_OutputState']]:
+        """
+        Runs an apply on the given state of this output, returning the state of the result, or an awaitable of it if
+        the callback returned an Output or awaitable that hasn't resolved yet.
+        """
+        resources = state.resources
+        is_secret = state.secret
+        value = state.value
+
+        if runtime.is_dry_run():
+            # Whether the value is known only matters during previews, so it is only worked out then.
+            is_known = self._is_state_known(state)
+
+            # During previews only perform the apply if the engine was able to give us an actual value for this
+            # Output or if the caller is able to tolerate unknown values.
+            apply_during_preview = is_known or run_with_unknowns
+
+            if not apply_during_preview:
+                # We didn't actually run the function, our new Output is definitely
+                # **not** known.
+                return _OutputState(None, False, is_secret, resources)
+
+            # If we are running with unknown values and the value is explicitly unknown but does not actually
+            # contain any unknown values, collapse its value to the unknown value. This ensures that callbacks
+            # that expect to see unknowns during preview in outputs that are not known will always do so.
+            if not is_known and run_with_unknowns and not self._value_contains_unknowns(value):
+                value = cast(T, UNKNOWN)
+
+        if run_in_executor:
+            return _apply_in_executor(func, value, is_secret, resources)
+        return _transformed_state(func(value), is_secret, resources)
 
     def __getattr__(self, item: str) -> 'Output[Any]': # type: ignore
         """
@@ -219,7 +286,7 @@ class Output(Generic[T]):
         :return: An Output of this Output's underlying value's property with the given name.
         :rtype: Output[Any]
         """
-        return self.apply(lambda v: UNKNOWN if isinstance(v, Unknown) else getattr(v, item), True)
+        return self._project(lambda v: UNKNOWN if isinstance(v, Unknown) else getattr(v, item))
 
     def __getitem__(self, key: Any) -> 'Output[Any]':
         """
@@ -229,7 +296,7 @@ class Output(Generic[T]):
         :return: An Output of this Output's underlying value, keyed with the given key as if it were a dictionary.
         :rtype: Output[Any]
         """
-        return self.apply(lambda v: UNKNOWN if isinstance(v, Unknown) else cast(Any, v)[key], True)
+        return self._project(lambda v: UNKNOWN if isinstance(v, Unknown) else cast(Any, v)[key])
 
     @staticmethod
     def from_input(val: Input[T]) -> 'Output[T]':
@@ -242,42 +309,18 @@ class Output(Generic[T]):
         :rtype: Output[T]
         """
 
-        # Is it an output already? Recurse into the value contained within it.
-        if isinstance(val, Output):
-            return val.apply(Output.from_input, True)
-
-        # Is a dict or list? Recurse into the values within them.
-        if isinstance(val, dict):
-            # Since Output.all works on lists early, serialize this dictionary into a list of lists first.
-            # Once we have a output of the list of properties, we can use an apply to re-hydrate it back into a dict.
-            dict_items = [[k, Output.from_input(v)] for k, v in val.items()]
-            # type checker doesn't like returing a Dict in the apply callback
-            fn = cast(Callable[[List[Any]], T], lambda props: {k: v for k, v in props}) # pylint: disable=unnecessary-comprehension
-            return Output.all(*dict_items).apply(fn, True)
-
-        if isinstance(val, list):
-            list_items: List[Union[Any, Awaitable[Any], Output[Any]]] = [Output.from_input(v) for v in val]
-            # invariant: http://mypy.readthedocs.io/en/latest/common_issues.html#variance
-            output: Output[T] = cast(Output[T], Output.all(*list(list_items))) # type: ignore
-            return output
-
-        # If it's not an output, list, or dict, it must be known and not secret
-        is_known_fut: asyncio.Future[bool] = asyncio.Future()
-        is_secret_fut: asyncio.Future[bool] = asyncio.Future()
-        is_known_fut.set_result(True)
-        is_secret_fut.set_result(False)
-
-        # Is it awaitable? If so, schedule it for execution and use the resulting future
-        # as the value future for a new output.
-        if isawaitable(val):
-            val_fut = cast(asyncio.Future, val)
-            promise_output = Output(set(), asyncio.ensure_future(val_fut), is_known_fut, is_secret_fut)
-            return promise_output.apply(Output.from_input, True)
+        # Is it a prompt value? Its output is resolved straight away.
+        if not isinstance(val, (Output, dict, list)) and not isawaitable(val):
+            return cast('Output[T]', Output._from_state(_resolved(_OutputState(val, True, False, set()))))
 
-        # Is it a prompt value? Set up a new resolved future and use that as the value future.
-        value_fut: asyncio.Future[Any] = asyncio.Future()
-        value_fut.set_result(val)
-        return Output(set(), value_fut, is_known_fut, is_secret_fut)
+        # Otherwise unwrap it, and the Inputs nested in it, in a single pass. If any of them haven't resolved yet, a
+        # single task waits on all of them.
+        unwrap = _Unwrap()
+        root: List[Any] = [None]
+        root[0] = unwrap.walk(val, root, 0)
+        if not unwrap.pending:
+            return cast('Output[T]', Output._from_state(_resolved(unwrap.state(root[0]))))
+        return cast('Output[T]', Output._from_state(asyncio.ensure_future(unwrap.finish(root))))
 
     @staticmethod
     def secret(val: Input[T]) -> 'Output[T]':
@@ -292,9 +335,7 @@ class Output(Generic[T]):
         """
 
         o = Output.from_input(val)
-        is_secret: asyncio.Future[bool] = asyncio.Future()
-        is_secret.set_result(True)
-        return Output(o._resources, o._future, o._is_known, is_secret)
+        return cast('Output[T]', Output._from_state(_then(o._get_state(), lambda state: state._replace(secret=True))))
 
     @staticmethod
     def all(*args: Input[T]) -> 'Output[List[T]]':
@@ -310,43 +351,9 @@ class Output(Generic[T]):
         :rtype: Output[List[T]]
         """
 
-        # Three asynchronous helper functions to assist in the implementation:
-        # is_known, which returns True if all of the input's values are known,
-        # and false if any of them are not known,
-        async def is_known(outputs):
-            is_known_futures = list(map(lambda o: o._is_known, outputs))
-            each_is_known = await asyncio.gather(*is_known_futures)
-            return all(each_is_known)
-
-        # is_secret, which returns True if any of the input values are secret, and
-        # false if none of them are secret.
-        async def is_secret(outputs):
-            is_secret_futures = list(map(lambda o: o._is_secret, outputs))
-            each_is_secret = await asyncio.gather(*is_secret_futures)
-            return any(each_is_secret)
-
-        async def get_resources(outputs):
-            resources_futures = list(map(lambda o: o._resources, outputs))
-            resources_agg = await asyncio.gather(*resources_futures)
-            # Merge the list of resource dependencies across all inputs.
-            return reduce(lambda acc, r: acc.union(r), resources_agg, set())
-
-        # gather_futures, which aggregates the list of futures in each input to a future of a list.
-        async def gather_futures(outputs):
-            value_futures = list(map(lambda o: asyncio.ensure_future(o.future(with_unknowns=True)), outputs))
-            return await asyncio.gather(*value_futures)
-        from_input = cast(Callable[[Union[T, Awaitable[T], Output[T]]], Output[T]], Output.from_input)
-        # First, map all inputs to outputs using `from_input`.
-        all_outputs = list(map(from_input, args))
-
-        # Aggregate the list of futures into a future of lists.
-        value_futures = asyncio.ensure_future(gather_futures(all_outputs))
-
-        # Aggregate whether or not this output is known.
-        resources_futures = asyncio.ensure_future(get_resources(all_outputs))
-        known_futures = asyncio.ensure_future(is_known(all_outputs))
-        secret_futures = asyncio.ensure_future(is_secret(all_outputs))
-        return Output(resources_futures, value_futures, known_futures, secret_futures)
+        # This is the same as unwrapping a list of the inputs: the output is known if all of the inputs are known,
+        # secret if any of them are secret, and depends on the resources of all of them.
+        return cast('Output[List[T]]', Output.from_input(list(args)))
 
     @staticmethod
     def concat(*args: Input[str]) -> 'Output[str]':
@@ -368,6 +375,356 @@ class Output(Generic[T]):
         return Output.all(*transformed_items).apply("".join) # type: ignore
 
 
+class _OutputState(NamedTuple):
+    """
+    Everything an Output resolves to.
+    """
+
+    value: Any
+    """
+    The value of the Output.
+    """
+
+    known: bool
+    """
+    Whether the value is known, before accounting for any unknowns inside the value itself.
+    """
+
+    secret: bool
+    """
+    Whether the value is secret.
+    """
+
+    resources: '_Resources'
+    """
+    The resources that the value depends on. Outputs derived from others share their sets rather than copying them.
+    """
+
+    def all_resources(self) -> Set['Resource']:
+        """
+        Returns the set of resources that the value depends on.
+        """
+        resources = self.resources
+        return resources.flatten() if isinstance(resources, _ResourceUnion) else resources
+
+
+class _ResourceUnion:
+    """
+    The union of the resources that several outputs depend on, which is only worked out once something asks for it.
+    Outputs derived from others refer to their sets instead of copying them into new ones, so a long chain of applies,
+    or many outputs combined into one, doesn't copy ever larger sets at every step. Since unions share their parts, the
+    parts form a DAG, which is flattened by visiting each part once.
+    """
+
+    __slots__ = ("_parts", "_flattened")
+
+    def __init__(self, parts: Tuple['_Resources', ...]) -> None:
+        self._parts = parts
+        self._flattened: Optional[Set['Resource']] = None
+
+    def flatten(self) -> Set['Resource']:
+        if self._flattened is None:
+            result: Set['Resource'] = set()
+            visited: Set[int] = set()
+            stack = list(self._parts)
+            while stack:
+                part = stack.pop()
+                if not isinstance(part, _ResourceUnion):
+                    result |= part
+                elif part._flattened is not None:
+                    result |= part._flattened
+                elif id(part) not in visited:
+                    visited.add(id(part))
+                    stack.extend(part._parts)
+            # The parts are no longer needed once the union has been worked out.
+            self._flattened = result
+            self._parts = ()
+        return self._flattened
+
+
+_Resources = Union[Set['Resource'], _ResourceUnion]
+
+
+def _union(parts: List[_Resources]) -> _Resources:
+    """
+    Returns the union of the given sets of resources, without copying any of them.
+    """
+    distinct: Dict[int, _Resources] = {}
+    for part in parts:
+        if part:
+            distinct[id(part)] = part
+    if not distinct:
+        return set()
+    if len(distinct) == 1:
+        return next(iter(distinct.values()))
+    return _ResourceUnion(tuple(distinct.values()))
+
+
+async def _combine(resources: Union[Awaitable[Set['Resource']], Set['Resource']],
+                   future: Awaitable[Any],
+                   is_known: Awaitable[bool],
+                   is_secret: Optional[Awaitable[bool]]) -> _OutputState:
+    return _OutputState(await future,
+                        await is_known,
+                        await is_secret if is_secret is not None else False,
+                        resources if isinstance(resources, set) else await resources)
+
+
+async def _await_known(value: Awaitable[Any], is_secret: bool, resources: _Resources) -> _OutputState:
+    return _OutputState(await value, True, is_secret, resources)
+
+
+def _transformed_state(transformed: Input[Any], is_secret: bool,
+                       resources: _Resources) -> Union[_OutputState, Awaitable[_OutputState]]:
+    """
+    Returns the state of the result of an apply whose callback returned `transformed`, or an awaitable of it if that
+    is an Output or awaitable that hasn't resolved yet.
+    """
+    # Transformed is an Input, meaning there are three cases:
+    #  1. transformed is an Output[U]
+    if isinstance(transformed, Output):
+        transformed_as_output = cast(Output[Any], transformed)
+
+        # Forward along the inner output's resources, known-ness and secret-ness.
+        def forward(transformed_state: _OutputState) -> _OutputState:
+            return _OutputState(transformed_state.value,
+                                transformed_as_output._is_state_known(transformed_state),
+                                transformed_state.secret or is_secret,
+                                _union([resources, transformed_state.resources]))
+
+        transformed_state = transformed_as_output._resolved_state()
+        if transformed_state is not None:
+            return forward(transformed_state)
+        return _then(transformed_as_output._get_state(), forward)
+
+    #  2. transformed is an Awaitable[U]
+    if isawaitable(transformed):
+        # Since transformed is not an Output, it is known.
+        return _await_known(cast(Awaitable[Any], transformed), is_secret, resources)
+
+    #  3. transformed is U. It is trivially known.
+    return _OutputState(transformed, True, is_secret, resources)
+
+
+def _apply_in_executor(func: Callable[[Any], Input[Any]], value: Any, is_secret: bool,
+                       resources: _Resources) -> Awaitable[_OutputState]:
+    # The callback counts as outstanding work until it returns, or the program could be considered done, and whatever
+    # the callback leads to, like registering more resources, cut short while it is still running.
+    running = RPC_MANAGER.track(runtime.settings.SETTINGS.apply_executor().run(func, value))
+    return _transform_in_executor(running, is_secret, resources)
+
+
+async def _transform_in_executor(running: Awaitable[Any], is_secret: bool, resources: _Resources) -> _OutputState:
+    transformed = await running
+    applied = _transformed_state(transformed, is_secret, resources)
+    return applied if isinstance(applied, _OutputState) else await applied
+
+
+def _resolved(state: _OutputState) -> 'asyncio.Future[_OutputState]':
+    result: asyncio.Future[_OutputState] = asyncio.Future()
+    result.set_result(state)
+    return result
+
+
+def _chain(state: 'asyncio.Future[_OutputState]',
+           step: Callable[[_OutputState], Union[_OutputState, Awaitable[_OutputState]]]) -> 'asyncio.Future[_OutputState]':
+    """
+    Returns a future of the state that `step` makes of the given state, once it resolves. The step runs in a callback
+    rather than a task, so that chains of applies don't each schedule one. Only a step that returns an awaitable has
+    to be waited on.
+    """
+    result: asyncio.Future[_OutputState] = asyncio.Future()
+    if state.done():
+        _run_step(result, step, state)
+    else:
+        state.add_done_callback(functools.partial(_run_step, result, step))
+    return result
+
+
+def _run_step(result: 'asyncio.Future[_OutputState]',
+              step: Callable[[_OutputState], Union[_OutputState, Awaitable[_OutputState]]],
+              state: 'asyncio.Future[_OutputState]'):
+    if result.done():
+        return
+    if state.cancelled() or state.exception() is not None:
+        _settle(result, state)
+        return
+    try:
+        applied = step(state.result())
+    except BaseException as exn:  # pylint: disable=broad-except
+        _fail(result, exn)
+        return
+    if isinstance(applied, _OutputState):
+        result.set_result(applied)
+    else:
+        asyncio.ensure_future(applied).add_done_callback(functools.partial(_settle, result))
+
+
+def _fail(result: 'asyncio.Future[Any]', exn: BaseException):
+    """
+    Fails the result of a step that raised, the way a task would. Exceptions that aren't errors, such as
+    KeyboardInterrupt, are raised again as well, so that they still stop the program.
+    """
+    if isinstance(exn, asyncio.CancelledError):
+        result.cancel()
+        return
+    result.set_exception(exn)
+    if not isinstance(exn, Exception):
+        raise exn
+
+
+def _settle(result: 'asyncio.Future[_OutputState]', applied: 'asyncio.Future[_OutputState]'):
+    if result.done():
+        return
+    if applied.cancelled():
+        result.cancel()
+    elif applied.exception() is not None:
+        result.set_exception(cast(BaseException, applied.exception()))
+    else:
+        result.set_result(applied.result())
+
+
+class _Projection:
+    """
+    A chain of attribute and index lookups on an Output, run once something asks for the result of the last one.
+    """
+
+    __slots__ = ("root", "steps")
+
+    root: Output
+    """
+    The output the first lookup is made on.
+    """
+
+    steps: Tuple[Tuple[Output, Callable[[Any], Any]], ...]
+    """
+    The lookups, each with the output it is made on, so that it is applied to that output's state as the output would.
+    """
+
+    def __init__(self, root: Output, steps: Tuple[Tuple[Output, Callable[[Any], Any]], ...]) -> None:
+        self.root = root
+        self.steps = steps
+
+    def extend(self, output: Output, func: Callable[[Any], Any]) -> '_Projection':
+        return _Projection(self.root, self.steps + ((output, func),))
+
+    def run(self, state: _OutputState, start: int = 0) -> Union[_OutputState, Awaitable[_OutputState]]:
+        for i in range(start, len(self.steps)):
+            output, func = self.steps[i]
+            applied = output._apply_to_state(state, func, True)
+            if not isinstance(applied, _OutputState):
+                # A lookup returned an Output or awaitable, which has to be waited on before the next one.
+                return self._resume(applied, i + 1)
+            state = applied
+        return state
+
+    async def _resume(self, applied: Awaitable[_OutputState], start: int) -> _OutputState:
+        result = self.run(await applied, start)
+        return result if isinstance(result, _OutputState) else await result
+
+
+class _Unwrap:
+    """
+    Deeply unwraps the Inputs nested in lists and dicts, merging the secret-ness and resources of the Outputs among them
+    as it goes. Inputs that have already resolved are unwrapped in place. The ones that haven't are left as holes in the
+    unwrapped value, to be filled in by `finish` once they resolve.
+    """
+
+    __slots__ = ("secret", "resources", "pending")
+
+    def __init__(self) -> None:
+        self.secret = False
+        self.resources: List[_Resources] = []
+        self.pending: List[Tuple[Union[list, dict], Any, Optional[Output], asyncio.Future]] = []
+
+    def walk(self, val: Any, container: Union[list, dict], key: Any) -> Any:
+        """
+        Returns the unwrapped form of `val`, which is to be stored at `key` in `container`. If part of it hasn't
+        resolved yet, a hole is recorded for it instead.
+        """
+        if isinstance(val, Output):
+            state = val._resolved_state()
+            if state is None:
+                self.pending.append((container, key, val, val._get_state()))
+                return None
+            return self.walk(self._output_value(val, state), container, key)
+
+        if isinstance(val, dict):
+            unwrapped_dict: dict = {}
+            for k, v in val.items():
+                unwrapped_dict[k] = self.walk(v, unwrapped_dict, k)
+            return unwrapped_dict
+
+        if isinstance(val, list):
+            unwrapped_list: list = [None] * len(val)
+            for i, v in enumerate(val):
+                unwrapped_list[i] = self.walk(v, unwrapped_list, i)
+            return unwrapped_list
+
+        # Awaitables are scheduled straight away, so that they all run at the same time.
+        if isawaitable(val):
+            self.pending.append((container, key, None, asyncio.ensure_future(val)))
+            return None
+
+        return val
+
+    def _output_value(self, output: Output, state: _OutputState) -> Any:
+        self.secret = self.secret or state.secret
+        self.resources.append(state.resources)
+        value = state.value
+
+        # During previews, unknown outputs that don't contain any unknown values are collapsed to the unknown value, as
+        # they are by an apply that runs with unknowns. Whether the unwrapped value is known is decided by the unknowns
+        # in it.
+        if runtime.is_dry_run() and not output._is_state_known(state) and not output._value_contains_unknowns(value):
+            value = UNKNOWN
+        return value
+
+    async def finish(self, root: List[Any]) -> _OutputState:
+        """
+        Waits for the holes left in the unwrapped value to resolve and fills them in, returning the state of the value.
+        """
+        while self.pending:
+            pending, self.pending = self.pending, []
+            for container, key, output, future in pending:
+                value = await future
+                if output is not None:
+                    value = self._output_value(output, value)
+                container[key] = self.walk(value, container, key)
+        return self.state(root[0])
+
+    def state(self, value: Any) -> _OutputState:
+        return _OutputState(value, True, self.secret, _union(self.resources))
+
+
+def _then(state: 'asyncio.Future[_OutputState]', get: Callable[[_OutputState], U]) -> 'asyncio.Future[U]':
+    """
+    Returns a future of part of the given state, without scheduling a task to wait on it.
+    """
+    result: asyncio.Future[U] = asyncio.Future()
+
+    def resolve(state: 'asyncio.Future[_OutputState]'):
+        if result.done():
+            return
+        if state.cancelled():
+            result.cancel()
+        elif state.exception() is not None:
+            result.set_exception(cast(BaseException, state.exception()))
+        else:
+            try:
+                value = get(state.result())
+            except BaseException as exn:  # pylint: disable=broad-except
+                _fail(result, exn)
+                return
+            result.set_result(value)
+
+    if state.done():
+        resolve(state)
+    else:
+        state.add_done_callback(resolve)
+    return result
+
+
 class Unknown:
     """
     Unknown represents a value that is unknown.
@@ -13,7 +13,7 @@
 # limitations under the License.
 
 """The Resource module, containing all resource-related definitions."""
-from typing import Optional, List, Any, Mapping, Union, Callable, TYPE_CHECKING, cast
+from typing import Optional, List, Any, Dict, Mapping, Union, Callable, TYPE_CHECKING, cast
 
 import copy
 
@@ -592,6 +592,12 @@ class Resource:
     The name assigned to the resource at construction.
     """
 
+    _deferred_outputs: Dict[str, Any]
+    """
+    The resolvers of the output properties that the program hasn't read yet, keyed by name. The Output of each is only
+    made, and stored on the resource, the first time it is read.
+    """
+
 # !!! IMPORTANT !!! If you add a new attribute to this type, make sure to verify that merge_options
 # works properly for it.
 
@@ -609,6 +615,7 @@ class Resource:
         :param Optional[ResourceOptions] opts: Optional set of :class:`pulumi.ResourceOptions` to use for this
                resource.
         """
+        self._deferred_outputs = {}
         if props is None:
             props = {}
         if not t:
@@ -722,6 +729,25 @@ class Resource:
                 res = cast('CustomResource', self)
                 res.id = result.id
 
+    if not TYPE_CHECKING:
+        # Defined only at runtime, so that type checkers still catch reads of attributes that resources don't have.
+        def __getattr__(self, name: str) -> Any:
+            deferred = self.__dict__.get("_deferred_outputs")
+            resolver = deferred.pop(name, None) if deferred else None
+            if resolver is None:
+                raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+            output = resolver.output()
+            setattr(self, name, output)
+            return output
+
+    def _read_deferred_outputs(self):
+        """
+        Makes the Outputs of all of the output properties that the program hasn't read yet, for code that looks at all
+        of the attributes of the resource at once.
+        """
+        for name in list(self._deferred_outputs):
+            getattr(self, name)
+
     def _convert_providers(self, provider: Optional['ProviderResource'], providers: Optional[Union[Mapping[str, 'ProviderResource'], List['ProviderResource']]]) -> Mapping[str, 'ProviderResource']:
         if provider is not None:
             return self._convert_providers(None, [provider])
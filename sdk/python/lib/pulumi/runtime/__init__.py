@@ -33,6 +33,7 @@ from .settings import (
     Settings,
     configure,
     is_dry_run,
+    set_apply_executor,
 )
 
 from .stack import (
@@ -43,4 +44,5 @@ from .stack import (
 
 from .invoke import (
     invoke,
+    stream_invoke,
 )
@@ -0,0 +1,95 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import threading
+import time
+from concurrent import futures
+from typing import Any, Awaitable, Callable, NamedTuple, Tuple
+
+
+class ApplyExecutorStats(NamedTuple):
+    """
+    A snapshot of the counters kept by an ApplyExecutor.
+    """
+
+    completed: int
+    """
+    The number of apply callbacks that have finished running.
+    """
+
+    total_run_time: float
+    """
+    The total time, in seconds, that completed apply callbacks spent running in the executor.
+    """
+
+    max_run_time: float
+    """
+    The longest time, in seconds, that any single apply callback spent running in the executor.
+    """
+
+
+def _timed_call(fn: Callable[[Any], Any], value: Any) -> Tuple[Any, float]:
+    # This runs in the executor, which may be in another process, so it is a module-level function that can be pickled
+    # along with the callback and its argument.
+    start = time.perf_counter()
+    result = fn(value)
+    return result, time.perf_counter() - start
+
+
+class ApplyExecutor:
+    """
+    ApplyExecutor runs the callbacks of applies made with `run_in_executor` on a thread or process pool, so that
+    callbacks that take a long time to compute, like rendering templates or hashing content, don't hold up the event
+    loop, and with it every registration that is waiting to be sent. It keeps counters of the time the callbacks spend
+    running, which is time the event loop would otherwise have been blocked for.
+    """
+
+    owned: bool
+    """
+    Whether the pool was created by the runtime, rather than set by the program, and so is the runtime's to shut down.
+    """
+
+    def __init__(self, executor: futures.Executor, owned: bool = False):
+        self._executor = executor
+        self.owned = owned
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._total_run_time = 0.0
+        self._max_run_time = 0.0
+
+    async def run(self, fn: Callable[[Any], Any], value: Any) -> Any:
+        """
+        Runs fn(value) on the pool and returns its result.
+        """
+        result, run_time = await asyncio.wrap_future(self._executor.submit(_timed_call, fn, value))
+        with self._lock:
+            self._completed += 1
+            self._total_run_time += run_time
+            self._max_run_time = max(self._max_run_time, run_time)
+        return result
+
+    def stats(self) -> ApplyExecutorStats:
+        """
+        Returns a snapshot of this executor's counters.
+        """
+        with self._lock:
+            return ApplyExecutorStats(completed=self._completed,
+                                      total_run_time=self._total_run_time,
+                                      max_run_time=self._max_run_time)
+
+    def shutdown(self):
+        """
+        Stops the pool's workers once the callbacks that have already been submitted complete.
+        """
+        self._executor.shutdown(wait=False)
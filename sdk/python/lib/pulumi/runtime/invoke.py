@@ -13,7 +13,7 @@
 # limitations under the License.
 import asyncio
 import sys
-from typing import Any, Awaitable, TYPE_CHECKING
+from typing import Any, AsyncIterator, Awaitable, Optional, TYPE_CHECKING
 import grpc
 
 from .. import log
@@ -21,7 +21,7 @@ from ..invoke import InvokeOptions
 from ..runtime.proto import provider_pb2
 from . import rpc
 from .rpc_manager import RPC_MANAGER
-from .settings import get_monitor
+from .settings import get_monitor, monitor_rpc, monitor_stream_rpc
 from .sync_await import _sync_await
 
 if TYPE_CHECKING:
@@ -65,32 +65,18 @@ def invoke(tok: str, props: 'Inputs', opts: InvokeOptions = None) -> InvokeResul
     can be a bag of computed values (Ts or Awaitable[T]s), and the result is a Awaitable[Any] that
     resolves when the invoke finishes.
     """
-    log.debug(f"Invoking function: tok={tok}")
+    log.debug(lambda: f"Invoking function: tok={tok}")
     if opts is None:
         opts = InvokeOptions()
 
     async def do_invoke():
-        # If a parent was provided, but no provider was provided, use the parent's provider if one was specified.
-        if opts.parent is not None and opts.provider is None:
-            opts.provider = opts.parent.get_provider(tok)
-
-        # Construct a provider reference from the given provider, if one was provided to us.
-        provider_ref = None
-        if opts.provider is not None:
-            provider_urn = await opts.provider.urn.future()
-            provider_id = (await opts.provider.id.future()) or rpc.UNKNOWN
-            provider_ref = f"{provider_urn}::{provider_id}"
-            log.debug(f"Invoke using provider {provider_ref}")
-
-        monitor = get_monitor()
-        inputs = await rpc.serialize_properties(props, {})
-        version = opts.version or ""
-        log.debug(f"Invoking function prepared: tok={tok}")
-        req = provider_pb2.InvokeRequest(tok=tok, args=inputs, provider=provider_ref, version=version)
-
-        def do_invoke():
+        req = await _prepare_invoke_request(tok, props, opts)
+        log.debug(lambda: f"Invoking function prepared: tok={tok}")
+
+        async def do_invoke():
             try:
-                return monitor.Invoke(req)
+                async with RPC_MANAGER.scheduler.slot("Invoke"):
+                    return await monitor_rpc("Invoke", req)
             except grpc.RpcError as exn:
                 # gRPC-python gets creative with their exceptions. grpc.RpcError as a type is useless;
                 # the usefullness come from the fact that it is polymorphically also a grpc.Call and thus has
@@ -105,9 +91,9 @@ def invoke(tok: str, props: 'Inputs', opts: InvokeOptions = None) -> InvokeResul
                 details = exn.details()
             raise Exception(details)
 
-        resp = await asyncio.get_event_loop().run_in_executor(None, do_invoke)
+        resp = await do_invoke()
 
-        log.debug(f"Invoking function completed successfully: tok={tok}")
+        log.debug(lambda: f"Invoking function completed successfully: tok={tok}")
         # If the invoke failed, raise an error.
         if resp.failures:
             raise Exception(f"invoke of {tok} failed: {resp.failures[0].reason} ({resp.failures[0].property})")
@@ -125,3 +111,65 @@ def invoke(tok: str, props: 'Inputs', opts: InvokeOptions = None) -> InvokeResul
         return resp
 
     return InvokeResult(_sync_await(asyncio.ensure_future(do_rpc())))
+
+
+def stream_invoke(tok: str, props: 'Inputs', opts: Optional[InvokeOptions] = None) -> AsyncIterator[Any]:
+    """
+    stream_invoke dynamically invokes the function, tok, which is offered by a provider plugin, and returns an
+    asynchronous iterator over the results that the provider streams back. Each result is deserialized as soon as it
+    arrives, so the program can start acting on the first results before the provider has produced the last ones, and
+    never has to hold all of them in memory at once. Like invoke, the inputs can be a bag of computed values.
+
+    The invocation starts when iteration begins, and the program isn't considered done until the iteration has been
+    exhausted or closed.
+    """
+    log.debug(lambda: f"Invoking streaming function: tok={tok}")
+    if opts is None:
+        opts = InvokeOptions()
+
+    async def do_stream_invoke():
+        req = await _prepare_invoke_request(tok, props, opts)
+        log.debug(lambda: f"Invoking streaming function prepared: tok={tok}")
+
+        try:
+            async for resp in monitor_stream_rpc("StreamInvoke", req):
+                # If the invoke failed, raise an error.
+                if resp.failures:
+                    raise Exception(f"invoke of {tok} failed: {resp.failures[0].reason} ({resp.failures[0].property})")
+
+                # Otherwise, hand out the output properties of this result.
+                ret_obj = getattr(resp, 'return')
+                yield rpc.deserialize_properties(ret_obj) if ret_obj else {}
+
+            log.debug(lambda: f"Invoking streaming function completed successfully: tok={tok}")
+            return
+        except grpc.RpcError as exn:
+            # See the comment on invoke for the justification for disabling this warning.
+            # pylint: disable=no-member
+            if exn.code() == grpc.StatusCode.UNAVAILABLE:
+                sys.exit(0)
+
+            details = exn.details()
+        raise Exception(details)
+
+    return RPC_MANAGER.track_iteration(do_stream_invoke())
+
+
+async def _prepare_invoke_request(tok: str, props: 'Inputs', opts: InvokeOptions) -> provider_pb2.InvokeRequest:
+    # If a parent was provided, but no provider was provided, use the parent's provider if one was specified.
+    if opts.parent is not None and opts.provider is None:
+        opts.provider = opts.parent.get_provider(tok)
+
+    # Construct a provider reference from the given provider, if one was provided to us.
+    provider_ref = None
+    if opts.provider is not None:
+        provider_urn = await opts.provider.urn.future()
+        provider_id = (await opts.provider.id.future()) or rpc.UNKNOWN
+        provider_ref = f"{provider_urn}::{provider_id}"
+        log.debug(lambda: f"Invoke using provider {provider_ref}")
+
+    # Ensure that a monitor is available (or that we are running in test mode) before preparing the request.
+    get_monitor()
+    inputs = await rpc.serialize_properties(props, {})
+    version = opts.version or ""
+    return provider_pb2.InvokeRequest(tok=tok, args=inputs, provider=provider_ref, version=version)
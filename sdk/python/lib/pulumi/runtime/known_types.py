@@ -22,9 +22,10 @@ to reference types that are defined there.
 
 In order to break this circular reference, and to be clear about what types
 the runtime knows about and treats specially, we defer loading of the types from
-within the functions themselves.
+within the functions themselves. Each type is loaded once, on first use.
 """
-from typing import Any, Optional
+import importlib
+from typing import Any, Dict, Optional, Tuple
 
 
 # We override this global in test/test_next_serialize.py to stub the CustomResource type.
@@ -32,58 +33,63 @@ from typing import Any, Optional
 _custom_resource_type: Optional[type] = None
 """The type of CustomResource."""
 
+_loaded: Dict[Tuple[str, str], type] = {}
+"""The types that have been loaded so far, keyed by module and name."""
+
+
+def _load(module: str, name: str) -> type:
+    key = (module, name)
+    loaded = _loaded.get(key)
+    if loaded is None:
+        loaded = getattr(importlib.import_module(module, __package__), name)
+        _loaded[key] = loaded
+    return loaded
+
 
 def is_asset(obj: Any) -> bool:
     """
     Returns true if the given type is an Asset, false otherwise.
     """
-    from .. import Asset  # pylint: disable=import-outside-toplevel
-    return isinstance(obj, Asset)
+    return isinstance(obj, _load("..", "Asset"))
 
 
 def is_archive(obj: Any) -> bool:
     """
     Returns true if the given type is an Archive, false otherwise.
     """
-    from .. import Archive  # pylint: disable=import-outside-toplevel
-    return isinstance(obj, Archive)
+    return isinstance(obj, _load("..", "Archive"))
 
 
 def is_custom_resource(obj: Any) -> bool:
     """
     Returns true if the given type is a CustomResource, false otherwise.
     """
-    from .. import CustomResource  # pylint: disable=import-outside-toplevel
-    return isinstance(obj, _custom_resource_type or CustomResource)
+    return isinstance(obj, _custom_resource_type or _load("..", "CustomResource"))
 
 
 def is_custom_timeouts(obj: Any) -> bool:
     """
     Returns true if the given type is a CustomTimeouts, false otherwise.
     """
-    from .. import CustomTimeouts  # pylint: disable=import-outside-toplevel
-    return isinstance(obj, CustomTimeouts)
+    return isinstance(obj, _load("..", "CustomTimeouts"))
 
 
 def is_stack(obj: Any) -> bool:
     """
     Returns true if the given type is an Output, false otherwise.
     """
-    from .stack import Stack  # pylint: disable=import-outside-toplevel
-    return isinstance(obj, Stack)
+    return isinstance(obj, _load(".stack", "Stack"))
 
 
 def is_output(obj: Any) -> bool:
     """
     Returns true if the given type is an Output, false otherwise.
     """
-    from .. import Output  # pylint: disable=import-outside-toplevel
-    return isinstance(obj, Output)
+    return isinstance(obj, _load("..", "Output"))
 
 
 def is_unknown(obj: Any) -> bool:
     """
     Returns true if the given object is an Unknown, false otherwise.
     """
-    from ..output import Unknown  # pylint: disable=import-outside-toplevel
-    return isinstance(obj, Unknown)
+    return isinstance(obj, _load("..output", "Unknown"))
@@ -18,7 +18,7 @@ Mocks for testing.
 import asyncio
 import logging
 from abc import ABC, abstractmethod
-from typing import Optional, Awaitable, Tuple, Union, Any, TYPE_CHECKING
+from typing import Optional, Awaitable, Iterable, Set, Tuple, Union, Any, TYPE_CHECKING
 
 import grpc
 from google.protobuf import empty_pb2
@@ -55,6 +55,17 @@ class Mocks(ABC):
         """
         return {}
 
+    def stream_call(self, token: str, args: dict, provider: Optional[str]) -> Iterable[dict]:
+        """
+        stream_call mocks streaming provider-implemented function calls (see runtime.stream_invoke). Each dict it
+        produces is handed to the program as a separate result. By default, the result of `call` is the only one.
+
+        :param str token: The token that indicates which function is being called. This token is of the form "package:module:function".
+        :param dict args: The arguments provided to the function call.
+        :param Optional[str] provider: If provided, the identifier of the provider instance being used to make the call.
+        """
+        yield self.call(token, args, provider)
+
     @abstractmethod
     def new_resource(self, type_: str, name: str, inputs: dict, provider: Optional[str], id_: Optional[str]) -> Tuple[str, dict]:
         """
@@ -72,9 +83,11 @@ class Mocks(ABC):
 
 class MockMonitor:
     mocks: Mocks
+    supported_features: Set[str]
 
-    def __init__(self, mocks: Mocks):
+    def __init__(self, mocks: Mocks, supported_features: Optional[Set[str]] = None):
         self.mocks = mocks
+        self.supported_features = supported_features if supported_features is not None else {"secrets"}
 
     def make_urn(self, parent: str, type_: str, name: str) -> str:
         if parent != "":
@@ -94,6 +107,21 @@ class MockMonitor:
         fields = {"failures": None, "return": ret_proto}
         return provider_pb2.InvokeResponse(**fields)
 
+    def StreamInvoke(self, request):
+        args = rpc.deserialize_properties(request.args)
+
+        # Each result is read on one of the RPC executor's threads, which have no event loop of their own, so the
+        # results are serialized on a loop that lasts as long as the stream.
+        loop = asyncio.new_event_loop()
+        try:
+            for ret in self.mocks.stream_call(request.tok, args, request.provider):
+                ret_proto = loop.run_until_complete(rpc.serialize_properties(ret, {}))
+
+                fields = {"failures": None, "return": ret_proto}
+                yield provider_pb2.InvokeResponse(**fields)
+        finally:
+            loop.close()
+
     def ReadResource(self, request):
         state = rpc.deserialize_properties(request.properties)
 
@@ -123,8 +151,7 @@ class MockMonitor:
         return empty_pb2.Empty()
 
     def SupportsFeature(self, request):
-        # pylint: disable=unused-argument
-        return type('SupportsFeatureResponse', (object,), {'hasSupport' : True})
+        return type('SupportsFeatureResponse', (object,), {'hasSupport' : request.id in self.supported_features})
 
 
 class MockEngine:
@@ -44,6 +44,11 @@ class ResourceResolverOperations(NamedTuple):
     This resource's input properties, serialized into protobuf structures.
     """
 
+    serialized_values: Dict[str, Any]
+    """
+    This resource's input properties, serialized into plain Python values.
+    """
+
     dependencies: Set[str]
     """
     The set of URNs, corresponding to the resources that this resource depends on.
@@ -73,17 +78,19 @@ async def prepare_resource(res: 'Resource',
                            props: 'Inputs',
                            opts: Optional['ResourceOptions']) -> ResourceResolverOperations:
     from .. import Output  # pylint: disable=import-outside-toplevel
-    log.debug(f"resource {props} preparing to wait for dependencies")
+    log.debug(lambda: f"resource {props} preparing to wait for dependencies")
     # Before we can proceed, all our dependencies must be finished.
-    explicit_urn_dependencies = []
+    explicit_urn_dependencies: List[str] = []
     if opts is not None and opts.depends_on is not None:
         dependent_urns = list(map(lambda r: r.urn.future(), opts.depends_on))
-        explicit_urn_dependencies = await asyncio.gather(*dependent_urns)
+        explicit_urn_dependencies = cast(List[str], await asyncio.gather(*dependent_urns))
 
     # Serialize out all our props to their final values.  In doing so, we'll also collect all
     # the Resources pointed to by any Dependency objects we encounter, adding them to 'implicit_dependencies'.
     property_dependencies_resources: Dict[str, List['Resource']] = {}
-    serialized_props = await rpc.serialize_properties(props, property_dependencies_resources, res.translate_input_property)
+    serialized_values: Dict[str, Any] = {}
+    serialized_props = await rpc.serialize_properties(props, property_dependencies_resources,
+                                                      rpc.input_translator(res), serialized_values)
 
     # Wait for our parent to resolve
     parent_urn: Optional[str] = ""
@@ -107,14 +114,17 @@ async def prepare_resource(res: 'Resource',
         provider_id = await provider.id.future() or rpc.UNKNOWN
         provider_ref = f"{provider_urn}::{provider_id}"
 
-    dependencies = set(explicit_urn_dependencies)
+    # Properties often depend on the same resources, so each resource's URN is only waited for once.
+    dependencies: Set[str] = set(explicit_urn_dependencies)
     property_dependencies: Dict[str, List[Optional[str]]] = {}
+    dependency_urns: Dict['Resource', str] = {}
     for key, deps in property_dependencies_resources.items():
-        urns = set()
+        urns: Set[str] = set()
         for dep in deps:
-            urn = await dep.urn.future()
-            urns.add(urn)
-            dependencies.add(urn)
+            if dep not in dependency_urns:
+                dependency_urns[dep] = cast(str, await dep.urn.future())
+            urns.add(dependency_urns[dep])
+        dependencies |= urns
         property_dependencies[key] = list(urns)
 
     # Wait for all aliases. Note that we use `res._aliases` instead of `opts.aliases` as the
@@ -127,10 +137,11 @@ async def prepare_resource(res: 'Resource',
         if not alias_val in aliases:
             aliases.append(alias_val)
 
-    log.debug(f"resource {props} prepared")
+    log.debug(lambda: f"resource {props} prepared")
     return ResourceResolverOperations(
         parent_urn,
         serialized_props,
+        serialized_values,
         dependencies,
         provider_ref,
         property_dependencies,
@@ -149,6 +160,30 @@ class _ResourceResult(NamedTuple):
     """
 
 
+class _RegisteredResource:
+    """
+    Stands in for a resource that has been registered in the dependencies of its own outputs, when bounded memory is
+    enabled. Depending on a resource only takes its URN, so the outputs don't have to refer back to the resource, which
+    would keep it and the values of all of its outputs alive until the garbage collector happened to find the cycle.
+    """
+
+    __slots__ = ("urn",)
+
+    def __init__(self, urn: 'Output[str]') -> None:
+        self.urn = urn
+
+
+def _unreturned_inputs(inputs: struct_pb2.Struct, outputs: struct_pb2.Struct) -> struct_pb2.Struct:  # pylint: disable=no-member
+    """
+    Returns a copy of the inputs that aren't among the outputs, which doesn't refer to the request that carried them.
+    """
+    unreturned = struct_pb2.Struct()  # pylint: disable=no-member
+    for key, value in inputs.fields.items():
+        if key not in outputs.fields:
+            unreturned.fields[key].CopyFrom(value)
+    return unreturned
+
+
 # pylint: disable=too-many-locals,too-many-statements
 
 def _read_resource(res: 'CustomResource', ty: str, name: str, props: 'Inputs', opts: 'ResourceOptions') -> _ResourceResult:
@@ -157,14 +192,14 @@ def _read_resource(res: 'CustomResource', ty: str, name: str, props: 'Inputs', o
         raise Exception(
             "Cannot read resource whose options are lacking an ID value")
 
-    log.debug(f"reading resource: ty={ty}, name={name}, id={opts.id}")
+    log.debug(lambda: f"reading resource: ty={ty}, name={name}, id={opts.id}")
     monitor = settings.get_monitor()
 
     # Prepare the resource, similar to a RegisterResource. Reads are deliberately similar to RegisterResource except
     # that we are populating the Resource object with properties associated with an already-live resource.
     #
     # Same as below, we initialize the URN property on the resource, which will always be resolved.
-    log.debug("preparing read resource for RPC")
+    log.debug(lambda: "preparing read resource for RPC")
     urn_future: asyncio.Future[Any] = asyncio.Future()
     urn_known: asyncio.Future[bool] = asyncio.Future()
     urn_secret: asyncio.Future[bool] = asyncio.Future()
@@ -204,7 +239,7 @@ def _read_resource(res: 'CustomResource', ty: str, name: str, props: 'Inputs', o
 
     async def do_read():
         try:
-            log.debug(f"preparing read: ty={ty}, name={name}, id={opts.id}")
+            log.debug(lambda: f"preparing read: ty={ty}, name={name}, id={opts.id}")
             resolver = await prepare_resource(res, ty, True, props, opts)
 
             # Resolve the ID that we were given. Note that we are explicitly discarding the list of
@@ -213,7 +248,7 @@ def _read_resource(res: 'CustomResource', ty: str, name: str, props: 'Inputs', o
             # provider sense, because a read resource already exists. We do not need to track this
             # dependency.
             resolved_id = await rpc.serialize_property(opts.id, [])
-            log.debug(f"read prepared: ty={ty}, name={name}, id={opts.id}")
+            log.debug(lambda: f"read prepared: ty={ty}, name={name}, id={opts.id}")
 
             # These inputs will end up in the snapshot, so if there are any additional secret
             # outputs, record them here.
@@ -238,14 +273,16 @@ def _read_resource(res: 'CustomResource', ty: str, name: str, props: 'Inputs', o
             from ..resource import create_urn  # pylint: disable=import-outside-toplevel
             mock_urn = await create_urn(name, ty, resolver.parent_urn).future()
 
-            def do_rpc_call():
+            async def do_rpc_call():
                 if monitor is None:
                     # If no monitor is available, we'll need to fake up a response, for testing.
                     return RegisterResponse(mock_urn, None, resolver.serialized_props)
 
                 # If there is a monitor available, make the true RPC request to the engine.
                 try:
-                    return monitor.ReadResource(req)
+                    compression = await settings.request_compression(req)
+                    async with RPC_MANAGER.scheduler.slot("ReadResource"):
+                        return await settings.monitor_rpc("ReadResource", req, compression)
                 except grpc.RpcError as exn:
                     # See the comment on invoke for the justification for disabling
                     # this warning
@@ -256,20 +293,19 @@ def _read_resource(res: 'CustomResource', ty: str, name: str, props: 'Inputs', o
                     details = exn.details()
                 raise Exception(details)
 
-            resp = await asyncio.get_event_loop().run_in_executor(None, do_rpc_call)
+            resp = await do_rpc_call()
 
         except Exception as exn:
-            log.debug(
-                f"exception when preparing or executing rpc: {traceback.format_exc()}")
+            log.debug(lambda: f"exception when preparing or executing rpc: {traceback.format_exc()}")
             rpc.resolve_outputs_due_to_exception(resolvers, exn)
             resolve_urn_exn(exn)
             resolve_id(None, False, exn)
             raise
 
-        log.debug(f"resource read successful: ty={ty}, urn={resp.urn}")
+        log.debug(lambda: f"resource read successful: ty={ty}, urn={resp.urn}")
         resolve_urn(resp.urn)
         resolve_id(resolved_id, True, None)  # Read IDs are always known.
-        await rpc.resolve_outputs(res, resolver.serialized_props, resp.properties, resolvers)
+        await rpc.resolve_outputs(res, resolver.serialized_values, resp.properties, resolvers)
 
     asyncio.ensure_future(RPC_MANAGER.do_rpc("read resource", do_read)())
 
@@ -290,7 +326,7 @@ def _register_resource(res: 'Resource',
                        custom: bool,
                        props: 'Inputs',
                        opts: Optional['ResourceOptions']) -> _ResourceResult:
-    log.debug(f"registering resource: ty={ty}, name={name}, custom={custom}")
+    log.debug(lambda: f"registering resource: ty={ty}, name={name}, custom={custom}")
     monitor = settings.get_monitor()
     from .. import Output  # pylint: disable=import-outside-toplevel
 
@@ -299,7 +335,7 @@ def _register_resource(res: 'Resource',
     # Simply initialize the URN property and get prepared to resolve it later on.
     # Note: a resource urn will always get a value, and thus the output property
     # for it can always run .apply calls.
-    log.debug("preparing resource for RPC")
+    log.debug(lambda: "preparing resource for RPC")
     urn_future: asyncio.Future[Any] = asyncio.Future()
     urn_known: asyncio.Future[bool] = asyncio.Future()
     urn_secret: asyncio.Future[bool] = asyncio.Future()
@@ -307,7 +343,9 @@ def _register_resource(res: 'Resource',
     urn_secret.set_result(False)
     resolve_urn = urn_future.set_result
     resolve_urn_exn = urn_future.set_exception
-    result_urn = Output({res}, urn_future, urn_known, urn_secret)
+    # Every output of the resource depends on it through the same set.
+    resources: Set[Any] = {res}
+    result_urn = Output(resources, urn_future, urn_known, urn_secret)
 
     # If a custom resource, make room for the ID property.
     result_id = None
@@ -318,7 +356,7 @@ def _register_resource(res: 'Resource',
         resolve_perform_apply: asyncio.Future[bool] = asyncio.Future()
         resolve_secret: asyncio.Future[bool] = asyncio.Future()
         result_id = Output(
-            {res}, resolve_value, resolve_perform_apply, resolve_secret)
+            resources, resolve_value, resolve_perform_apply, resolve_secret)
 
         def do_resolve(value: Any, perform_apply: bool, exn: Optional[Exception]):
             if exn is not None:
@@ -335,13 +373,14 @@ def _register_resource(res: 'Resource',
     # Now "transfer" all input properties into unresolved futures on res.  This way,
     # this resource will look like it has all its output properties to anyone it is
     # passed to.  However, those futures won't actually resolve until the RPC returns
-    resolvers = rpc.transfer_properties(res, props)
+    resolvers = rpc.transfer_properties(res, props, resources)
 
     async def do_register():
+        nonlocal props
         try:
-            log.debug(f"preparing resource registration: ty={ty}, name={name}")
+            log.debug(lambda: f"preparing resource registration: ty={ty}, name={name}")
             resolver = await prepare_resource(res, ty, custom, props, opts)
-            log.debug(f"resource registration prepared: ty={ty}, name={name}")
+            log.debug(lambda: f"resource registration prepared: ty={ty}, name={name}")
 
             property_dependencies = {}
             for key, deps in resolver.property_dependencies.items():
@@ -409,14 +448,23 @@ def _register_resource(res: 'Resource',
             from ..resource import create_urn # pylint: disable=import-outside-toplevel
             mock_urn = await create_urn(name, ty, resolver.parent_urn).future()
 
-            def do_rpc_call():
+            # pylint: disable=no-member
+            bounded_memory = settings.is_bounded_memory_enabled()
+            inputs: Union[struct_pb2.Struct, Dict[str, Any]] = resolver.serialized_values
+            if bounded_memory:
+                # Only the request keeps the inputs while the registration waits for a slot and for the engine.
+                del inputs, props, resolver
+
+            async def do_rpc_call(req):
                 if monitor is None:
                     # If no monitor is available, we'll need to fake up a response, for testing.
-                    return RegisterResponse(mock_urn, None, resolver.serialized_props)
+                    return RegisterResponse(mock_urn, None, req.object)
 
                 # If there is a monitor available, make the true RPC request to the engine.
                 try:
-                    return monitor.RegisterResource(req)
+                    compression = await settings.request_compression(req)
+                    async with RPC_MANAGER.scheduler.slot("RegisterResource"):
+                        return await settings.monitor_rpc("RegisterResource", req, compression)
                 except grpc.RpcError as exn:
                     # See the comment on invoke for the justification for disabling
                     # this warning
@@ -427,17 +475,20 @@ def _register_resource(res: 'Resource',
                     details = exn.details()
                 raise Exception(details)
 
-            resp = await asyncio.get_event_loop().run_in_executor(None, do_rpc_call)
+            resp = await do_rpc_call(req)
+            if bounded_memory:
+                # The inputs that the engine doesn't send back are decoded from the request, but only they are kept.
+                inputs = _unreturned_inputs(req.object, resp.object)
+                del req
         except Exception as exn:
-            log.debug(
-                f"exception when preparing or executing rpc: {traceback.format_exc()}")
+            log.debug(lambda: f"exception when preparing or executing rpc: {traceback.format_exc()}")
             rpc.resolve_outputs_due_to_exception(resolvers, exn)
             resolve_urn_exn(exn)
             if resolve_id is not None:
                 resolve_id(None, False, exn)
             raise
 
-        log.debug(f"resource registration successful: ty={ty}, urn={resp.urn}")
+        log.debug(lambda: f"resource registration successful: ty={ty}, urn={resp.urn}")
         resolve_urn(resp.urn)
         if resolve_id:
             # The ID is known if (and only if) it is a non-empty string. If it's either None or an
@@ -446,7 +497,11 @@ def _register_resource(res: 'Resource',
             is_known = bool(resp.id)
             resolve_id(resp.id, is_known, None)
 
-        await rpc.resolve_outputs(res, resolver.serialized_props, resp.object, resolvers)
+        await rpc.resolve_outputs(res, inputs, resp.object, resolvers)
+        if bounded_memory:
+            # Now that the outputs have resolved, nothing needs more of the resource than its URN.
+            resources.clear()
+            resources.add(_RegisteredResource(result_urn))
 
     asyncio.ensure_future(RPC_MANAGER.do_rpc(
         "register resource", do_register)())
@@ -472,19 +527,19 @@ def register_resource_outputs(res: 'Resource', outputs: 'Union[Inputs, Output[In
     async def do_register_resource_outputs():
         urn = await res.urn.future()
         serialized_props = await rpc.serialize_properties(outputs, {})
-        log.debug(
-            f"register resource outputs prepared: urn={urn}, props={serialized_props}")
+        log.debug(lambda: f"register resource outputs prepared: urn={urn}, props={serialized_props}")
         monitor = settings.get_monitor()
         req = resource_pb2.RegisterResourceOutputsRequest(
             urn=urn, outputs=serialized_props)
 
-        def do_rpc_call():
+        async def do_rpc_call():
             if monitor is None:
                 # If there's no engine attached, simply ignore it.
                 return None
 
             try:
-                return monitor.RegisterResourceOutputs(req)
+                compression = await settings.request_compression(req)
+                return await settings.monitor_rpc("RegisterResourceOutputs", req, compression)
             except grpc.RpcError as exn:
                 # See the comment on invoke for the justification for disabling
                 # this warning
@@ -495,9 +550,8 @@ def register_resource_outputs(res: 'Resource', outputs: 'Union[Inputs, Output[In
                 details = exn.details()
             raise Exception(details)
 
-        await asyncio.get_event_loop().run_in_executor(None, do_rpc_call)
-        log.debug(
-            f"resource registration successful: urn={urn}, props={serialized_props}")
+        await do_rpc_call()
+        log.debug(lambda: f"resource registration successful: urn={urn}, props={serialized_props}")
 
     asyncio.ensure_future(RPC_MANAGER.do_rpc(
         "register resource outputs", do_register_resource_outputs)())
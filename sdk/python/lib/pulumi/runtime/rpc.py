@@ -15,10 +15,13 @@
 Support for serializing and deserializing properties going into or flowing
 out of RPC calls.
 """
+# pylint: disable=too-many-lines
 import asyncio
 import functools
 import inspect
-from typing import List, Any, Callable, Dict, Optional, TYPE_CHECKING, cast
+import types
+import weakref
+from typing import List, Any, Callable, Dict, Optional, Set, Tuple, Union, TYPE_CHECKING, cast
 
 from google.protobuf import struct_pb2
 import six
@@ -56,16 +59,45 @@ def isLegalProtobufValue(value: Any) -> bool:
 
 async def serialize_properties(inputs: 'Inputs',
                                property_deps: Dict[str, List['Resource']],
-                               input_transformer: Optional[Callable[[str], str]] = None) -> struct_pb2.Struct:
+                               input_transformer: Optional[Callable[[str], str]] = None,
+                               values: Optional[Dict[str, Any]] = None) -> struct_pb2.Struct:
     """
     Serializes an arbitrary Input bag into a Protobuf structure, keeping track of the list
     of dependent resources in the `deps` list. Serializing properties is inherently async
     because it awaits any futures that are contained transitively within the input bag.
+
+    If `values` is given, it is filled in with the serialized properties as plain Python values, keyed by their
+    translated names, so that callers can use them without reading them back out of the Protobuf structure.
     """
     struct = struct_pb2.Struct()
-    for k, v in inputs.items():
-        deps: List['Resource'] = []
-        result = await serialize_property(v, deps, input_transformer)
+    _check_kinds()
+    # Everything that can be serialized without awaiting is serialized up front. Then, every property that has to be
+    # awaited is completed at once, so that properties waiting on different resources don't wait in turn.
+    keys = list(inputs.keys())
+    results: List[Any] = []
+    property_deps_list: List[List['Resource']] = [[] for _ in keys]
+    pending = []
+    for k, deps in zip(keys, property_deps_list):
+        value = inputs[k]
+        # Scalars, which are most properties, serialize to themselves.
+        if _kinds.get(type(value)) == _PLAIN:
+            results.append(value)
+            continue
+        serialization = _Serialization(value, input_transformer)
+        if serialization.holes:
+            pending.append(serialization.complete(deps))
+        else:
+            serialization.collect_deps(deps)
+        results.append(serialization)
+    if pending:
+        await asyncio.gather(*pending)
+
+    # Values shared with other resources have been written before, and are copied rather than written again.
+    memoized: Dict[int, _Memoized] = {}
+    for k, deps, result in zip(keys, property_deps_list, results):
+        if type(result) is _Serialization:  # pylint: disable=unidiomatic-typecheck
+            result.collect_memoized(memoized)
+            result = result.result()
         # We treat properties that serialize to None as if they don't exist.
         if result is not None:
             # While serializing to a pb struct, we must "translate" all key names to be what the
@@ -73,15 +105,16 @@ async def serialize_properties(inputs: 'Inputs',
             translated_name = k
             if input_transformer is not None:
                 translated_name = input_transformer(k)
-                log.debug(f"top-level input property translated: {k} -> {translated_name}")
-            # pylint: disable=unsupported-assignment-operation
-            struct[translated_name] = result
+                if log.is_debug_enabled():
+                    log.debug(f"top-level input property translated: {k} -> {translated_name}")
+            _write_value(struct.fields[translated_name], result, memoized or None)
             property_deps[translated_name] = deps
+            if values is not None:
+                values[translated_name] = result
 
     return struct
 
 
-# pylint: disable=too-many-return-statements, too-many-branches
 async def serialize_property(value: 'Input[Any]',
                              deps: List['Resource'],
                              input_transformer: Optional[Callable[[str], str]] = None) -> Any:
@@ -89,116 +122,335 @@ async def serialize_property(value: 'Input[Any]',
     Serializes a single Input into a form suitable for remoting to the engine, awaiting
     any futures required to do so.
     """
-    if isinstance(value, list):
-        props = []
-        for elem in value:
-            props.append(await serialize_property(elem, deps, input_transformer))
+    _check_kinds()
+    serialization = _Serialization(value, input_transformer)
+    if serialization.holes:
+        await serialization.complete(deps)
+    else:
+        serialization.collect_deps(deps)
+    return serialization.result()
 
-        return props
 
-    if known_types.is_unknown(value):
-        return UNKNOWN
+# The kinds of values that the serializer distinguishes. See _kind_of.
+_PLAIN, _LIST, _DICT, _UNKNOWN, _CUSTOM_RESOURCE, _ASSET, _ARCHIVE, _AWAITABLE, _OUTPUT, _INVALID = range(10)
 
-    if known_types.is_custom_resource(value):
-        resource = cast('CustomResource', value)
-        deps.append(resource)
-        return await serialize_property(resource.id, deps, input_transformer)
+_kinds: Dict[type, int] = {}
+"""
+The kind of value of each type that the serializer has seen, so that each type is only classified once.
+"""
+
+_kinds_custom_resource_type: Optional[type] = None
+"""
+The value of known_types._custom_resource_type when _kinds was filled in. Tests override it.
+"""
 
+
+def _classify(value: Any) -> int:
+    # The order of these checks matters: for instance, assets and Outputs are not serialized as dicts, whatever
+    # their type looks like.
+    if isinstance(value, list):
+        return _LIST
+    if known_types.is_unknown(value):
+        return _UNKNOWN
+    if known_types.is_custom_resource(value):
+        return _CUSTOM_RESOURCE
     if known_types.is_asset(value):
-        # Serializing an asset requires the use of a magical signature key, since otherwise it would
-        # look like any old weakly typed object/map when received by the other side of the RPC
-        # boundary.
-        obj = {
-            _special_sig_key: _special_asset_sig
-        }
+        return _ASSET
+    if known_types.is_archive(value):
+        return _ARCHIVE
+    if inspect.isawaitable(value):
+        return _AWAITABLE
+    if known_types.is_output(value):
+        return _OUTPUT
+    if isinstance(value, dict):
+        return _DICT
+    if isLegalProtobufValue(value):
+        return _PLAIN
+    return _INVALID
 
-        if hasattr(value, "path"):
-            file_asset = cast('FileAsset', value)
-            obj["path"] = await serialize_property(file_asset.path, deps, input_transformer)
-        elif hasattr(value, "text"):
-            str_asset = cast('StringAsset', value)
-            obj["text"] = await serialize_property(str_asset.text, deps, input_transformer)
-        elif hasattr(value, "uri"):
-            remote_asset = cast('RemoteAsset', value)
-            obj["uri"] = await serialize_property(remote_asset.uri, deps, input_transformer)
-        else:
-            raise AssertionError(f"unknown asset type: {value}")
 
-        return obj
+def _check_kinds():
+    global _kinds_custom_resource_type  # pylint: disable=global-statement
+    if _kinds_custom_resource_type is not known_types._custom_resource_type:
+        _kinds.clear()
+        _kinds_custom_resource_type = known_types._custom_resource_type
 
-    if known_types.is_archive(value):
-        # Serializing an archive requires the use of a magical signature key, since otherwise it
-        # would look like any old weakly typed object/map when received by the other side of the RPC
-        # boundary.
-        obj = {
-            _special_sig_key: _special_archive_sig
-        }
 
-        if hasattr(value, "assets"):
-            asset_archive = cast('AssetArchive', value)
-            obj["assets"] = await serialize_property(asset_archive.assets, deps, input_transformer)
-        elif hasattr(value, "path"):
-            file_archive = cast('FileArchive', value)
-            obj["path"] = await serialize_property(file_archive.path, deps, input_transformer)
-        elif hasattr(value, "uri"):
-            remote_archive = cast('RemoteArchive', value)
-            obj["uri"] = await serialize_property(remote_archive.uri, deps, input_transformer)
+def _kind_of(value: Any) -> int:
+    value_type = type(value)
+    kind = _kinds.get(value_type)
+    if kind is None:
+        kind = _classify(value)
+        # Whether a generator is awaitable depends on the function that made it, not on its type.
+        if value_type is not types.GeneratorType:
+            _kinds[value_type] = kind
+    return kind
+
+
+class _Hole:
+    """
+    A value within a serialization that has to be awaited before it can be serialized: an awaitable or an Output.
+    Once complete, its serialized form is stored at `container[key]`.
+    """
+    __slots__ = ("value", "kind", "container", "key", "deps", "memoized")
+
+    def __init__(self, value: Any, kind: int, container: Any, key: Any):
+        self.value = value
+        self.kind = kind
+        self.container = container
+        self.key = key
+        self.deps: List['Resource'] = []
+        self.memoized: Optional[_Memoized] = None
+
+    async def complete(self, input_transformer: Optional[Callable[[str], str]]):
+        # Outputs and futures resolve to the same value however often they are awaited, so their serialized forms are
+        # shared by every resource they are passed to. Coroutines can only be awaited once. With bounded memory, nothing
+        # outlives the registration that serialized it.
+        if self.kind == _OUTPUT or isinstance(self.value, asyncio.Future):
+            if settings.is_bounded_memory_enabled():
+                memoized = await self._memoize(input_transformer)
+            else:
+                memo = settings.SETTINGS.serialization_memo()
+                memoized = await memo.serialize(self.value, _memo_scope(input_transformer),
+                                                lambda: self._memoize(input_transformer))
+            self.memoized = memoized
+            result = memoized.result
+            self.deps.extend(memoized.deps)
         else:
-            raise AssertionError(f"unknown archive type: {value}")
+            result, self.deps = await self._serialize(input_transformer)
+        self.container[self.key] = result
 
-        return obj
+    async def _serialize(self, input_transformer: Optional[Callable[[str], str]]) -> Tuple[Any, List['Resource']]:
+        deps: List['Resource'] = []
+        if self.kind == _AWAITABLE:
+            # Coroutines and Futures are both awaitable. Coroutines need to be scheduled.
+            # asyncio.ensure_future returns futures verbatim while converting coroutines into
+            # futures by arranging for the execution on the event loop.
+            #
+            # The returned future can then be awaited to yield a value, which we'll continue
+            # serializing.
+            future_return = await asyncio.ensure_future(self.value)
+            result = await serialize_property(future_return, deps, input_transformer)
+        else:
+            result = await _serialize_output(self.value, deps, input_transformer)
+        return result, deps
 
-    if inspect.isawaitable(value):
-        # Coroutines and Futures are both awaitable. Coroutines need to be scheduled.
-        # asyncio.ensure_future returns futures verbatim while converting coroutines into
-        # futures by arranging for the execution on the event loop.
-        #
-        # The returned future can then be awaited to yield a value, which we'll continue
-        # serializing.
-        awaitable = cast('Any', value)
-        future_return = await asyncio.ensure_future(awaitable)
-        return await serialize_property(future_return, deps, input_transformer)
+    async def _memoize(self, input_transformer: Optional[Callable[[str], str]]) -> '_Memoized':
+        return _Memoized(*await self._serialize(input_transformer))
 
-    if known_types.is_output(value):
-        output = cast('Output', value)
-        value_resources = await output.resources()
-        deps.extend(value_resources)
-
-        # When serializing an Output, we will either serialize it as its resolved value or the
-        # "unknown value" sentinel. We will do the former for all outputs created directly by user
-        # code (such outputs always resolve isKnown to true) and for any resource outputs that were
-        # resolved with known values.
-        is_known = await output._is_known
-        is_secret = await output._is_secret
-        value = await serialize_property(output.future(), deps, input_transformer)
-        if not is_known:
-            return UNKNOWN
-        if is_secret and await settings.monitor_supports_secrets():
-            # Serializing an output with a secret value requires the use of a magical signature key,
-            # which the engine detects.
-            return {
-                _special_sig_key: _special_secret_sig,
-                "value": value
-            }
-        return value
 
-    if isinstance(value, dict):
-        obj = {}
-        for k, v in value.items():
-            transformed_key = k
-            if input_transformer is not None:
-                transformed_key = input_transformer(k)
-                log.debug(f"transforming input property: {k} -> {transformed_key}")
-            obj[transformed_key] = await serialize_property(v, deps, input_transformer)
+class _Memoized:
+    """
+    The serialized form of an Output or future that is shared by every resource it is passed to, along with the
+    resources it depends on and, once it has been written, its Protobuf form.
+    """
+    __slots__ = ("result", "deps", "written")
+
+    def __init__(self, result: Any, deps: List['Resource']):
+        self.result = result
+        self.deps = deps
+        self.written: Optional['struct_pb2.Value'] = None
 
-        return obj
 
-    # Ensure that we have a value that Protobuf understands.
-    if not isLegalProtobufValue(value):
-        raise ValueError(f"unexpected input of type {type(value).__name__}")
+def _memo_scope(input_transformer: Optional[Callable[[str], str]]) -> Any:
+    # Every resource of a class translates names through the same table, so their serializations can be shared.
+    if type(input_transformer) is _Translator:  # pylint: disable=unidiomatic-typecheck
+        return id(cast(_Translator, input_transformer).table)
+    # A resource's own translator is only referred to weakly, since it is often a method of the resource, which the
+    # memo would otherwise keep alive for as long as the value.
+    if inspect.ismethod(input_transformer):
+        return weakref.WeakMethod(cast(types.MethodType, input_transformer))
+    try:
+        return weakref.ref(input_transformer)
+    except TypeError:
+        return input_transformer
+
+
+class _Serialization:
+    """
+    The serialized form of a single Input. Constructing one serializes everything that can be serialized without
+    awaiting, walking the value with an explicit stack so that deeply nested values cannot exhaust the recursion limit.
+    Awaitables and Outputs are left as holes, which `complete` fills in concurrently.
+
+    Dependencies are recorded in the order in which they are encountered, with each hole standing in for the
+    dependencies that are found when it is completed, so that their order does not depend on the order in which
+    holes resolve.
+    """
+    __slots__ = ("_root", "_deps", "holes", "_input_transformer")
+
+    # pylint: disable=too-many-branches
+    def __init__(self, value: 'Input[Any]', input_transformer: Optional[Callable[[str], str]]):
+        self._input_transformer = input_transformer
+        self._root: List[Any] = [None]
+        self._deps: List[Any] = []
+        self.holes: List[_Hole] = []
+        debug = input_transformer is not None and log.is_debug_enabled()
+
+        stack: List[Tuple[Any, Any, Any]] = [(value, self._root, 0)]
+        while stack:
+            value, container, key = stack.pop()
+            kind = _kinds.get(type(value))
+            if kind is None:
+                kind = _kind_of(value)
+
+            if kind == _PLAIN:
+                container[key] = value
+            elif kind == _LIST:
+                elems: List[Any] = [None] * len(value)
+                container[key] = elems
+                stack.extend((value[i], elems, i) for i in range(len(value) - 1, -1, -1))
+            elif kind == _DICT:
+                obj: Dict[str, Any] = {}
+                children = []
+                for k, v in value.items():
+                    transformed_key = k
+                    if input_transformer is not None:
+                        transformed_key = input_transformer(k)
+                        if debug:
+                            log.debug(f"transforming input property: {k} -> {transformed_key}")
+                    # Reserve the key now, so that the result keeps the order of the input.
+                    obj[transformed_key] = None
+                    children.append((v, obj, transformed_key))
+                container[key] = obj
+                children.reverse()
+                stack.extend(children)
+            elif kind == _UNKNOWN:
+                container[key] = UNKNOWN
+            elif kind == _CUSTOM_RESOURCE:
+                resource = cast('CustomResource', value)
+                self._deps.append(resource)
+                stack.append((resource.id, container, key))
+            elif kind == _ASSET:
+                # Serializing an asset requires the use of a magical signature key, since otherwise it would
+                # look like any old weakly typed object/map when received by the other side of the RPC
+                # boundary.
+                field = _first_attribute(value, ("path", "text", "uri"))
+                if field is None:
+                    raise AssertionError(f"unknown asset type: {value}")
+                obj = {_special_sig_key: _special_asset_sig, field: None}
+                container[key] = obj
+                stack.append((getattr(value, field), obj, field))
+            elif kind == _ARCHIVE:
+                # Serializing an archive requires the use of a magical signature key, since otherwise it
+                # would look like any old weakly typed object/map when received by the other side of the RPC
+                # boundary.
+                field = _first_attribute(value, ("assets", "path", "uri"))
+                if field is None:
+                    raise AssertionError(f"unknown archive type: {value}")
+                obj = {_special_sig_key: _special_archive_sig, field: None}
+                container[key] = obj
+                stack.append((getattr(value, field), obj, field))
+            elif kind in (_AWAITABLE, _OUTPUT):
+                container[key] = None
+                hole = _Hole(value, kind, container, key)
+                self.holes.append(hole)
+                self._deps.append(hole)
+            else:
+                # Ensure that we have a value that Protobuf understands.
+                raise ValueError(f"unexpected input of type {type(value).__name__}")
+
+    def result(self) -> Any:
+        return self._root[0]
+
+    async def complete(self, deps: List['Resource']):
+        """
+        Fills in every hole at once, then appends the dependencies of this serialization to `deps`.
+        """
+        if len(self.holes) == 1:
+            await self.holes[0].complete(self._input_transformer)
+        else:
+            await asyncio.gather(*[hole.complete(self._input_transformer) for hole in self.holes])
+        self.collect_deps(deps)
+
+    def collect_memoized(self, memoized: Dict[int, _Memoized]):
+        """
+        Adds the memoized dicts and lists that fill holes in this serialization to `memoized`, keyed by their identity.
+        """
+        for hole in self.holes:
+            if hole.memoized is not None and type(hole.memoized.result) in (dict, list):
+                memoized[id(hole.memoized.result)] = hole.memoized
+
+    def collect_deps(self, deps: List['Resource']):
+        for dep in self._deps:
+            if type(dep) is _Hole:  # pylint: disable=unidiomatic-typecheck
+                deps.extend(dep.deps)
+            else:
+                deps.append(dep)
+
 
+def _write_value(pb_value: 'struct_pb2.Value', value: Any, memoized: Optional[Dict[int, _Memoized]] = None):
+    """
+    Writes a serialized property into a Protobuf value, in place. Unlike assigning it into a Struct, this does not
+    recurse, and does not clear each value before writing it. Memoized dicts and lists found in `memoized` are written
+    once and then copied.
+    """
+    stack = [(pb_value, value)]
+    while stack:
+        pb_value, value = stack.pop()
+        value_type = type(value)
+        if memoized is not None and (value_type is dict or value_type is list):
+            entry = memoized.get(id(value))
+            if entry is not None:
+                if entry.written is None:
+                    entry.written = _VALUE()
+                    _write_value(entry.written, value)
+                pb_value.CopyFrom(entry.written)
+                continue
+        if value_type is str:
+            pb_value.string_value = value
+        elif value_type is bool:
+            pb_value.bool_value = value
+        elif value_type is dict:
+            struct_value = pb_value.struct_value
+            struct_value.SetInParent()
+            fields = struct_value.fields
+            stack.extend((fields[k], v) for k, v in value.items())
+        elif value_type is list:
+            list_value = pb_value.list_value
+            list_value.SetInParent()
+            add = list_value.values.add
+            stack.extend((add(), v) for v in value)
+        elif value is None:
+            pb_value.null_value = 0
+        elif isinstance(value, six.string_types):
+            pb_value.string_value = value
+        else:
+            # The serializer only produces plain dicts and lists, so all that is left are numbers.
+            pb_value.number_value = value
+
+
+def _first_attribute(value: Any, names: Tuple[str, ...]) -> Optional[str]:
+    for name in names:
+        if hasattr(value, name):
+            return name
+    return None
+
+
+async def _serialize_output(output: 'Output', deps: List['Resource'],
+                            input_transformer: Optional[Callable[[str], str]]) -> Any:
+    state = await output._get_state()
+    deps.extend(state.all_resources())
+
+    # When serializing an Output, we will either serialize it as its resolved value or the
+    # "unknown value" sentinel. We will do the former for all outputs created directly by user
+    # code (such outputs always resolve isKnown to true) and for any resource outputs that were
+    # resolved with known values.
+    is_known = output._is_state_known(state)
+    is_secret = state.secret
+    value = await serialize_property(None if output._value_contains_unknowns(state.value) else state.value,
+                                     deps, input_transformer)
+    if not is_known:
+        return UNKNOWN
+    if is_secret and await settings.monitor_supports_secrets():
+        # Serializing an output with a secret value requires the use of a magical signature key,
+        # which the engine detects.
+        return {
+            _special_sig_key: _special_secret_sig,
+            "value": value
+        }
     return value
 
+
 # pylint: disable=too-many-return-statements
 def deserialize_properties(props_struct: struct_pb2.Struct, keep_unknowns: Optional[bool] = None) -> Any:
     """
@@ -211,41 +463,19 @@ def deserialize_properties(props_struct: struct_pb2.Struct, keep_unknowns: Optio
     # We assume that we are deserializing properties that we got from a Resource RPC endpoint,
     # which has type `Struct` in our gRPC proto definition.
     if _special_sig_key in props_struct:
-        from .. import FileAsset, StringAsset, RemoteAsset, AssetArchive, FileArchive, RemoteArchive  # pylint: disable=import-outside-toplevel
-        if props_struct[_special_sig_key] == _special_asset_sig:
-            # This is an asset. Re-hydrate this object into an Asset.
-            if "path" in props_struct:
-                return FileAsset(props_struct["path"])
-            if "text" in props_struct:
-                return StringAsset(props_struct["text"])
-            if "uri" in props_struct:
-                return RemoteAsset(props_struct["uri"])
-            raise AssertionError("Invalid asset encountered when unmarshalling resource property")
-        if props_struct[_special_sig_key] == _special_archive_sig:
-            # This is an archive. Re-hydrate this object into an Archive.
-            if "assets" in props_struct:
-                return AssetArchive(deserialize_property(props_struct["assets"]))
-            if "path" in props_struct:
-                return FileArchive(props_struct["path"])
-            if "uri" in props_struct:
-                return RemoteArchive(props_struct["uri"])
-            raise AssertionError("Invalid archive encountered when unmarshalling resource property")
-        if props_struct[_special_sig_key] == _special_secret_sig:
-            return {
-                _special_sig_key: _special_secret_sig,
-                "value": deserialize_property(props_struct["value"])
-            }
-
-        raise AssertionError("Unrecognized signature when unmarshalling resource property")
-
-    # Struct is duck-typed like a dictionary, so we can iterate over it in the normal ways. Note
-    # that if the struct had any secret properties, we push the secretness of the object up to us
-    # since we can only set secret outputs on top level properties.
+        value, is_secret = _deserialize_special(props_struct, keep_unknowns)
+        return _wrap_secret(value) if is_secret else value
+
+    # Secretness is only ever pushed up as far as each top-level property, since we can only set secret outputs on
+    # top level properties.
+    fields = props_struct.fields if type(props_struct) is _STRUCT else props_struct  # pylint: disable=unidiomatic-typecheck
     output = {}
-    for k, v in list(props_struct.items()):
-        value = deserialize_property(v, keep_unknowns)
+    for k, v in fields.items():
+        value, is_secret = _deserialize(v, keep_unknowns)
+        if is_secret:
+            output[k] = _wrap_secret(value)
         # We treat values that deserialize to "None" as if they don't exist.
-        if value is not None:
+        elif value is not None:
             output[k] = value
 
     return output
@@ -268,43 +498,126 @@ def unwrap_rpc_secret(value: Any) -> Any:
 def deserialize_property(value: Any, keep_unknowns: Optional[bool] = None) -> Any:
     """
     Deserializes a single protobuf value (either `Struct` or `ListValue`) into idiomatic
-    Python values.
-    """
-    from ..output import Unknown  # pylint: disable=import-outside-toplevel
-    if value == UNKNOWN:
-        return Unknown() if settings.is_dry_run() or keep_unknowns else None
-
-    # ListValues are projected to lists
-    if isinstance(value, struct_pb2.ListValue):
-        # values has no __iter__ defined but this works.
-        values = [deserialize_property(v, keep_unknowns) for v in value] # type: ignore
-        # If there are any secret values in the list, push the secretness "up" a level by returning
-        # an array that is marked as a secret with raw values inside.
-        if any(is_rpc_secret(v) for v in values):
-            return {
-                _special_sig_key: _special_secret_sig,
-                "value": [unwrap_rpc_secret(v) for v in values]
-            }
-
-        return values
-
-    # Structs are projected to dictionaries
-    if isinstance(value, struct_pb2.Struct):
-        props = deserialize_properties(value, keep_unknowns)
-        # If there are any secret values in the dictionary, push the secretness "up" a level by returning
-        # a dictionary that is marked as a secret with raw values inside. Note: thje isinstance check here is
-        # important, since deserialize_properties will return either a dictionary or a concret type (in the case of
-        # assets).
-        if isinstance(props, dict) and any(is_rpc_secret(v) for v in props.values()):
-            return {
-                _special_sig_key: _special_secret_sig,
-                "value": {k: unwrap_rpc_secret(v) for k, v in props.items()}
-            }
-
-        return props
+    Python values. The plain Python values produced by `serialize_properties` may be passed in place of
+    their Protobuf form.
+    """
+    value, is_secret = _deserialize(value, keep_unknowns)
+    return _wrap_secret(value) if is_secret else value
+
+
+def _wrap_secret(value: Any) -> Any:
+    return {
+        _special_sig_key: _special_secret_sig,
+        "value": value
+    }
+
+
+_STRUCT, _LIST_VALUE, _VALUE = struct_pb2.Struct, struct_pb2.ListValue, struct_pb2.Value  # pylint: disable=no-member
+"""
+The Protobuf types that the deserializer reads.
+"""
+
+
+def _deserialize(value: Any, keep_unknowns: Optional[bool]) -> Tuple[Any, bool]:  # pylint: disable=too-many-return-statements, too-many-branches
+    """
+    Deserializes a single value in one pass, returning it along with whether it contains any secrets. Rather than
+    wrapping each secret and then unwrapping it again in each enclosing list or dictionary, secretness is returned
+    alongside the raw value, and only the caller wraps it.
+    """
+    value_type = type(value)
+    # Protobuf values are read directly, rather than converted into Python values first.
+    if value_type is _VALUE:
+        kind = value.WhichOneof("kind")
+        if kind == "string_value":
+            value = value.string_value
+            value_type = str
+        elif kind == "struct_value":
+            value = value.struct_value
+            value_type = _STRUCT
+        elif kind == "list_value":
+            value = value.list_value
+            value_type = _LIST_VALUE
+        elif kind == "number_value":
+            return value.number_value, False
+        elif kind == "bool_value":
+            return value.bool_value, False
+        elif kind == "null_value":
+            return None, False
+        else:
+            raise ValueError("Value not set")
+
+    if value_type is str:
+        if value == UNKNOWN:
+            from ..output import Unknown  # pylint: disable=import-outside-toplevel
+            return Unknown() if settings.is_dry_run() or keep_unknowns else None, False
+        return value, False
+
+    # Structs are projected to dictionaries. If any of their values are secret, the secretness is pushed "up" a level,
+    # so that the dictionary is marked as a secret with raw values inside.
+    if value_type is _STRUCT or value_type is dict:
+        fields = value.fields if value_type is _STRUCT else value
+        if _special_sig_key in fields:
+            return _deserialize_special(value, keep_unknowns)
+        props = {}
+        any_secret = False
+        for k, v in fields.items():
+            v, is_secret = _deserialize(v, keep_unknowns)
+            if is_secret:
+                any_secret = True
+            # We treat values that deserialize to "None" as if they don't exist.
+            elif v is None:
+                continue
+            props[k] = v
+        return props, any_secret
+
+    # ListValues are projected to lists, and push secretness up in the same way.
+    if value_type is _LIST_VALUE or value_type is list:
+        elements = value.values if value_type is _LIST_VALUE else value
+        values = []
+        any_secret = False
+        for v in elements:
+            v, is_secret = _deserialize(v, keep_unknowns)
+            any_secret = any_secret or is_secret
+            values.append(v)
+        return values, any_secret
+
+    # Protobuf represents all numbers as floats.
+    if value_type is int:
+        return float(value), False
 
     # Everything else is identity projected.
-    return value
+    return value, False
+
+
+def _deserialize_special(props_struct: Any, keep_unknowns: Optional[bool]) -> Tuple[Any, bool]:
+    """
+    Deserializes a Struct or dictionary that carries the special signature key.
+    """
+    from .. import FileAsset, StringAsset, RemoteAsset, AssetArchive, FileArchive, RemoteArchive  # pylint: disable=import-outside-toplevel
+    sig = props_struct[_special_sig_key]
+    if sig == _special_asset_sig:
+        # This is an asset. Re-hydrate this object into an Asset.
+        if "path" in props_struct:
+            return FileAsset(props_struct["path"]), False
+        if "text" in props_struct:
+            return StringAsset(props_struct["text"]), False
+        if "uri" in props_struct:
+            return RemoteAsset(props_struct["uri"]), False
+        raise AssertionError("Invalid asset encountered when unmarshalling resource property")
+    if sig == _special_archive_sig:
+        # This is an archive. Re-hydrate this object into an Archive.
+        if "assets" in props_struct:
+            return AssetArchive(deserialize_property(props_struct["assets"], keep_unknowns)), False
+        if "path" in props_struct:
+            return FileArchive(props_struct["path"]), False
+        if "uri" in props_struct:
+            return RemoteArchive(props_struct["uri"]), False
+        raise AssertionError("Invalid archive encountered when unmarshalling resource property")
+    if sig == _special_secret_sig:
+        value, _ = _deserialize(props_struct["value"], keep_unknowns)
+        return value, True
+
+    raise AssertionError("Unrecognized signature when unmarshalling resource property")
 
 
 Resolver = Callable[[Any, bool, bool, Optional[Exception]], None]
@@ -322,46 +635,169 @@ result in the exception being re-thrown.
 """
 
 
-def transfer_properties(res: 'Resource', props: 'Inputs') -> Dict[str, Resolver]:
-    from .. import Output  # pylint: disable=import-outside-toplevel
+def transfer_properties(res: 'Resource', props: 'Inputs',
+                        resources: Optional[Set['Resource']] = None) -> Dict[str, Resolver]:
+    from ..output import Output, _OutputState  # pylint: disable=import-outside-toplevel
+    lazy = settings.is_lazy_outputs_enabled()
     resolvers: Dict[str, Resolver] = {}
+    if resources is None:
+        resources = {res}
+    # Resources can be set to only make the Outputs of their properties once the program reads them, since most never
+    # are.
+    deferred: Optional[Dict[str, Any]] = None
+    if settings.is_deferred_outputs_enabled():
+        deferred = getattr(res, "_deferred_outputs", None)
     for name in props.keys():
         if name in ["id", "urn"]:
             # these properties are handled specially elsewhere.
             continue
 
-        resolve_value: 'asyncio.Future' = asyncio.Future()
-        resolve_is_known: 'asyncio.Future' = asyncio.Future()
-        resolve_is_secret: 'asyncio.Future' = asyncio.Future()
-
-        def do_resolve(value_fut: 'asyncio.Future',
-                       known_fut: 'asyncio.Future[bool]',
-                       secret_fut: 'asyncio.Future[bool]',
-                       value: Any,
-                       is_known: bool,
-                       is_secret: bool,
-                       failed: Optional[Exception]):
-            # Was an exception provided? If so, this is an abnormal (exceptional) resolution. Resolve the futures
-            # using set_exception so that any attempts to wait for their resolution will also fail.
-            if failed is not None:
-                value_fut.set_exception(failed)
-                known_fut.set_exception(failed)
-                secret_fut.set_exception(failed)
-            else:
-                value_fut.set_result(value)
-                known_fut.set_result(is_known)
-                secret_fut.set_result(is_secret)
+        # Properties that the class or the resource itself already has an attribute for are assigned straight away, as
+        # reading them wouldn't reach the resource's __getattr__.
+        if deferred is not None and not hasattr(type(res), name) and name not in res.__dict__:
+            deferred_property = _LazyProperty(resources) if lazy else _DeferredProperty(resources)
+            resolvers[name] = deferred_property
+            deferred[name] = deferred_property
+            continue
+
+        state: 'asyncio.Future'
+        resolver: Resolver
+        if lazy:
+            prop = _LazyProperty(resources)
+            state = prop.state
+            resolver = prop
+        else:
+            state = asyncio.Future()
+
+            def do_resolve(state: 'asyncio.Future',
+                           value: Any,
+                           is_known: bool,
+                           is_secret: bool,
+                           failed: Optional[Exception]):
+                # Was an exception provided? If so, this is an abnormal (exceptional) resolution. Resolve the future
+                # using set_exception so that any attempts to wait for its resolution will also fail.
+                if failed is not None:
+                    state.set_exception(failed)
+                else:
+                    state.set_result(_OutputState(value, is_known, is_secret, resources))
+
+            resolver = functools.partial(do_resolve, state)
 
         # Important to note here is that the resolver's future is assigned to the resource object using the
         # name before translation. When properties are returned from the engine, we must first translate the name
         # using res.translate_output_property and then use *that* name to index into the resolvers table.
-        log.debug(f"adding resolver {name}")
-        resolvers[name] = functools.partial(do_resolve, resolve_value, resolve_is_known, resolve_is_secret)
-        res.__setattr__(name, Output({res}, resolve_value, resolve_is_known, resolve_is_secret))
+        if log.is_debug_enabled():
+            log.debug(f"adding resolver {name}")
+        resolvers[name] = resolver
+        res.__setattr__(name, Output._from_state(state))
 
     return resolvers
 
 
+class _DeferredProperty:
+    """
+    The resolver of an output property of a resource whose Output hasn't been made yet, because the program hasn't
+    read the property. Until it does, the property's resolution is kept in place of the Output's state.
+    """
+    __slots__ = ("_state", "_resources")
+
+    def __init__(self, resources: Set['Resource']):
+        self._state: Union[None, 'asyncio.Future', Tuple[Any, bool, bool], Exception] = None
+        self._resources = resources
+
+    def __call__(self, value: Any, is_known: bool, is_secret: bool, failed: Optional[Exception]):
+        state = self._state
+        if not isinstance(state, asyncio.Future):
+            self._state = failed if failed is not None else (value, is_known, is_secret)
+        elif failed is not None:
+            state.set_exception(failed)
+        else:
+            from ..output import _OutputState  # pylint: disable=import-outside-toplevel
+            state.set_result(_OutputState(value, is_known, is_secret, self._resources))
+
+    def output(self) -> 'Output':
+        from ..output import Output, _OutputState  # pylint: disable=import-outside-toplevel
+        state = self._state
+        if not isinstance(state, asyncio.Future):
+            future: asyncio.Future = asyncio.Future()
+            if isinstance(state, Exception):
+                future.set_exception(state)
+            elif state is not None:
+                future.set_result(_OutputState(*state, self._resources))
+            self._state = state = future
+        return Output._from_state(state)
+
+
+class _LazyProperty:
+    """
+    The resolver of an output property whose value is only decoded from the engine's response once something waits
+    on it, when lazy outputs are enabled. Until then, resolve_outputs hands it the response to decode its value from.
+    """
+    __slots__ = ("state", "_resources", "_outputs", "_key", "_demanded")
+
+    def __init__(self, resources: Set['Resource']):
+        self.state = _DemandFuture(self)
+        self._resources = resources
+        self._outputs: Optional[_LazyOutputs] = None
+        self._key = ""
+        self._demanded = False
+
+    def __call__(self, value: Any, is_known: bool, is_secret: bool, failed: Optional[Exception]):
+        from ..output import _OutputState  # pylint: disable=import-outside-toplevel
+        if failed is not None:
+            self.state.set_exception(failed)
+        else:
+            self.state.set_result(_OutputState(value, is_known, is_secret, self._resources))
+
+    def output(self) -> 'Output':
+        from ..output import Output  # pylint: disable=import-outside-toplevel
+        return Output._from_state(self.state)
+
+    def resolve_lazily(self, outputs: '_LazyOutputs', key: str):
+        if self._demanded:
+            self._decode(outputs, key)
+        else:
+            self._outputs = outputs
+            self._key = key
+
+    def demand(self):
+        if self._demanded:
+            return
+        self._demanded = True
+        outputs = self._outputs
+        if outputs is not None:
+            self._outputs = None
+            self._decode(outputs, self._key)
+
+    def _decode(self, outputs: '_LazyOutputs', key: str):
+        try:
+            value, is_known, is_secret = outputs.decode(key)
+        except Exception as exn:  # pylint: disable=broad-except
+            self(None, False, False, exn)
+            return
+        self(value, is_known, is_secret, None)
+
+
+class _DemandFuture(asyncio.Future):
+    """
+    A future of a lazy output property, which has the property decoded as soon as anything waits on it.
+    """
+
+    def __init__(self, prop: _LazyProperty):
+        super().__init__()
+        self._property = prop
+
+    def __await__(self):
+        self._property.demand()
+        return super().__await__()
+
+    __iter__ = __await__
+
+    def add_done_callback(self, *args, **kwargs):  # pylint: disable=arguments-differ,signature-differs
+        self._property.demand()
+        super().add_done_callback(*args, **kwargs)
+
+
 def translate_output_properties(res: 'Resource', output: Any) -> Any:
     """
     Recursively rewrite keys of objects returned by the engine to conform with a naming
@@ -374,54 +810,161 @@ def translate_output_properties(res: 'Resource', output: Any) -> Any:
 
     If output is a primitive (i.e. not a dict or list), the value is returned without modification.
     """
-    if isinstance(output, dict):
-        return {res.translate_output_property(k): translate_output_properties(res, v) for k, v in output.items()}
+    table = _translation_table(res, "translate_output_property")
+    return _translate_output_value(output, {} if table is None else table, res.translate_output_property)
 
-    if isinstance(output, list):
-        return [translate_output_properties(res, v) for v in output]
 
-    return output
+def _translate_output_value(value: Any, table: Dict[str, str], translate: Callable[[str], str]) -> Any:
+    if isinstance(value, dict):
+        result = {}
+        for k, v in value.items():
+            translated = table.get(k)
+            if translated is None:
+                translated = translate(k)
+                if len(table) < _MAX_TRANSLATED_NAMES:
+                    table[k] = translated
+            result[translated] = _translate_output_value(v, table, translate) if isinstance(v, (dict, list)) else v
+        return result
+
+    if isinstance(value, list):
+        return [_translate_output_value(v, table, translate) if isinstance(v, (dict, list)) else v for v in value]
+
+    return value
+
+
+_MAX_TRANSLATED_NAMES = 4096
+"""
+The largest number of names kept in each translation table. Nested property names can be as varied as the values
+they're found in, such as the keys of a map of tags, so names beyond this are translated every time they're used.
+"""
+
+
+def _translation_table(res: 'Resource', method: str) -> Optional[Dict[str, str]]:
+    """
+    Returns the table of names that the class of the given resource translates property names to with the given
+    method, or None if the class doesn't override the method and so leaves every name as it is. Property names
+    translate the same way for every resource of a class, as they do in generated SDKs, so the tables are shared by
+    every resource of a class for the rest of the run. A resource that overrides the method itself gets a table of its
+    own.
+    """
+    if method in getattr(res, "__dict__", ()):
+        return {}
+    cls = type(res)
+    key = (cls, method)
+    tables = settings.SETTINGS.translation_tables()
+    try:
+        return tables[key]
+    except KeyError:
+        pass
+    table: Optional[Dict[str, str]] = None
+    if getattr(cls, method, None) is not getattr(known_types._load("..", "Resource"), method):
+        table = {}
+    tables[key] = table
+    return table
+
+
+class _Translator:
+    """
+    Translates property names with a method of a resource, looking each name up in the table of its class first.
+    """
+    __slots__ = ("table", "_translate")
+
+    def __init__(self, table: Dict[str, str], translate: Callable[[str], str]):
+        self.table = table
+        self._translate = translate
+
+    def __call__(self, prop: str) -> str:
+        translated = self.table.get(prop)
+        if translated is None:
+            translated = self._translate(prop)
+            if len(self.table) < _MAX_TRANSLATED_NAMES:
+                self.table[prop] = translated
+        return translated
+
+
+def _translator(res: 'Resource', method: str) -> Optional[Callable[[str], str]]:
+    if method in getattr(res, "__dict__", ()):
+        # The resource translates names its own way, so there is no table to share.
+        return getattr(res, method)
+    table = _translation_table(res, method)
+    return None if table is None else _Translator(table, getattr(res, method))
+
+
+def input_translator(res: 'Resource') -> Optional[Callable[[str], str]]:
+    """
+    Returns a function that translates the names of input properties of the given resource as its
+    `translate_input_property` does, looking each name up in a table shared by every resource of its class, or None if
+    the resource leaves the names as they are.
+    """
+    return _translator(res, "translate_input_property")
 
 
 def contains_unknowns(val: Any) -> bool:
-    def impl(val: Any, stack: List[Any]) -> bool:
-        if known_types.is_unknown(val):
-            return True
-
-        if not any([x is val for x in stack]):
-            stack.append(val)
-            if isinstance(val, dict):
-                return any([impl(x, stack) for x in val.values()])
-            if isinstance(val, list):
-                return any([impl(x, stack) for x in val])
+    """
+    Returns whether the given value is unknown or contains an unknown value in any of the dicts and lists nested in it,
+    stopping at the first one. Each dict and list is walked once, however often it appears, so the time taken is
+    linear in the size of the value.
+    """
+    unknown = known_types._load("..output", "Unknown")
+    if isinstance(val, unknown):
+        return True
+    if not isinstance(val, (dict, list)):
         return False
 
-    return impl(val, [])
+    visited = {id(val)}
+    stack = [val]
+    while stack:
+        container = stack.pop()
+        for item in container.values() if isinstance(container, dict) else container:
+            if isinstance(item, unknown):
+                return True
+            if isinstance(item, (dict, list)) and id(item) not in visited:
+                visited.add(id(item))
+                stack.append(item)
+    return False
 
 
 async def resolve_outputs(res: 'Resource',
-                          serialized_props: struct_pb2.Struct,
+                          serialized_props: Union[struct_pb2.Struct, Dict[str, Any]],
                           outputs: struct_pb2.Struct,
                           resolvers: Dict[str, Resolver]):
+    if settings.is_lazy_outputs_enabled():
+        # Each property is decoded from the response once something waits on it.
+        lazy_outputs = _LazyOutputs(res, serialized_props, outputs, len(resolvers))
+        for key, resolver in resolvers.items():
+            cast(_LazyProperty, resolver).resolve_lazily(lazy_outputs, key)
+        return
 
     # Produce a combined set of property states, starting with inputs and then applying
     # outputs.  If the same property exists in the inputs and outputs states, the output wins.
     all_properties = {}
+    # Every resource of a class translates names the same way, so names are looked up in a table shared by all of
+    # them, and not translated at all if the class doesn't translate them.
+    table = _translation_table(res, "translate_output_property")
+    translate = _translator(res, "translate_output_property")
+
+    def translate_key(key: str) -> str:
+        return key if translate is None else translate(key)
+
+    def translate_value(value: Any) -> Any:
+        return value if table is None else _translate_output_value(value, table, res.translate_output_property)
+
     for key, value in deserialize_properties(outputs).items():
         # Outputs coming from the provider are NOT translated. Do so here.
-        translated_key = res.translate_output_property(key)
-        translated_value = translate_output_properties(res, value)
-        log.debug(f"incoming output property translated: {key} -> {translated_key}")
-        log.debug(f"incoming output value translated: {value} -> {translated_value}")
+        translated_key = translate_key(key)
+        translated_value = translate_value(value)
+        if log.is_debug_enabled():
+            log.debug(f"incoming output property translated: {key} -> {translated_key}")
+            log.debug(f"incoming output value translated: {value} -> {translated_value}")
         all_properties[translated_key] = translated_value
 
     if not settings.is_dry_run() or settings.is_legacy_apply_enabled():
         for key, value in list(serialized_props.items()):
-            translated_key = res.translate_output_property(key)
+            translated_key = translate_key(key)
             if translated_key not in all_properties:
                 # input prop the engine didn't give us a final value for.Just use the value passed into the resource by
                 # the user.
-                all_properties[translated_key] = translate_output_properties(res, deserialize_property(value))
+                all_properties[translated_key] = translate_value(deserialize_property(value))
 
     for key, value in all_properties.items():
         # Skip "id" and "urn", since we handle those specially.
@@ -429,7 +972,8 @@ async def resolve_outputs(res: 'Resource',
             continue
 
         # Otherwise, unmarshal the value, and store it on the resource object.
-        log.debug(f"looking for resolver using translated name {key}")
+        if log.is_debug_enabled():
+            log.debug(f"looking for resolver using translated name {key}")
         resolve = resolvers.get(key)
         if resolve is None:
             # engine returned a property that was not in our initial property-map.  This can happen
@@ -475,6 +1019,61 @@ async def resolve_outputs(res: 'Resource',
             resolve(None, not settings.is_dry_run(), False, None)
 
 
+class _LazyOutputs:
+    """
+    The output properties of a resource, as returned by the engine, that are decoded one by one as they are needed
+    rather than all at once. Each property is decoded exactly as resolve_outputs would, and the response is released
+    once all of them have been.
+    """
+    __slots__ = ("_res", "_inputs", "_outputs", "_output_keys", "_input_keys", "_remaining")
+
+    def __init__(self,
+                 res: 'Resource',
+                 inputs: Union['struct_pb2.Struct', Dict[str, Any]],
+                 outputs: 'struct_pb2.Struct',
+                 count: int):
+        self._res: Optional['Resource'] = res
+        self._inputs: Optional[Union['struct_pb2.Struct', Dict[str, Any]]] = inputs
+        self._outputs: Optional['struct_pb2.Struct'] = outputs
+        self._remaining = count
+        # Only the names are translated up front, so that each property can be found by its translated name.
+        translate = _translator(res, "translate_output_property")
+        self._output_keys = {k if translate is None else translate(k): k for k in outputs.fields}
+        self._input_keys: Optional[Dict[str, str]] = None
+        if not settings.is_dry_run() or settings.is_legacy_apply_enabled():
+            self._input_keys = {k if translate is None else translate(k): k for k in inputs.keys()}
+
+    def decode(self, key: str) -> Tuple[Any, bool, bool]:
+        """
+        Decodes the property with the given translated name, returning its value and whether it is known and secret.
+        """
+        res, inputs, outputs = self._res, self._inputs, self._outputs
+        assert res is not None and inputs is not None and outputs is not None
+        self._remaining -= 1
+        if self._remaining == 0:
+            self._res, self._inputs, self._outputs = None, None, None
+
+        # As in resolve_outputs, outputs win over inputs, and inputs are used for properties that the engine didn't
+        # give us a final value for.
+        value: Any = None
+        output_key = self._output_keys.get(key)
+        if output_key is not None:
+            value = deserialize_property(outputs.fields[output_key])
+        if value is None and self._input_keys is not None:
+            input_key = self._input_keys.get(key)
+            if input_key is not None:
+                value = deserialize_property(inputs[input_key])
+        table = _translation_table(res, "translate_output_property")
+        if table is not None:
+            value = _translate_output_value(value, table, res.translate_output_property)
+
+        is_secret = is_rpc_secret(value)
+        if is_secret:
+            value = value["value"]
+        is_known = value is not None if settings.is_dry_run() else True
+        return value, is_known, is_secret
+
+
 def resolve_outputs_due_to_exception(resolvers: Dict[str, Resolver], exn: Exception):
     """
     Resolves all outputs with resolvers exceptionally, using the given exception as the reason why the resolver has
@@ -484,5 +1083,6 @@ def resolve_outputs_due_to_exception(resolvers: Dict[str, Resolver], exn: Except
     :param exn: The exception that occured when trying (and failing) to create this resource.
     """
     for key, resolve in resolvers.items():
-        log.debug(f"sending exception to resolver for {key}")
+        if log.is_debug_enabled():
+            log.debug(f"sending exception to resolver for {key}")
         resolve(None, False, False, exn)
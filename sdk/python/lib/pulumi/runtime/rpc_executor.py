@@ -0,0 +1,127 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import threading
+import time
+from concurrent import futures
+from typing import Any, Awaitable, Callable, NamedTuple
+
+
+class RPCExecutorStats(NamedTuple):
+    """
+    A snapshot of the counters kept by an RPCExecutor.
+    """
+
+    max_workers: int
+    """
+    The number of threads available to run blocking RPCs.
+    """
+
+    queued: int
+    """
+    The number of RPCs waiting for a thread.
+    """
+
+    active: int
+    """
+    The number of RPCs currently running on a thread.
+    """
+
+    completed: int
+    """
+    The number of RPCs that have finished running.
+    """
+
+    total_wait_time: float
+    """
+    The total time, in seconds, that completed and active RPCs spent waiting for a thread.
+    """
+
+    max_wait_time: float
+    """
+    The longest time, in seconds, that any single RPC spent waiting for a thread.
+    """
+
+
+class RPCExecutor:
+    """
+    RPCExecutor runs the blocking gRPC calls made to the resource monitor and engine on a thread pool owned by the
+    runtime, rather than on asyncio's default executor, which is shared with user code and sized by CPU count. It keeps
+    counters that show whether RPCs are being held up by a lack of threads rather than by the engine.
+    """
+
+    max_workers: int
+    """
+    The number of threads in the pool.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pulumi-rpc")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Awaitable[Any]:
+        """
+        Runs fn(*args) on the pool and returns a future, bound to the current event loop, for its result.
+        """
+        enqueued = time.perf_counter()
+
+        def call():
+            wait_time = time.perf_counter() - enqueued
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._total_wait_time += wait_time
+                self._max_wait_time = max(self._max_wait_time, wait_time)
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        def on_done(fut: futures.Future):
+            # A call that is cancelled while still queued never runs, so it has to leave the queue here.
+            if fut.cancelled():
+                with self._lock:
+                    self._queued -= 1
+
+        with self._lock:
+            self._queued += 1
+        fut = self._executor.submit(call)
+        fut.add_done_callback(on_done)
+        return asyncio.wrap_future(fut)
+
+    def stats(self) -> RPCExecutorStats:
+        """
+        Returns a snapshot of this executor's counters.
+        """
+        with self._lock:
+            return RPCExecutorStats(max_workers=self.max_workers,
+                                    queued=self._queued,
+                                    active=self._active,
+                                    completed=self._completed,
+                                    total_wait_time=self._total_wait_time,
+                                    max_wait_time=self._max_wait_time)
+
+    def shutdown(self):
+        """
+        Stops the pool's threads once the RPCs that have already been submitted complete.
+        """
+        self._executor.shutdown(wait=False)
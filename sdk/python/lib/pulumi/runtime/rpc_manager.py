@@ -12,10 +12,147 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import asyncio
+import heapq
+import itertools
 import sys
 import traceback
-from typing import Callable, Awaitable, Tuple, Any, Optional, List
+from typing import AsyncIterator, Callable, Awaitable, Tuple, Any, Optional, List, Dict, TypeVar
 from .. import log
+from . import settings
+
+T = TypeVar('T')
+
+
+class RPCScheduler:
+    """
+    RPCScheduler bounds the number of resource monitor RPCs that are in flight at any one time to the parallelism the
+    engine asked for (`--parallel`). Each kind of RPC is given a weight, which is the share of the parallelism that one
+    call of that kind occupies, and a priority. Calls that do not fit are queued and started in priority order, and in
+    FIFO order within a priority, as earlier calls complete.
+
+    Invokes are prioritized ahead of resource operations by default, since the program blocks on them.
+    """
+
+    DEFAULT_WEIGHTS: Dict[str, int] = {"RegisterResource": 1, "ReadResource": 1, "Invoke": 1}
+    """
+    The weight of each kind of RPC. Kinds not listed here have a weight of 1.
+    """
+
+    DEFAULT_PRIORITIES: Dict[str, int] = {"Invoke": 0, "RegisterResource": 1, "ReadResource": 1}
+    """
+    The priority of each kind of RPC; lower values are started first. Kinds not listed here have a priority of 1.
+    """
+
+    in_flight: int
+    """
+    The total weight of the RPCs that are currently in flight.
+    """
+
+    def __init__(self,
+                 parallel: Optional[int] = None,
+                 weights: Optional[Dict[str, int]] = None,
+                 priorities: Optional[Dict[str, int]] = None):
+        """
+        :param parallel: The maximum total weight of in-flight RPCs. If not given, the parallelism configured in the
+               current settings is used; a missing or non-positive parallelism leaves RPCs unbounded.
+        :param weights: Overrides for the weight of each kind of RPC.
+        :param priorities: Overrides for the priority of each kind of RPC.
+        """
+        self.parallel = parallel
+        self.weights = dict(RPCScheduler.DEFAULT_WEIGHTS, **(weights or {}))
+        self.priorities = dict(RPCScheduler.DEFAULT_PRIORITIES, **(priorities or {}))
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    def capacity(self) -> Optional[int]:
+        """
+        Returns the maximum total weight of in-flight RPCs, or None if RPCs are unbounded.
+        """
+        parallel = self.parallel if self.parallel is not None else settings.SETTINGS.parallel
+        if parallel is None or int(parallel) <= 0:
+            return None
+        return int(parallel)
+
+    def queued(self) -> int:
+        """
+        Returns the number of RPCs that are waiting for a slot.
+        """
+        return sum(1 for _, _, _, fut in self._waiters if not fut.done())
+
+    def _fits(self, weight: int, capacity: int) -> bool:
+        # A call that is heavier than the entire capacity is still allowed to run on its own.
+        return self.in_flight == 0 or self.in_flight + weight <= capacity
+
+    async def acquire(self, kind: str) -> int:
+        """
+        Waits until an RPC of the given kind may start and returns the weight that it occupies, which must later be
+        handed back to `release`.
+        """
+        capacity = self.capacity()
+        if capacity is None:
+            return 0
+
+        weight = max(self.weights.get(kind, 1), 1)
+        if not self._waiters and self._fits(weight, capacity):
+            self.in_flight += weight
+            return weight
+
+        fut = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._waiters, (self.priorities.get(kind, 1), next(self._sequence), weight, fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # The slot was handed to us just as we were cancelled, so give it back.
+                self.release(weight)
+            else:
+                self._wake()
+            raise
+        return weight
+
+    def release(self, weight: int):
+        """
+        Releases a slot previously returned by `acquire` and starts as many queued RPCs as now fit.
+        """
+        if weight == 0:
+            return
+        self.in_flight -= weight
+        self._wake()
+
+    def _wake(self):
+        capacity = self.capacity()
+        while self._waiters:
+            _, _, weight, fut = self._waiters[0]
+            if fut.done():
+                # This waiter was cancelled.
+                heapq.heappop(self._waiters)
+                continue
+            if capacity is not None and not self._fits(weight, capacity):
+                break
+            heapq.heappop(self._waiters)
+            self.in_flight += weight
+            fut.set_result(None)
+
+    def slot(self, kind: str) -> '_Slot':
+        """
+        Returns an asynchronous context manager that holds a slot for an RPC of the given kind for the duration of
+        its `async with` block.
+        """
+        return _Slot(self, kind)
+
+
+class _Slot:
+    def __init__(self, scheduler: RPCScheduler, kind: str):
+        self.scheduler = scheduler
+        self.kind = kind
+        self.weight = 0
+
+    async def __aenter__(self):
+        self.weight = await self.scheduler.acquire(self.kind)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.scheduler.release(self.weight)
 
 
 class RPCManager:
@@ -26,9 +163,14 @@ class RPCManager:
     outstanding RPCs.
     """
 
-    rpcs: List[Awaitable]
+    count: int
+    """
+    The number of outstanding RPCs.
+    """
+
+    started: int
     """
-    The active RPCs.
+    The number of RPCs that have been started.
     """
 
     unhandled_exception: Optional[Exception]
@@ -41,10 +183,18 @@ class RPCManager:
     The traceback associated with unhandled_exception, if any.
     """
 
+    scheduler: RPCScheduler
+    """
+    The scheduler that bounds the number of in-flight resource monitor RPCs.
+    """
+
     def __init__(self):
-        self.rpcs = []
+        self.count = 0
+        self.started = 0
         self.unhandled_exception = None
         self.exception_traceback = None
+        self.scheduler = RPCScheduler()
+        self._idle: Optional[asyncio.Event] = None
 
     def do_rpc(self, name: str, rpc_function: Callable[..., Awaitable[Tuple[Any, Exception]]]) -> Callable[..., Awaitable[Tuple[Any, Exception]]]:
         """
@@ -58,17 +208,14 @@ class RPCManager:
         :param rpc_function: The function implementing the RPC
         :return: An awaitable function implementing the RPC
         """
-        async def rpc_wrapper(*args, **kwargs):
-            log.debug(f"beginning rpc {name}")
-
-            rpc = asyncio.ensure_future(rpc_function(*args, **kwargs))
-            self.rpcs.append(rpc)
+        async def run(rpc: Awaitable):
+            log.debug(lambda: f"beginning rpc {name}")
             try:
                 result = await rpc
                 exception = None
             except Exception as exn:
-                log.debug("RPC failed with exception:")
-                log.debug(traceback.format_exc())
+                log.debug(lambda: "RPC failed with exception:")
+                log.debug(traceback.format_exc)
                 if self.unhandled_exception is None:
                     self.unhandled_exception = exn
                     self.exception_traceback = sys.exc_info()[2]
@@ -77,8 +224,75 @@ class RPCManager:
 
             return result, exception
 
+        def rpc_wrapper(*args, **kwargs):
+            # The RPC is counted as soon as it is made, rather than once the event loop first runs it, so that waiting
+            # for quiescence can't miss it. It stops being counted when its task is done, even if that task is
+            # cancelled before it ever runs.
+            return self.track(run(rpc_function(*args, **kwargs)))
+
         return rpc_wrapper
 
+    def track(self, work: Awaitable) -> asyncio.Future:
+        """
+        Counts the given work as outstanding, like an RPC, until it completes, so that waiting for quiescence waits for it
+        as well. Unlike an RPC, its failure is left to whoever awaits the returned future.
+        """
+        fut = asyncio.ensure_future(work)
+        self._started()
+        fut.add_done_callback(lambda _: self._finished())
+        return fut
+
+    def track_iteration(self, iterator: AsyncIterator[T]) -> AsyncIterator[T]:
+        """
+        Counts iterating over the given asynchronous iterator as outstanding work, from when its first item is asked for
+        until it is exhausted or closed, so that waiting for quiescence doesn't cut it short while it is still being
+        read.
+        """
+        async def tracked():
+            self._started()
+            try:
+                async for item in iterator:
+                    yield item
+            finally:
+                self._finished()
+                aclose = getattr(iterator, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+        return tracked()
+
+    def _started(self):
+        self.count += 1
+        self.started += 1
+
+    def _finished(self):
+        self.count -= 1
+        if self.count == 0 and self._idle is not None:
+            self._idle.set()
+
+    async def wait_for_quiescence(self):
+        """
+        Waits until no RPCs are outstanding and no callbacks are ready to run that could start more. The Outputs that
+        an RPC resolves run their applies in callbacks after it completes, and each step of a chain of applies runs in
+        a callback scheduled by the one before it, so the program is only done once the event loop has run out of them
+        with no RPCs outstanding.
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            if self.count > 0:
+                log.debug(lambda: f"waiting for quiescence; {self.count} RPCs outstanding")
+                self._idle = asyncio.Event()
+                try:
+                    await self._idle.wait()
+                finally:
+                    self._idle = None
+
+            # Let the callbacks that are ready run. Like _sync_await, this relies on the ready queue of the default
+            # event loop, which holds everything scheduled to run ahead of the next wait for I/O.
+            await asyncio.sleep(0)
+            if self.count == 0 and not getattr(loop, "_ready", None):
+                return
+
 
 RPC_MANAGER: RPCManager = RPCManager()
 """
@@ -0,0 +1,89 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A memo of the serialized forms of Outputs and futures that are passed to more than one resource.
+"""
+import asyncio
+import weakref
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class SerializationMemoStats(NamedTuple):
+    """
+    A snapshot of the counters kept by a SerializationMemo.
+    """
+
+    hits: int
+    """
+    The number of times a value was serialized by reusing an earlier serialization.
+    """
+
+    misses: int
+    """
+    The number of times a value had to be awaited and serialized.
+    """
+
+
+_SEEN = None
+"""
+The entry for a value that has been serialized once in a scope, without keeping what it serialized to.
+"""
+
+
+class SerializationMemo:
+    """
+    The serialized forms of the Outputs and futures serialized so far in a run, along with the resources they depend on.
+    Values like a shared map of tags or a policy document are often passed to many resources. Their values never
+    change once they resolve, so once a value is serialized a second time, that serialization is kept and every later
+    one reuses it. Most values are only passed to a single resource, and their serializations aren't kept, so that
+    they can be freed along with the registration that produced them.
+
+    Entries are keyed by the identity of the value, which they hold weakly, so that they are dropped along with it.
+    They are also keyed by the scope in which the names of nested properties are translated, since the same value
+    serializes differently for resources that translate names differently. Whether a value is unknown or secret is
+    decided by the value itself and by the engine, neither of which changes during a run, so it is part of the result.
+    """
+
+    def __init__(self):
+        self._entries: 'weakref.WeakKeyDictionary[Any, Dict[Any, Optional[asyncio.Future]]]' = \
+            weakref.WeakKeyDictionary()
+        self._hits = 0
+        self._misses = 0
+
+    async def serialize(self, value: Any, scope: Any, serialize: Callable[[], Awaitable[T]]) -> T:
+        """
+        Returns the serialized form of `value`, calling `serialize` to produce it unless it has already been produced
+        and kept in the same scope. The first serialization of a value in a scope is only recorded as seen; the second
+        is kept for the rest, and callers that arrive while it is still being serialized share it.
+        """
+        entries = self._entries.get(value)
+        if entries is None:
+            entries = self._entries[value] = {}
+        if scope not in entries:
+            self._misses += 1
+            entries[scope] = _SEEN
+            return await serialize()
+        entry = entries[scope]
+        if entry is _SEEN:
+            self._misses += 1
+            entry = entries[scope] = asyncio.ensure_future(serialize())
+        else:
+            self._hits += 1
+        # Each caller is shielded, so that cancelling one doesn't cancel the serialization the others are waiting on.
+        return await asyncio.shield(entry)
+
+    def stats(self) -> SerializationMemoStats:
+        return SerializationMemoStats(hits=self._hits, misses=self._misses)
@@ -16,13 +16,25 @@
 Runtime settings and configuration.
 """
 import asyncio
+import functools
 import os
 import sys
-from typing import Optional, Awaitable, Union, Any, TYPE_CHECKING
+from concurrent import futures
+from typing import Optional, AsyncIterator, Awaitable, Union, Any, Dict, List, Set, cast, TYPE_CHECKING
 
 import grpc
 from ..runtime.proto import engine_pb2_grpc, resource_pb2, resource_pb2_grpc
 from ..errors import RunError
+from .apply_executor import ApplyExecutor, ApplyExecutorStats
+from .rpc_executor import RPCExecutor, RPCExecutorStats
+from .serialization_memo import SerializationMemo
+
+# grpc.aio is only available in grpcio 1.32 and later. If it is missing, the asyncio transport is simply unavailable
+# and all RPCs are issued through the blocking stubs.
+try:
+    from grpc import aio as grpc_aio  # pylint: disable=ungrouped-imports
+except ImportError:
+    grpc_aio = None
 
 if TYPE_CHECKING:
     from ..resource import Resource
@@ -31,6 +43,20 @@ if TYPE_CHECKING:
 _MAX_RPC_MESSAGE_SIZE = 1024 * 1024 * 400
 _GRPC_CHANNEL_OPTIONS = [('grpc.max_receive_message_length', _MAX_RPC_MESSAGE_SIZE)]
 
+KNOWN_FEATURES: List[str] = ["secrets"]
+"""
+The resource monitor features that the SDK relies on. They are negotiated together, the first time any one of them is
+needed, along with gzipCompression if requests may be compressed.
+"""
+
+# grpc.Compression is only available in grpcio 1.23 and later. Without it, requests are never compressed.
+_GZIP_COMPRESSION = getattr(getattr(grpc, "Compression", None), "Gzip", None)
+
+_DEFAULT_RPC_EXECUTOR_SIZE = 64
+"""
+The default number of threads used to run blocking RPCs, unless a smaller parallelism is configured.
+"""
+
 class Settings:
     monitor: Optional[Union[resource_pb2_grpc.ResourceMonitorStub, Any]]
     engine: Optional[Union[engine_pb2_grpc.EngineStub, Any]]
@@ -40,6 +66,14 @@ class Settings:
     dry_run: Optional[bool]
     test_mode_enabled: Optional[bool]
     legacy_apply_enabled: Optional[bool]
+    grpc_aio_enabled: Optional[bool]
+    rpc_executor_size: Optional[int]
+    apply_executor_size: Optional[int]
+    debug_logging_enabled: Optional[bool]
+    compression_threshold: Optional[int]
+    lazy_outputs_enabled: Optional[bool]
+    deferred_outputs_enabled: Optional[bool]
+    bounded_memory_enabled: Optional[bool]
 
     """
     A bag of properties for configuring the Pulumi Python language runtime.
@@ -52,7 +86,15 @@ class Settings:
                  parallel: Optional[str] = None,
                  dry_run: Optional[bool] = None,
                  test_mode_enabled: Optional[bool] = None,
-                 legacy_apply_enabled: Optional[bool] = None):
+                 legacy_apply_enabled: Optional[bool] = None,
+                 grpc_aio_enabled: Optional[bool] = None,
+                 rpc_executor_size: Optional[int] = None,
+                 apply_executor_size: Optional[int] = None,
+                 debug_logging_enabled: Optional[bool] = None,
+                 compression_threshold: Optional[int] = None,
+                 lazy_outputs_enabled: Optional[bool] = None,
+                 deferred_outputs_enabled: Optional[bool] = None,
+                 bounded_memory_enabled: Optional[bool] = None):
         # Save the metadata information.
         self.project = project
         self.stack = stack
@@ -60,6 +102,26 @@ class Settings:
         self.dry_run = dry_run
         self.test_mode_enabled = test_mode_enabled
         self.legacy_apply_enabled = legacy_apply_enabled
+        self.grpc_aio_enabled = grpc_aio_enabled
+        self.rpc_executor_size = rpc_executor_size
+        self.apply_executor_size = apply_executor_size
+        self.debug_logging_enabled = debug_logging_enabled
+        self.compression_threshold = compression_threshold
+        self.lazy_outputs_enabled = lazy_outputs_enabled
+        self.deferred_outputs_enabled = deferred_outputs_enabled
+        self.bounded_memory_enabled = bounded_memory_enabled
+        self._rpc_executor: Optional[RPCExecutor] = None
+        self._apply_executor: Optional[ApplyExecutor] = None
+        self._serialization_memo = SerializationMemo()
+        self._translation_tables: Dict[Any, Optional[Dict[str, str]]] = {}
+        self._monitor_address: Optional[str] = None
+        self._engine_address: Optional[str] = None
+        self._aio_channels: List[Any] = []
+        self._aio_calls: Set[Any] = set()
+        self._monitor_aio: Optional[resource_pb2_grpc.ResourceMonitorStub] = None
+        self._engine_aio: Optional[engine_pb2_grpc.EngineStub] = None
+        self._feature_support: Dict[str, bool] = {}
+        self._feature_negotiation: Optional[asyncio.Future] = None
 
         if self.test_mode_enabled is None:
             self.test_mode_enabled = os.getenv("PULUMI_TEST_MODE", "false") == "true"
@@ -67,19 +129,64 @@ class Settings:
         if self.legacy_apply_enabled is None:
             self.legacy_apply_enabled = os.getenv("PULUMI_ENABLE_LEGACY_APPLY", "false") == "true"
 
+        if self.grpc_aio_enabled is None:
+            self.grpc_aio_enabled = os.getenv("PULUMI_ENABLE_GRPC_AIO", "false") == "true"
+        if grpc_aio is None:
+            self.grpc_aio_enabled = False
+
+        if self.debug_logging_enabled is None:
+            self.debug_logging_enabled = os.getenv("PULUMI_ENABLE_DEBUG_LOGGING", "false") == "true"
+
+        if self.lazy_outputs_enabled is None:
+            self.lazy_outputs_enabled = os.getenv("PULUMI_ENABLE_LAZY_OUTPUTS", "false") == "true"
+
+        if self.deferred_outputs_enabled is None:
+            self.deferred_outputs_enabled = os.getenv("PULUMI_ENABLE_DEFERRED_OUTPUTS", "false") == "true"
+
+        if self.bounded_memory_enabled is None:
+            self.bounded_memory_enabled = os.getenv("PULUMI_ENABLE_BOUNDED_MEMORY", "false") == "true"
+
+        if self.compression_threshold is None:
+            threshold = os.getenv("PULUMI_GRPC_COMPRESSION_THRESHOLD")
+            if threshold:
+                self.compression_threshold = int(threshold)
+
+        if self.rpc_executor_size is None:
+            size = os.getenv("PULUMI_RPC_EXECUTOR_SIZE")
+            if size:
+                self.rpc_executor_size = int(size)
+            elif self.parallel is not None and int(self.parallel) > 0:
+                self.rpc_executor_size = min(int(self.parallel), _DEFAULT_RPC_EXECUTOR_SIZE)
+            else:
+                self.rpc_executor_size = _DEFAULT_RPC_EXECUTOR_SIZE
+
+        if self.apply_executor_size is None:
+            size = os.getenv("PULUMI_APPLY_EXECUTOR_SIZE")
+            if size:
+                self.apply_executor_size = int(size)
 
         # Actually connect to the monitor/engine over gRPC.
         if monitor is not None:
             if isinstance(monitor, str):
+                self._monitor_address = monitor
                 self.monitor = resource_pb2_grpc.ResourceMonitorStub(
                     grpc.insecure_channel(monitor, options=_GRPC_CHANNEL_OPTIONS),
                 )
             else:
                 self.monitor = monitor
+                # In-process monitors (such as the one used for mocks) may declare the features they support up front,
+                # in which case there is nothing to negotiate.
+                supported_features = getattr(monitor, "supported_features", None)
+                if supported_features is not None:
+                    for feature in self._known_features():
+                        self._feature_support[feature] = feature in supported_features
+                    for feature in supported_features:
+                        self._feature_support[feature] = True
         else:
             self.monitor = None
         if engine:
             if isinstance(engine, str):
+                self._engine_address = engine
                 self.engine = engine_pb2_grpc.EngineStub(
                     grpc.insecure_channel(engine, options=_GRPC_CHANNEL_OPTIONS),
                 )
@@ -88,6 +195,121 @@ class Settings:
         else:
             self.engine = None
 
+    def _new_aio_channel(self, address: str) -> Any:
+        channel = grpc_aio.insecure_channel(address, options=_GRPC_CHANNEL_OPTIONS)
+        # Stubs do not keep their grpc.aio channel alive, and a collected channel cancels all of its in-flight calls,
+        # so hold on to it for as long as these settings are in use.
+        self._aio_channels.append(channel)
+        return channel
+
+    async def _await_aio_call(self, call: Any) -> Any:
+        # The task awaiting a grpc.aio call is not always enough to keep the call reachable, and a collected call is
+        # cancelled, so keep every in-flight call alive until it completes.
+        self._aio_calls.add(call)
+        try:
+            return await call
+        finally:
+            self._aio_calls.discard(call)
+
+    def rpc_executor(self) -> RPCExecutor:
+        """
+        Returns the executor on which blocking monitor and engine RPCs are run, creating it on first use.
+        """
+        if self._rpc_executor is None:
+            self._rpc_executor = RPCExecutor(max(int(self.rpc_executor_size or 1), 1))
+        return self._rpc_executor
+
+    def rpc_executor_stats(self) -> Optional[RPCExecutorStats]:
+        """
+        Returns the counters of the RPC executor, or None if no blocking RPCs have been made.
+        """
+        return self._rpc_executor.stats() if self._rpc_executor is not None else None
+
+    def apply_executor(self) -> ApplyExecutor:
+        """
+        Returns the executor on which the callbacks of applies made with `run_in_executor` are run, creating a thread
+        pool for it on first use unless one has been set with `set_apply_executor`.
+        """
+        if self._apply_executor is None:
+            # A size of None leaves the number of threads to ThreadPoolExecutor, which sizes it by CPU count.
+            size = max(int(self.apply_executor_size), 1) if self.apply_executor_size is not None else None
+            self._apply_executor = ApplyExecutor(
+                futures.ThreadPoolExecutor(max_workers=size, thread_name_prefix="pulumi-apply"), owned=True)
+        return self._apply_executor
+
+    def apply_executor_stats(self) -> Optional[ApplyExecutorStats]:
+        """
+        Returns the counters of the apply executor, or None if no applies have been run in it.
+        """
+        return self._apply_executor.stats() if self._apply_executor is not None else None
+
+    def serialization_memo(self) -> SerializationMemo:
+        """
+        Returns the memo of the Outputs and futures that have been serialized in this run.
+        """
+        return self._serialization_memo
+
+    def translation_tables(self) -> Dict[Any, Optional[Dict[str, str]]]:
+        """
+        Returns the tables of translated property names kept for each resource class in this run.
+        """
+        return self._translation_tables
+
+    def _shutdown_executors(self):
+        # The pools are created again if these settings are used after being replaced, as tests do when they restore
+        # the settings they started with.
+        if self._rpc_executor is not None:
+            self._rpc_executor.shutdown()
+            self._rpc_executor = None
+        # A pool set by the program is the program's to shut down.
+        if self._apply_executor is not None and self._apply_executor.owned:
+            self._apply_executor.shutdown()
+            self._apply_executor = None
+
+    def _known_features(self) -> List[str]:
+        # The monitor is only asked whether it takes compressed requests if they may be sent.
+        if self.compression_threshold and self.compression_threshold > 0 and _GZIP_COMPRESSION is not None:
+            return KNOWN_FEATURES + ["gzipCompression"]
+        return KNOWN_FEATURES
+
+    async def _negotiate_features(self, feature: str):
+        # Callers that arrive while a negotiation is underway share it rather than issuing their own RPCs. That
+        # negotiation may not have asked about the feature they need, in which case they start another once it's done.
+        while feature not in self._feature_support:
+            if self._feature_negotiation is None or self._feature_negotiation.done():
+                features = [f for f in dict.fromkeys(self._known_features() + [feature])
+                            if f not in self._feature_support]
+                self._feature_negotiation = asyncio.ensure_future(self._query_features(features))
+            await asyncio.shield(self._feature_negotiation)
+
+    async def _query_features(self, features: List[str]):
+        results = await asyncio.gather(*[_monitor_query_feature(feature) for feature in features])
+        self._feature_support.update(zip(features, results))
+
+    def monitor_aio(self) -> Optional[resource_pb2_grpc.ResourceMonitorStub]:
+        """
+        Returns a resource monitor client built on a grpc.aio channel, or None if the asyncio transport is disabled or
+        the monitor is not a gRPC endpoint. The channel is created on first use, since it must be bound to the
+        running event loop.
+        """
+        if not self.grpc_aio_enabled or self._monitor_address is None:
+            return None
+        if self._monitor_aio is None:
+            self._monitor_aio = resource_pb2_grpc.ResourceMonitorStub(self._new_aio_channel(self._monitor_address))
+        return self._monitor_aio
+
+    def engine_aio(self) -> Optional[engine_pb2_grpc.EngineStub]:
+        """
+        Returns an engine client built on a grpc.aio channel, or None if the asyncio transport is disabled or the
+        engine is not a gRPC endpoint. The channel is created on first use, since it must be bound to the running
+        event loop.
+        """
+        if not self.grpc_aio_enabled or self._engine_address is None:
+            return None
+        if self._engine_aio is None:
+            self._engine_aio = engine_pb2_grpc.EngineStub(self._new_aio_channel(self._engine_address))
+        return self._engine_aio
+
 # default to "empty" settings.
 SETTINGS = Settings()
 
@@ -99,6 +321,9 @@ def configure(settings: Settings):
     if not settings or not isinstance(settings, Settings):
         raise TypeError('Settings is expected to be non-None and of type Settings')
     global SETTINGS  # pylint: disable=global-statement
+    if settings is not SETTINGS:
+        # Nothing is run on the executors of settings that have been replaced, so their threads can be let go.
+        SETTINGS._shutdown_executors()
     SETTINGS = settings
 
 
@@ -127,9 +352,40 @@ def require_test_mode_enabled():
     if not is_test_mode_enabled():
         raise RunError('Program run without the Pulumi engine available; re-run using the `pulumi` CLI')
 
+def set_apply_executor(executor: futures.Executor):
+    """
+    Sets the pool on which the callbacks of applies made with `run_in_executor` are run, such as a
+    `concurrent.futures.ProcessPoolExecutor` for callbacks that hold the GIL. Callbacks and their values must be
+    picklable to be run in another process.
+    """
+    if SETTINGS._apply_executor is not None and SETTINGS._apply_executor.owned:
+        SETTINGS._apply_executor.shutdown()
+    SETTINGS._apply_executor = ApplyExecutor(executor)
+
+
 def is_legacy_apply_enabled():
     return bool(SETTINGS.legacy_apply_enabled)
 
+def is_lazy_outputs_enabled():
+    """
+    Returns true if output properties are only decoded from the engine's response once something waits on them.
+    """
+    return bool(SETTINGS.lazy_outputs_enabled)
+
+def is_deferred_outputs_enabled():
+    """
+    Returns true if the Outputs of a resource's properties are only made once the program reads them. Code that looks
+    at the attributes of a resource through its __dict__, such as vars(resource), only sees the ones that have been read.
+    """
+    return bool(SETTINGS.deferred_outputs_enabled)
+
+def is_bounded_memory_enabled():
+    """
+    Returns true if the state kept for each registration is released as soon as it is no longer needed, so that memory
+    does not grow with the total size of the inputs of every resource the program registers.
+    """
+    return bool(SETTINGS.bounded_memory_enabled)
+
 
 def get_project() -> str:
     """
@@ -203,25 +459,123 @@ def set_root_resource(root: 'Resource'):
     ROOT = root
 
 
-async def monitor_supports_secrets() -> bool:
-    monitor = SETTINGS.monitor
-    if not monitor:
-        return False
+async def monitor_rpc(method: str, req: Any, compression: Optional[Any] = None) -> Any:
+    """
+    Performs the resource monitor RPC `method` with the given request. When the grpc.aio transport is enabled, the RPC
+    is awaited directly on the event loop; otherwise, the blocking client is called on the RPC executor. If given,
+    `compression` (see `request_compression`) is applied to this call only.
 
-    req = resource_pb2.SupportsFeatureRequest(id="secrets")
-    def do_rpc_call():
+    gRPC errors are raised as-is, so callers are responsible for handling them.
+    """
+    monitor_aio = SETTINGS.monitor_aio()
+    monitor = monitor_aio if monitor_aio is not None else SETTINGS.monitor
+    call = getattr(monitor, method)
+    if compression is not None:
+        call = functools.partial(call, compression=compression)
+
+    if monitor_aio is not None:
+        return await SETTINGS._await_aio_call(call(req))
+
+    return await SETTINGS.rpc_executor().run(call, req)
+
+
+async def monitor_stream_rpc(method: str, req: Any) -> AsyncIterator[Any]:
+    """
+    Performs the server-streaming resource monitor RPC `method` with the given request, yielding each response as it
+    arrives. When the grpc.aio transport is enabled, responses are read on the event loop; otherwise, each one is read
+    from the blocking client on the RPC executor. If the caller stops iterating early, the RPC is cancelled.
+
+    gRPC errors are raised as-is, so callers are responsible for handling them.
+    """
+    monitor_aio = SETTINGS.monitor_aio()
+    if monitor_aio is not None:
+        call = getattr(monitor_aio, method)(req)
+        SETTINGS._aio_calls.add(call)
         try:
-            resp = monitor.SupportsFeature(req)
-            return resp.hasSupport
-        except grpc.RpcError as exn:
-            # See the comment on invoke for the justification for disabling
-            # this warning
-            # pylint: disable=no-member
-            if exn.code() == grpc.StatusCode.UNAVAILABLE:
-                sys.exit(0)
-            if exn.code() == grpc.StatusCode.UNIMPLEMENTED:
-                return False
-            details = exn.details()
-        raise Exception(details)
-
-    return await asyncio.get_event_loop().run_in_executor(None, do_rpc_call)
+            while True:
+                resp = await call.read()
+                if resp is grpc_aio.EOF:
+                    return
+                yield resp
+        finally:
+            SETTINGS._aio_calls.discard(call)
+            call.cancel()
+
+    executor = SETTINGS.rpc_executor()
+    responses = await executor.run(getattr(SETTINGS.monitor, method), req)
+    try:
+        while True:
+            resp = await executor.run(next, responses, None)
+            if resp is None:
+                return
+            yield resp
+    finally:
+        cancel = getattr(responses, "cancel", None)
+        if cancel is not None:
+            cancel()
+
+
+async def engine_rpc(method: str, req: Any) -> Any:
+    """
+    Performs the engine RPC `method` with the given request. When the grpc.aio transport is enabled, the RPC is
+    awaited directly on the event loop; otherwise, the blocking client is called on the RPC executor.
+
+    gRPC errors are raised as-is, so callers are responsible for handling them.
+    """
+    engine_aio = SETTINGS.engine_aio()
+    if engine_aio is not None:
+        return await SETTINGS._await_aio_call(getattr(engine_aio, method)(req))
+
+    return await SETTINGS.rpc_executor().run(getattr(SETTINGS.engine, method), req)
+
+
+async def _monitor_query_feature(feature: str) -> bool:
+    req = resource_pb2.SupportsFeatureRequest(id=feature)
+    try:
+        resp = await monitor_rpc("SupportsFeature", req)
+        return resp.hasSupport
+    except grpc.RpcError as exn:
+        # See the comment on invoke for the justification for disabling
+        # this warning
+        # pylint: disable=no-member
+        if exn.code() == grpc.StatusCode.UNAVAILABLE:
+            sys.exit(0)
+        if exn.code() == grpc.StatusCode.UNIMPLEMENTED:
+            return False
+        details = exn.details()
+    raise Exception(details)
+
+
+async def monitor_supports_feature(feature: str) -> bool:
+    """
+    Returns whether the resource monitor supports the given feature. The monitor is asked about all known features
+    at once, the first time any of them is needed, and later calls are answered from memory.
+    """
+    settings = SETTINGS
+    if not settings.monitor:
+        return False
+
+    supported = settings._feature_support.get(feature)
+    if supported is None:
+        await settings._negotiate_features(feature)
+        supported = settings._feature_support.get(feature, False)
+    return supported
+
+
+async def monitor_supports_secrets() -> bool:
+    return await monitor_supports_feature("secrets")
+
+
+async def request_compression(req: Any) -> Optional[Any]:
+    """
+    Returns the compression to apply to the given resource monitor request: gzip, if the request is at least
+    `compression_threshold` bytes in size and the monitor supports compressed requests, or None otherwise.
+    """
+    threshold = SETTINGS.compression_threshold
+    if not threshold or threshold <= 0 or _GZIP_COMPRESSION is None:
+        return None
+    if req.ByteSize() < threshold:
+        return None
+    if not await monitor_supports_feature("gzipCompression"):
+        return None
+    return _GZIP_COMPRESSION
@@ -21,6 +21,7 @@ from inspect import isawaitable
 from typing import Callable, Any, Dict, List, TYPE_CHECKING
 
 from ..resource import ComponentResource, Resource, ResourceTransformation
+from . import settings
 from .settings import get_project, get_stack, get_root_resource, is_dry_run, set_root_resource
 from .rpc_manager import RPC_MANAGER
 from .sync_await import _all_tasks, _get_current_task
@@ -34,21 +35,22 @@ async def run_pulumi_func(func: Callable):
     try:
         func()
     finally:
-        log.debug("Waiting for outstanding RPCs to complete")
-
-        # Pump the event loop, giving all of the RPCs that we just queued up time to fully execute.
-        # The asyncio scheduler does not expose a "yield" primitive, so this will have to do.
-        #
-        # Note that "asyncio.sleep(0)" is the blessed way to do this:
-        # https://github.com/python/asyncio/issues/284#issuecomment-154180935
-        #
-        # We await each RPC in turn so that this loop will actually block rather than busy-wait.
-        while True:
-            await asyncio.sleep(0)
-            if len(RPC_MANAGER.rpcs) == 0:
-                break
-            log.debug(f"waiting for quiescence; {len(RPC_MANAGER.rpcs)} RPCs outstanding")
-            await RPC_MANAGER.rpcs.pop()
+        log.debug(lambda: "Waiting for outstanding RPCs to complete")
+
+        # Give all of the RPCs that we just queued up, and any that they lead to, time to fully execute.
+        await RPC_MANAGER.wait_for_quiescence()
+
+        # Report how the RPC executor held up, so that registrations starved of threads are visible in the logs.
+        stats = settings.SETTINGS.rpc_executor_stats()
+        if stats is not None:
+            log.debug(lambda: f"rpc executor: {stats.completed} RPCs completed on {stats.max_workers} threads, "
+                      f"waited {stats.total_wait_time:.3f}s in total and {stats.max_wait_time:.3f}s at most")
+        apply_stats = settings.SETTINGS.apply_executor_stats()
+        if apply_stats is not None:
+            log.debug(lambda: f"apply executor: {apply_stats.completed} callbacks completed, "
+                      f"ran {apply_stats.total_run_time:.3f}s in total and {apply_stats.max_run_time:.3f}s at most")
+        memo_stats = settings.SETTINGS.serialization_memo().stats()
+        log.debug(lambda: f"serialization memo: {memo_stats.hits} hits, {memo_stats.misses} misses")
 
         # Asyncio event loops require that all outstanding tasks be completed by the time that the
         # event loop closes. If we're at this point and there are no outstanding RPCs, we should
@@ -56,11 +58,14 @@ async def run_pulumi_func(func: Callable):
         #
         # We will occasionally start tasks deliberately that we know will never complete. We must
         # cancel them before shutting down the event loop.
-        log.debug("Canceling all outstanding tasks")
+        log.debug(lambda: "Canceling all outstanding tasks")
         for task in _all_tasks():
             # Don't kill ourselves, that would be silly.
             if task == _get_current_task():
                 continue
+            # Log messages that are still being delivered are flushed below.
+            if task in log._pending:
+                continue
             task.cancel()
 
         # Pump the event loop again. Task.cancel is delivered asynchronously to all running tasks
@@ -68,7 +73,10 @@ async def run_pulumi_func(func: Callable):
         await asyncio.sleep(0)
 
         # Once we get scheduled again, all tasks have exited and we're good to go.
-        log.debug("run_pulumi_func completed")
+        log.debug(lambda: "run_pulumi_func completed")
+
+        # Finally, make sure that every log message has been delivered before the event loop closes.
+        await log._flush()
 
     if RPC_MANAGER.unhandled_exception is not None:
         raise RPC_MANAGER.unhandled_exception.with_traceback(RPC_MANAGER.exception_traceback)
@@ -162,6 +170,7 @@ def massage(attr: Any, seen: List[Any]):
         return Output.from_input(attr).apply(lambda v: massage(v, seen))
 
     if isinstance(attr, Resource):
+        attr._read_deferred_outputs()
         result = massage(attr.__dict__, seen)
 
         # In preview only, we mark the result with "@isPulumiResource" to indicate that it is derived
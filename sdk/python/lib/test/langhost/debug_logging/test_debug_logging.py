@@ -0,0 +1,54 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from os import path
+from ..util import LanghostTest
+from pulumi.runtime.proto import engine_pb2
+
+
+class DebugMessagesTest(LanghostTest):
+    def setUp(self):
+        self.debug_messages = []
+
+    def log(self, _ctx, severity, message):
+        if severity == engine_pb2.DEBUG:
+            self.debug_messages.append(message)
+
+    def register_resource(self, _ctx, _dry_run, ty, name, _resource,
+                          _dependencies, _parent, _custom, _protect, _provider, _property_deps, _delete_before_replace,
+                          _ignore_changes, _version):
+        return {
+            "urn": self.make_urn(ty, name),
+        }
+
+
+class DebugLoggingTest(DebugMessagesTest):
+    def test_program_debug_messages(self):
+        self.run_test(
+            program=path.join(self.base_path(), "debug_logging"),
+            expected_resource_count=1)
+        # Messages the program logs are always sent, but the runtime's own are only sent when asked for.
+        self.assertIn("debug message from the program", self.debug_messages)
+        self.assertFalse([m for m in self.debug_messages if m.startswith("registering resource")])
+
+
+class VerboseDebugLoggingTest(DebugMessagesTest):
+    # A log level at which the engine logs debug messages, as flowed by `pulumi up -v=9 --logflow`.
+    language_host_args = ["-v=9"]
+
+    def test_runtime_debug_messages(self):
+        self.run_test(
+            program=path.join(self.base_path(), "debug_logging"),
+            expected_resource_count=1)
+        self.assertIn("debug message from the program", self.debug_messages)
+        self.assertTrue([m for m in self.debug_messages if m.startswith("registering resource")])
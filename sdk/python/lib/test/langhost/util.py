@@ -146,6 +146,10 @@ class LanghostMockResourceMonitor(proto.ResourceMonitorServicer):
                 context, self.dryrun, urn, res["type"], res["name"], res["props"], outs)
         return empty_pb2.Empty()
 
+    def SupportsFeature(self, request, context):
+        has_support = request.id in self.langhost_test.supported_features
+        return proto.SupportsFeatureResponse(hasSupport=has_support)
+
 
 class MockEngine(proto.EngineServicer):
     """
@@ -153,9 +157,13 @@ class MockEngine(proto.EngineServicer):
     above class, we encapsulate all gRPC details here so that test writers only have
     to override methods on LanghostTest.
     """
+    def __init__(self, langhost_test):
+        self.langhost_test = langhost_test
+
     def Log(self, request, context):
         if request.severity == engine_pb2.ERROR:
             print(f"error: {request.message}")
+        self.langhost_test.log(context, request.severity, request.message)
         return empty_pb2.Empty()
 
 
@@ -177,6 +185,18 @@ class LanghostTest(unittest.TestCase):
     Check out README.md in this directory for more details.
     """
 
+    supported_features = set()
+    """
+    The resource monitor features that the mock monitor reports as supported. Override to enable features such as
+    "secrets" for a test.
+    """
+
+    language_host_args = []
+    """
+    Extra arguments to launch the language host with, such as the log level that the engine flows to it with
+    --logflow.
+    """
+
     def run_test(self,
                  project=None,
                  stack=None,
@@ -285,6 +305,15 @@ class LanghostTest(unittest.TestCase):
         """
         pass
 
+    def log(self, _ctx, _severity, _message):
+        """
+        Method corresponding to the `Log` engine RPC call.
+        Override for custom behavior or assertions.
+
+        Returns None.
+        """
+        pass
+
     def make_urn(self, type_, name):
         """
         Makes an URN from a given resource type and name.
@@ -299,7 +328,7 @@ class LanghostTest(unittest.TestCase):
 
     def _create_mock_resource_monitor(self, dryrun):
         monitor = LanghostMockResourceMonitor(self, dryrun)
-        engine = MockEngine()
+        engine = MockEngine(self)
         server = grpc.server(futures.ThreadPoolExecutor(max_workers=4), options=_GRPC_CHANNEL_OPTIONS)
 
         resource_pb2_grpc.add_ResourceMonitorServicer_to_server(monitor, server)
@@ -312,7 +341,7 @@ class LanghostTest(unittest.TestCase):
     def _create_language_host(self, port):
         exec_path = path.join(path.dirname(__file__), "..", "..", "..", "cmd", "pulumi-language-python-exec")
         proc = subprocess.Popen(
-            ["pulumi-language-python", "--use-executor", exec_path, "localhost:%d" % port],
+            ["pulumi-language-python", *self.language_host_args, "--use-executor", exec_path, "localhost:%d" % port],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE)
         # The first line of output is the port that the language host gRPC server is listening on.
@@ -0,0 +1,136 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import os
+import threading
+import time
+import unittest
+from concurrent import futures
+
+from pulumi import CustomResource
+from pulumi.output import Output, _OutputState
+from pulumi.runtime import settings, set_apply_executor
+from pulumi.runtime.stack import run_pulumi_func
+
+
+def async_test(coro):
+    def wrapper(*args, **kwargs):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(coro(*args, **kwargs))
+        loop.close()
+    return wrapper
+
+
+def resolved(value, known=True, secret=False, resources=None) -> Output:
+    state = asyncio.Future()
+    state.set_result(_OutputState(value, known, secret, resources or set()))
+    return Output._from_state(state)
+
+
+def double_with_pid(value):
+    return value * 2, os.getpid()
+
+
+class File(CustomResource):
+    def __init__(self, name, content):
+        CustomResource.__init__(self, "test:index:File", name, props={"content": content})
+
+
+class ApplyExecutorTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+        settings.configure(settings.Settings(dry_run=False, apply_executor_size=2))
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+
+    @async_test
+    async def test_runs_off_the_event_loop(self):
+        loop_thread = threading.get_ident()
+        out = resolved(21, secret=True, resources={"res"}).apply(
+            lambda v: (v * 2, threading.get_ident()), run_in_executor=True)
+
+        value, thread = await out.future()
+        self.assertEqual(42, value)
+        self.assertNotEqual(loop_thread, thread)
+        self.assertTrue(await out.is_known())
+        self.assertTrue(await out.is_secret())
+        self.assertEqual({"res"}, await out.resources())
+
+        stats = settings.SETTINGS.apply_executor_stats()
+        self.assertEqual(1, stats.completed)
+        self.assertGreaterEqual(stats.total_run_time, stats.max_run_time)
+
+    @async_test
+    async def test_returning_output(self):
+        inner = resolved("inner", secret=True, resources={"inner"})
+        out = resolved("outer", resources={"outer"}).apply(lambda v: inner, run_in_executor=True)
+        self.assertEqual("inner", await out.future())
+        self.assertTrue(await out.is_secret())
+        self.assertEqual({"inner", "outer"}, await out.resources())
+
+    @async_test
+    async def test_skipped_during_preview(self):
+        settings.SETTINGS.dry_run = True
+        calls = []
+        out = resolved(None, known=False).apply(calls.append, run_in_executor=True)
+        self.assertFalse(await out.is_known())
+        self.assertEqual([], calls)
+        self.assertIsNone(settings.SETTINGS.apply_executor_stats())
+
+    @async_test
+    async def test_failure(self):
+        def fail(_):
+            raise ValueError("apply failed")
+
+        out = resolved(1).apply(fail, run_in_executor=True)
+        with self.assertRaisesRegex(ValueError, "apply failed"):
+            await out.future()
+
+    @async_test
+    async def test_process_pool(self):
+        with futures.ProcessPoolExecutor(max_workers=1) as executor:
+            set_apply_executor(executor)
+            value, pid = await resolved(21).apply(double_with_pid, run_in_executor=True).future()
+        self.assertEqual(42, value)
+        self.assertNotEqual(os.getpid(), pid)
+
+    def test_size(self):
+        self.assertIsNone(settings.Settings().apply_executor_size)
+        os.environ["PULUMI_APPLY_EXECUTOR_SIZE"] = "3"
+        try:
+            self.assertEqual(3, settings.Settings().apply_executor_size)
+        finally:
+            del os.environ["PULUMI_APPLY_EXECUTOR_SIZE"]
+
+    @async_test
+    async def test_resources_made_after(self):
+        settings.configure(settings.Settings(project="project", stack="stack", dry_run=False, test_mode_enabled=True))
+        old_root, settings.ROOT = settings.ROOT, None
+        made = []
+
+        def program():
+            a = File("a", "content")
+            slow = a.id.apply(lambda v: time.sleep(0.2) or v, run_in_executor=True)
+            slow.apply(lambda v: made.append(File("b", v)))
+
+        try:
+            await run_pulumi_func(program)
+        finally:
+            settings.ROOT = old_root
+        # Shutdown waits for the callback on the executor, and so for the resource it leads to.
+        self.assertEqual(1, len(made))
+        urn = await asyncio.wait_for(made[0].urn.future(), 1)
+        self.assertTrue(urn.endswith("test:index:File::b"))
@@ -0,0 +1,142 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import gc
+import tracemalloc
+import unittest
+import weakref
+
+from pulumi import CustomResource, Output
+from pulumi.runtime import settings
+from pulumi.runtime.mocks import MockEngine, MockMonitor, Mocks
+from pulumi.runtime.stack import run_pulumi_func
+
+
+def async_test(coro):
+    def wrapper(*args, **kwargs):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(coro(*args, **kwargs))
+        loop.close()
+    return wrapper
+
+
+SIZE = 50 * 1024
+
+
+class File(CustomResource):
+    def __init__(self, name, content):
+        CustomResource.__init__(self, "test:index:File", name, props={"content": content})
+
+
+class Bucket(CustomResource):
+    def __init__(self, name, props):
+        CustomResource.__init__(self, "test:index:Bucket", name, props=props)
+
+
+class OmittingMocks(Mocks):
+    # Like a provider that reports none of the resource's inputs back as outputs.
+    def call(self, token, args, provider):
+        return {}
+
+    def new_resource(self, type_, name, inputs, provider, id_):
+        return f"{name}-id", {}
+
+
+def register_files(prefix: str, count: int):
+    # Each file is only rendered once the one before it has been registered, and the program keeps none of them.
+    previous = None
+    for i in range(count):
+        content = Output.from_input(previous.id if previous else None).apply(
+            lambda _, i=i: f"{prefix}{i:08}".ljust(SIZE, "x"))
+        previous = File(f"{prefix}-{i}", content)
+
+
+class BoundedMemoryTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+        settings.configure(settings.Settings(project="project", stack="stack", dry_run=False, test_mode_enabled=True,
+                                             bounded_memory_enabled=True))
+        self.old_root = settings.ROOT
+        settings.ROOT = None
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+        settings.ROOT = self.old_root
+
+    @async_test
+    async def test_flat_growth(self):
+        count = 40
+        held = []
+        # Nothing but reference counting frees the files, so the garbage collector is kept out of the way.
+        gc.collect()
+        gc.disable()
+        tracemalloc.start()
+        try:
+            for batch in range(4):
+                await run_pulumi_func(lambda batch=batch: register_files(f"batch{batch}", count))
+                held.append(tracemalloc.get_traced_memory()[0])
+        finally:
+            tracemalloc.stop()
+            gc.enable()
+
+        # If a resource and its outputs kept each other alive, every batch would hold on to its files, and memory would
+        # grow by as much with each batch as it did with the first.
+        for before, after in zip(held, held[1:]):
+            self.assertLess(after - before, held[0] / 2)
+
+    @async_test
+    async def test_resource_freed(self):
+        gc.disable()
+        try:
+            res = File("file", "content")
+            urn = res.urn
+            await run_pulumi_func(lambda: None)
+            ref = weakref.ref(res)
+            del res
+            self.assertIsNone(ref())
+        finally:
+            gc.enable()
+
+        # The outputs of a resource that has been freed still depend on it, through its URN.
+        resources = await urn.resources()
+        self.assertEqual(1, len(resources))
+        self.assertEqual(await urn.future(), await next(iter(resources)).urn.future())
+
+    @async_test
+    async def test_outputs(self):
+        res = File("file", "content")
+        await run_pulumi_func(lambda: None)
+        self.assertEqual("content", await res.content.future())
+
+    @async_test
+    async def test_omitted_inputs(self):
+        # Inputs the engine doesn't send back are used as outputs during a preview with legacy applies, which is the
+        # only time an input can resolve to an unknown.
+        settings.configure(settings.Settings(monitor=MockMonitor(OmittingMocks()), engine=MockEngine(None),
+                                             project="project", stack="stack", dry_run=True,
+                                             legacy_apply_enabled=True, bounded_memory_enabled=True))
+        value = asyncio.Future()
+        value.set_result("unknown")
+        known = asyncio.Future()
+        known.set_result(False)
+        unknown = Output(set(), value, known)
+        res = Bucket("bucket", {"name": "bucket", "password": Output.secret("hunter2"), "arn": unknown})
+        await run_pulumi_func(lambda: None)
+
+        # None of the inputs were sent back, so they are decoded again from the request that carried them.
+        self.assertEqual("bucket", await res.name.future())
+        self.assertEqual("hunter2", await res.password.future())
+        self.assertTrue(await res.password.is_secret())
+        self.assertFalse(await res.arn.is_known())
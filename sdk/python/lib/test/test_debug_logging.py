@@ -0,0 +1,63 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import unittest
+from unittest import mock
+
+from pulumi import log
+from pulumi.runtime import settings
+from pulumi.runtime.proto import engine_pb2
+
+
+class RecordingEngine:
+    def __init__(self):
+        self.messages = []
+
+    def Log(self, request):
+        self.messages.append((request.severity, request.message))
+
+
+class DebugLoggingTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+
+    def test_disabled_by_default(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertFalse(settings.Settings().debug_logging_enabled)
+        with mock.patch.dict(os.environ, {"PULUMI_ENABLE_DEBUG_LOGGING": "true"}):
+            self.assertTrue(settings.Settings().debug_logging_enabled)
+
+    def test_disabled_skips_formatting_and_rpc(self):
+        engine = RecordingEngine()
+        settings.configure(settings.Settings(engine=engine, debug_logging_enabled=False))
+
+        def fail():
+            raise AssertionError("message should not be formatted")
+
+        log.debug(fail)
+        # Messages that aren't formatted lazily, like those logged by programs, are still sent.
+        log.debug("plain message")
+        log.info("info message")
+        self.assertEqual([(engine_pb2.DEBUG, "plain message"), (engine_pb2.INFO, "info message")], engine.messages)
+
+    def test_enabled_formats_lazily(self):
+        engine = RecordingEngine()
+        settings.configure(settings.Settings(engine=engine, debug_logging_enabled=True))
+
+        log.debug(lambda: "lazy " + "message")
+        log.debug("plain message")
+        self.assertEqual([(engine_pb2.DEBUG, "lazy message"), (engine_pb2.DEBUG, "plain message")], engine.messages)
@@ -0,0 +1,141 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import unittest
+
+from google.protobuf import struct_pb2
+from pulumi import CustomResource, Output
+from pulumi.runtime import rpc, settings
+from pulumi.runtime.stack import run_pulumi_func
+
+
+def async_test(coro):
+    def wrapper(*args, **kwargs):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(coro(*args, **kwargs))
+        loop.close()
+    return wrapper
+
+
+class Bucket(CustomResource):
+    region: Output[str]
+
+    website = None
+
+    def __init__(self):  # pylint: disable=super-init-not-called
+        # Registering the resource is not part of what is tested.
+        self._deferred_outputs = {}
+
+
+def response(props) -> struct_pb2.Struct:
+    struct = struct_pb2.Struct()
+    struct.update(props)
+    return struct
+
+
+class DeferredOutputsTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+        settings.configure(settings.Settings(dry_run=False, deferred_outputs_enabled=True))
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+
+    async def register(self, res, inputs, outputs):
+        resolvers = rpc.transfer_properties(res, inputs)
+        values = {}
+        await rpc.serialize_properties(inputs, {}, None, values)
+        await rpc.resolve_outputs(res, values, response(outputs), resolvers)
+
+    @async_test
+    async def test_made_when_read(self):
+        res = Bucket()
+        secret = {rpc._special_sig_key: rpc._special_secret_sig, "value": "arn:bucket"}
+        await self.register(res, {"region": "us-west-2", "arn": None}, {"arn": secret})
+        self.assertNotIn("region", res.__dict__)
+        self.assertNotIn("arn", res.__dict__)
+
+        region = res.region
+        self.assertIs(region, res.region)
+        self.assertEqual("us-west-2", await region.future())
+        self.assertEqual("arn:bucket", await res.arn.future())
+        self.assertTrue(await res.arn.is_secret())
+        self.assertEqual({res}, await res.arn.resources())
+        self.assertEqual({}, res._deferred_outputs)
+
+    @async_test
+    async def test_read_before_resolved(self):
+        res = Bucket()
+        resolvers = rpc.transfer_properties(res, {"arn": None})
+        arn = res.arn.apply(lambda v: v.upper())
+        resolvers["arn"]("arn:bucket", True, False, None)
+        self.assertEqual("ARN:BUCKET", await arn.future())
+
+    @async_test
+    async def test_failure(self):
+        res = Bucket()
+        resolvers = rpc.transfer_properties(res, {"arn": None})
+        rpc.resolve_outputs_due_to_exception(resolvers, Exception("registration failed"))
+        with self.assertRaisesRegex(Exception, "registration failed"):
+            await res.arn.future()
+
+    @async_test
+    async def test_existing_attributes(self):
+        res = Bucket()
+        res.tags = "set by the program"
+        rpc.transfer_properties(res, {"website": None, "tags": None, "arn": None})
+        # Attributes that reads wouldn't reach __getattr__ for are assigned straight away.
+        self.assertIsInstance(res.__dict__["website"], Output)
+        self.assertIsInstance(res.__dict__["tags"], Output)
+        self.assertEqual(["arn"], list(res._deferred_outputs))
+
+        res._read_deferred_outputs()
+        self.assertIsInstance(res.__dict__["arn"], Output)
+        with self.assertRaises(AttributeError):
+            res.missing  # pylint: disable=pointless-statement
+
+    @async_test
+    async def test_lazy_outputs(self):
+        settings.SETTINGS.lazy_outputs_enabled = True
+        res = Bucket()
+        await self.register(res, {"arn": None}, {"arn": "arn:bucket"})
+        self.assertEqual("arn:bucket", await res.arn.future())
+
+
+class Queue(CustomResource):
+    def __init__(self, name, props):
+        CustomResource.__init__(self, "test:index:Queue", name, props=props)
+
+
+class EagerOutputsTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+        settings.configure(settings.Settings(project="project", stack="stack", dry_run=False, test_mode_enabled=True))
+        self.old_root = settings.ROOT
+        settings.ROOT = None
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+        settings.ROOT = self.old_root
+
+    @async_test
+    async def test_vars_after_registration(self):
+        # Unless deferred outputs are enabled, every output is an attribute of the resource from the start.
+        res = Queue("queue", {"name": "queue", "retention": 7})
+        await run_pulumi_func(lambda: None)
+        attributes = vars(res)
+        self.assertIsInstance(attributes["name"], Output)
+        self.assertEqual(7, await attributes["retention"].future())
+        self.assertEqual({}, res._deferred_outputs)
@@ -0,0 +1,104 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import unittest
+
+from pulumi.runtime import settings
+
+
+class CountingMonitor:
+    def __init__(self, supported):
+        self.supported = supported
+        self.requests = []
+
+    def SupportsFeature(self, request):
+        self.requests.append(request.id)
+        return type('SupportsFeatureResponse', (object,), {'hasSupport': request.id in self.supported})
+
+
+class DeclaringMonitor(CountingMonitor):
+    def __init__(self, supported):
+        super().__init__(supported)
+        self.supported_features = supported
+
+
+def async_test(coro):
+    def wrapper(*args, **kwargs):
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(coro(*args, **kwargs))
+        loop.close()
+    return wrapper
+
+
+class FeatureNegotiationTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+
+    @async_test
+    async def test_negotiates_once(self):
+        monitor = CountingMonitor({"secrets"})
+        settings.configure(settings.Settings(monitor=monitor))
+
+        results = await asyncio.gather(*[settings.monitor_supports_secrets() for _ in range(10)])
+        self.assertEqual([True] * 10, results)
+        self.assertTrue(await settings.monitor_supports_secrets())
+        self.assertEqual(sorted(settings.KNOWN_FEATURES), sorted(monitor.requests))
+
+    @async_test
+    async def test_unknown_feature(self):
+        monitor = CountingMonitor(set())
+        settings.configure(settings.Settings(monitor=monitor))
+
+        self.assertFalse(await settings.monitor_supports_feature("madeUpFeature"))
+        self.assertFalse(await settings.monitor_supports_feature("madeUpFeature"))
+        self.assertEqual(sorted(settings.KNOWN_FEATURES + ["madeUpFeature"]), sorted(monitor.requests))
+
+    @async_test
+    async def test_unknown_feature_during_negotiation(self):
+        monitor = CountingMonitor({"madeUpFeature"})
+        settings.configure(settings.Settings(monitor=monitor))
+
+        # The second call arrives while the negotiation started by the first, which doesn't cover its feature, is
+        # underway.
+        secrets, made_up = await asyncio.gather(settings.monitor_supports_secrets(),
+                                                settings.monitor_supports_feature("madeUpFeature"))
+        self.assertFalse(secrets)
+        self.assertTrue(made_up)
+        self.assertEqual(sorted(settings.KNOWN_FEATURES + ["madeUpFeature"]), sorted(monitor.requests))
+
+    @async_test
+    async def test_compression(self):
+        monitor = CountingMonitor({"secrets", "gzipCompression"})
+        settings.configure(settings.Settings(monitor=monitor, compression_threshold=1024))
+
+        # Requests may be compressed, so whether they can be is asked along with the other features.
+        self.assertTrue(await settings.monitor_supports_secrets())
+        self.assertTrue(await settings.monitor_supports_feature("gzipCompression"))
+        self.assertEqual(sorted(settings.KNOWN_FEATURES + ["gzipCompression"]), sorted(monitor.requests))
+
+    @async_test
+    async def test_declared_features(self):
+        monitor = DeclaringMonitor({"secrets"})
+        settings.configure(settings.Settings(monitor=monitor))
+
+        self.assertTrue(await settings.monitor_supports_secrets())
+        self.assertEqual([], monitor.requests)
+
+    @async_test
+    async def test_no_monitor(self):
+        settings.configure(settings.Settings())
+        self.assertFalse(await settings.monitor_supports_secrets())
@@ -0,0 +1,112 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import unittest
+from unittest import mock
+
+from google.protobuf import struct_pb2
+from pulumi.runtime import rpc, settings
+
+
+class FakeResource:
+    def translate_output_property(self, prop: str) -> str:
+        return {"outputProp": "output_prop", "secretProp": "secret_prop"}.get(prop, prop)
+
+
+def async_test(coro):
+    def wrapper(*args, **kwargs):
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(coro(*args, **kwargs))
+        loop.close()
+    return wrapper
+
+
+def response(props) -> struct_pb2.Struct:
+    struct = struct_pb2.Struct()
+    struct.update(props)
+    return struct
+
+
+def secret(value):
+    return {rpc._special_sig_key: rpc._special_secret_sig, "value": value}
+
+
+class LazyOutputsTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+        settings.configure(settings.Settings(dry_run=False, lazy_outputs_enabled=True))
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+
+    async def register(self, res, inputs, outputs):
+        resolvers = rpc.transfer_properties(res, inputs)
+        values = {}
+        await rpc.serialize_properties(inputs, {}, None, values)
+        await rpc.resolve_outputs(res, values, response(outputs), resolvers)
+
+    @async_test
+    async def test_decodes_on_demand(self):
+        res = FakeResource()
+        inputs = {"input_prop": "in", "output_prop": None, "secret_prop": None}
+        with mock.patch.object(rpc, "deserialize_property", wraps=rpc.deserialize_property) as deserialize:
+            await self.register(res, inputs, {"outputProp": [1, {"a": "b"}], "secretProp": secret("shh")})
+            self.assertEqual(0, deserialize.call_count)
+
+            self.assertEqual([1, {"a": "b"}], await res.output_prop.future())
+            self.assertEqual(1, deserialize.call_count)
+            self.assertTrue(await res.output_prop.is_known())
+
+            self.assertEqual("shh", await res.secret_prop.future())
+            self.assertTrue(await res.secret_prop.is_secret())
+            # Inputs that the engine didn't return come from the values that were sent.
+            self.assertEqual("in", await res.input_prop.future())
+            self.assertEqual(3, deserialize.call_count)
+
+    @async_test
+    async def test_demanded_before_response(self):
+        res = FakeResource()
+        resolvers = rpc.transfer_properties(res, {"output_prop": None, "other": None})
+        applied = res.output_prop.apply(lambda v: v + 1)
+        await asyncio.sleep(0)
+
+        lazy_outputs = rpc._LazyOutputs(res, {}, response({"outputProp": 41, "other": "x"}), len(resolvers))
+        for key, resolve in resolvers.items():
+            resolve.resolve_lazily(lazy_outputs, key)
+        self.assertEqual(42, await applied.future())
+        self.assertIsNotNone(lazy_outputs._outputs)
+
+        self.assertEqual("x", await res.other.future())
+        # Every property has been decoded, so the response is released.
+        self.assertIsNone(lazy_outputs._outputs)
+        self.assertIsNone(lazy_outputs._inputs)
+
+    @async_test
+    async def test_unknown_during_preview(self):
+        settings.SETTINGS.dry_run = True
+        res = FakeResource()
+        await self.register(res, {"output_prop": None, "input_prop": 1}, {"outputProp": rpc.UNKNOWN})
+
+        self.assertFalse(await res.output_prop.is_known())
+        self.assertIsNone(await res.output_prop.future())
+        self.assertFalse(await res.input_prop.is_known())
+
+    @async_test
+    async def test_failure(self):
+        res = FakeResource()
+        resolvers = rpc.transfer_properties(res, {"output_prop": None})
+        rpc.resolve_outputs_due_to_exception(resolvers, Exception("registration failed"))
+
+        with self.assertRaisesRegex(Exception, "registration failed"):
+            await res.output_prop.future()
@@ -0,0 +1,173 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import io
+import threading
+import unittest
+from unittest import mock
+
+import grpc
+
+from pulumi import log
+from pulumi.runtime import settings
+from pulumi.runtime.proto import engine_pb2
+
+
+class RecordingEngine:
+    def __init__(self):
+        self.messages = []
+        self.threads = set()
+
+    def Log(self, request):
+        self.threads.add(threading.current_thread().name)
+        self.messages.append((request.severity, request.message))
+
+
+def async_test(coro):
+    def wrapper(*args, **kwargs):
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(coro(*args, **kwargs))
+        loop.close()
+    return wrapper
+
+
+class LogPipelineTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+        self.engine = RecordingEngine()
+        settings.configure(settings.Settings(engine=self.engine, debug_logging_enabled=True))
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+
+    @async_test
+    async def test_sent_in_order_off_the_loop(self):
+        for i in range(1000):
+            log.info(f"message {i}")
+        self.assertEqual([], self.engine.messages)
+
+        await log._flush()
+        self.assertEqual([(engine_pb2.INFO, f"message {i}") for i in range(1000)], self.engine.messages)
+        self.assertTrue(all(name.startswith("pulumi-rpc") for name in self.engine.threads))
+
+    @async_test
+    async def test_sent_through_asyncio_transport(self):
+        aio_engine = RecordingEngine()
+
+        class AioEngine:
+            async def Log(self, request):
+                aio_engine.Log(request)
+
+        with mock.patch.object(settings.SETTINGS, "engine_aio", return_value=AioEngine()):
+            for i in range(10):
+                log.info(f"message {i}")
+            await log._flush()
+
+        self.assertEqual([(engine_pb2.INFO, f"message {i}") for i in range(10)], aio_engine.messages)
+        self.assertEqual([], self.engine.messages)
+        self.assertEqual({threading.current_thread().name}, aio_engine.threads)
+
+    @async_test
+    async def test_drops_runtime_debug_messages_when_full(self):
+        with mock.patch.object(log, "_MAX_QUEUED_MESSAGES", 2):
+            log.debug(lambda: "one")
+            log.debug(lambda: "two")
+            log.debug(lambda: "three")
+            await log._flush()
+
+        self.assertEqual([
+            (engine_pb2.DEBUG, "one"),
+            (engine_pb2.DEBUG, "two"),
+            (engine_pb2.WARNING, "1 debug messages were dropped because the log queue was full"),
+        ], self.engine.messages)
+
+    @async_test
+    async def test_keeps_program_debug_messages_when_full(self):
+        with mock.patch.object(log, "_MAX_QUEUED_MESSAGES", 2):
+            log.debug("one")
+            log.debug("two")
+            log.debug("three")
+            await log._flush()
+
+        self.assertEqual([(engine_pb2.DEBUG, m) for m in ["one", "two", "three"]], self.engine.messages)
+
+    @async_test
+    async def test_backpressure_when_full(self):
+        with mock.patch.object(log, "_MAX_QUEUED_MESSAGES", 2):
+            log.info("one")
+            log.info("two")
+            log.info("three")
+            # The first two messages were delivered synchronously to make room for the third.
+            self.assertEqual([(engine_pb2.INFO, "one"), (engine_pb2.INFO, "two")], self.engine.messages)
+            await log._flush()
+
+        self.assertEqual([(engine_pb2.INFO, m) for m in ["one", "two", "three"]], self.engine.messages)
+
+    def test_synchronous_outside_the_loop(self):
+        log.warn("no loop")
+        self.assertEqual([(engine_pb2.WARNING, "no loop")], self.engine.messages)
+
+    @async_test
+    async def test_reports_failed_messages(self):
+        def fail_second(request):
+            if request.message == "two":
+                raise RuntimeError("engine unavailable")
+            RecordingEngine.Log(self.engine, request)
+
+        self.engine.Log = fail_second
+        log.info("one")
+        log.info("two")
+        log.info("three")
+        with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            with self.assertRaisesRegex(RuntimeError, "engine unavailable"):
+                await log._flush()
+
+        self.assertEqual([(engine_pb2.INFO, "one"), (engine_pb2.INFO, "three")], self.engine.messages)
+        self.assertEqual("warning: 1 log messages could not be delivered to the engine\n", stderr.getvalue())
+
+        # The failure is only reported once.
+        await log._flush()
+
+    def test_exits_when_engine_unavailable(self):
+        class Unavailable(grpc.RpcError):
+            def code(self):
+                return grpc.StatusCode.UNAVAILABLE
+
+        def unavailable(request):
+            raise Unavailable()
+
+        self.engine.Log = unavailable
+
+        async def run():
+            log.info("one")
+            await log._flush()
+
+        loop = asyncio.new_event_loop()
+        try:
+            with self.assertRaises(SystemExit):
+                loop.run_until_complete(run())
+        finally:
+            # The program would exit here, so nothing is left to wait for the sender to finish.
+            log._pending.clear()
+            loop.close()
+
+    @async_test
+    async def test_batch_not_overtaken(self):
+        log.info("queued")
+        # Deliver a message synchronously after the sender has been scheduled, but before it has run.
+        with mock.patch("asyncio._get_running_loop", return_value=None):
+            log.info("synchronous")
+        await log._flush()
+
+        self.assertEqual([(engine_pb2.INFO, "queued"), (engine_pb2.INFO, "synchronous")], self.engine.messages)
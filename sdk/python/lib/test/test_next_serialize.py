@@ -12,7 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import asyncio
+import gc
+import sys
 import unittest
+import weakref
+from unittest import mock
 from typing import Any, Optional
 
 from google.protobuf import struct_pb2
@@ -864,6 +868,103 @@ class NextSerializationTests(unittest.TestCase):
         self.assertEqual(42, await out.future())
         self.assertEqual(42, await out.apply(lambda v: v).future())
 
+    @async_test
+    async def test_serializes_concurrently(self):
+        # Each value only resolves once every other value has started resolving, so this only completes if all of them
+        # are awaited at once.
+        started = []
+        all_started = asyncio.get_event_loop().create_future()
+
+        async def value(v):
+            started.append(v)
+            if len(started) == 4:
+                all_started.set_result(None)
+            await all_started
+            return v
+
+        props = await asyncio.wait_for(
+            rpc.serialize_properties({"a": value(1), "b": [value(2), 3, {"c": value(4)}], "d": value(5)}, {}), 5)
+        self.assertEqual({"a": 1, "b": [2, 3, {"c": 4}], "d": 5}, rpc.deserialize_properties(props))
+
+    @async_test
+    async def test_deps_in_value_order(self):
+        resources = [FakeCustomResource(f"res{i}") for i in range(3)]
+
+        async def resolve_later(res, delay):
+            await asyncio.sleep(delay)
+            return res
+
+        # The resources resolve in reverse order, but the dependencies are collected in the order of the values.
+        deps = []
+        prop = await rpc.serialize_property(
+            [resolve_later(res, 0.01 * (3 - i)) for i, res in enumerate(resources)], deps)
+        self.assertEqual(["res0", "res1", "res2"], prop)
+        self.assertEqual(resources, deps)
+
+    @async_test
+    async def test_deeply_nested(self):
+        # Deeper than the recursion limit, which a recursive serializer could not handle.
+        depth = sys.getrecursionlimit() * 2
+        value: Any = "leaf"
+        for _ in range(depth):
+            value = [value]
+        value = {"a": value}
+
+        prop = await rpc.serialize_property(value, [])
+        for _ in range(depth):
+            self.assertEqual(1, len(prop["a"]))
+            prop["a"] = prop["a"][0]
+        self.assertEqual({"a": "leaf"}, prop)
+
+    @async_test
+    async def test_resolves_without_suspending(self):
+        # Values that contain nothing to await are serialized without suspending.
+        coro = rpc.serialize_property({"a": [1, 2.5, {"b": None}], "c": StringAsset("text")}, [])
+        with self.assertRaises(StopIteration) as cm:
+            coro.send(None)
+        self.assertEqual({"a": [1, 2.5, {"b": None}],
+                          "c": {rpc._special_sig_key: rpc._special_asset_sig, "text": "text"}},
+                         cm.exception.value)
+
+
+    @async_test
+    async def test_writes_struct(self):
+        fut = asyncio.Future()
+        fut.set_result(["x", {"y": None}])
+        inputs = {
+            "str": "hello",
+            "num": 42,
+            "bool": True,
+            "list": [1.5, fut, []],
+            "dict": {"nested": {}, "asset": StringAsset("text")},
+            "unknown": UNKNOWN,
+        }
+        values = {}
+        struct = await rpc.serialize_properties(inputs, {}, None, values)
+
+        expected = {
+            "str": "hello",
+            "num": 42,
+            "bool": True,
+            "list": [1.5, ["x", {"y": None}], []],
+            "dict": {"nested": {}, "asset": {rpc._special_sig_key: rpc._special_asset_sig, "text": "text"}},
+            "unknown": rpc.UNKNOWN,
+        }
+        self.assertEqual(expected, values)
+        expected_struct = struct_pb2.Struct()
+        expected_struct.update(expected)
+        self.assertEqual(expected_struct, struct)
+
+    @async_test
+    async def test_values_deserialize_like_struct(self):
+        out = Output.secret({"a": [1, "b"]})
+        values = {}
+        struct = await rpc.serialize_properties({"secret": out, "list": [2, {"c": None}]}, {}, None, values)
+
+        self.assertEqual(2, len(values))
+        for k, v in struct.items():
+            self.assertEqual(rpc.deserialize_property(v), rpc.deserialize_property(values[k]))
+
 
 class DeserializationTests(unittest.TestCase):
     def test_unsupported_sig(self):
@@ -911,3 +1012,203 @@ class DeserializationTests(unittest.TestCase):
         self.assertEqual(val["listWithMap"][rpc._special_sig_key], rpc._special_secret_sig)
         self.assertEqual(val["listWithMap"]["value"][0]["regular"], "a normal value")
         self.assertEqual(val["listWithMap"]["value"][0]["secret"], "a secret value")
+
+    def test_secret_push_up_nested(self):
+        secret_value = {rpc._special_sig_key: rpc._special_secret_sig, "value": None}
+        all_props = struct_pb2.Struct()
+        all_props["deep"] = {"a": [[{"b": secret_value, "c": None}]], "d": 1}
+        all_props["secret"] = secret_value
+
+        val = rpc.deserialize_properties(all_props)
+        self.assertEqual({
+            "deep": {
+                rpc._special_sig_key: rpc._special_secret_sig,
+                "value": {"a": [[{"b": None}]], "d": 1},
+            },
+            "secret": {rpc._special_sig_key: rpc._special_secret_sig, "value": None},
+        }, val)
+
+    def test_asset_archive(self):
+        all_props = struct_pb2.Struct()
+        all_props["archive"] = {
+            rpc._special_sig_key: rpc._special_archive_sig,
+            "assets": {"file": {rpc._special_sig_key: rpc._special_asset_sig, "text": "contents"}},
+        }
+
+        val = rpc.deserialize_properties(all_props)
+        self.assertIsInstance(val["archive"], AssetArchive)
+        self.assertIsInstance(val["archive"].assets["file"], StringAsset)
+        self.assertEqual("contents", val["archive"].assets["file"].text)
+
+
+class ContainsUnknownsTests(unittest.TestCase):
+    def test_shared_and_cyclic(self):
+        shared = [{"a": 1}] * 1000
+        cyclic = {"shared": shared}
+        cyclic["self"] = cyclic
+        self.assertFalse(rpc.contains_unknowns(cyclic))
+
+        cyclic["unknown"] = [UNKNOWN]
+        self.assertTrue(rpc.contains_unknowns(cyclic))
+        self.assertTrue(rpc.contains_unknowns(UNKNOWN))
+        self.assertFalse(rpc.contains_unknowns("a"))
+
+    @async_test
+    async def test_checked_once_per_output(self):
+        fut = asyncio.Future()
+        fut.set_result({"a": [1, 2]})
+        known = asyncio.Future()
+        known.set_result(True)
+        out = Output(set(), fut, known)
+        with mock.patch("pulumi.output.contains_unknowns", wraps=rpc.contains_unknowns) as contains_unknowns:
+            self.assertTrue(await out.is_known())
+            for _ in range(3):
+                self.assertEqual({"a": [1, 2]}, await out.future())
+            self.assertEqual(1, contains_unknowns.call_count)
+
+
+class SerializationMemoTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+        settings.configure(settings.Settings())
+        # Pretend that the monitor supports secrets, so that secret Outputs are serialized as such.
+        settings.SETTINGS.monitor = mock.Mock()
+        settings.SETTINGS._feature_support["secrets"] = True
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+
+    @async_test
+    async def test_shared_output(self):
+        res = FakeCustomResource("some-id")
+        fut = asyncio.Future()
+        fut.set_result({"a": [1, "b"]})
+        known = asyncio.Future()
+        known.set_result(True)
+        secret = asyncio.Future()
+        secret.set_result(True)
+        shared = Output({res}, fut, known, secret)
+
+        for _ in range(3):
+            deps = {}
+            struct = await rpc.serialize_properties({"tags": shared, "other": {"tags": shared}}, deps)
+            props = rpc.deserialize_properties(struct)
+            self.assertEqual({rpc._special_sig_key: rpc._special_secret_sig, "value": {"a": [1, "b"]}},
+                             props["tags"])
+            self.assertEqual(struct["tags"], struct["other"]["tags"])
+            self.assertEqual([res], deps["tags"])
+            self.assertEqual([res], deps["other"])
+        # The first two serializations are made before either is kept, and the four after them reuse the second.
+        self.assertEqual((4, 2), settings.SETTINGS.serialization_memo().stats())
+
+    @async_test
+    async def test_translated_separately(self):
+        fut = asyncio.Future()
+        fut.set_result({"a": 1})
+        known = asyncio.Future()
+        known.set_result(True)
+        shared = Output(set(), fut, known)
+
+        self.assertEqual({"A": 1}, await rpc.serialize_property(shared, [], str.upper))
+        self.assertEqual({"a": 1}, await rpc.serialize_property(shared, []))
+        self.assertEqual({"A": 1}, await rpc.serialize_property(shared, [], str.upper))
+        self.assertEqual({"A": 1}, await rpc.serialize_property(shared, [], str.upper))
+        self.assertEqual((1, 3), settings.SETTINGS.serialization_memo().stats())
+
+    @async_test
+    async def test_instance_translator_not_kept(self):
+        fut = asyncio.Future()
+        fut.set_result({"a": 1})
+        known = asyncio.Future()
+        known.set_result(True)
+        shared = Output(set(), fut, known)
+
+        res = TranslatingResource()
+        res.translate_input_property = res.translate_output_property
+        for _ in range(3):
+            self.assertEqual({"a": 1}, await rpc.serialize_property(shared, [], rpc.input_translator(res)))
+        self.assertEqual((1, 2), settings.SETTINGS.serialization_memo().stats())
+
+        # The memo still has the serialization of the value, but not the resource whose translator made it.
+        ref = weakref.ref(res)
+        del res
+        gc.collect()
+        self.assertIsNone(ref())
+
+    @async_test
+    async def test_bounded_memory(self):
+        settings.SETTINGS.bounded_memory_enabled = True
+        fut = asyncio.Future()
+        fut.set_result({"a": 1})
+        known = asyncio.Future()
+        known.set_result(True)
+        shared = Output(set(), fut, known)
+
+        for _ in range(3):
+            self.assertEqual({"a": 1}, await rpc.serialize_property(shared, []))
+        self.assertEqual((0, 0), settings.SETTINGS.serialization_memo().stats())
+
+
+class TranslatingResource(CustomResource):
+    translated = []
+
+    def __init__(self):  # pylint: disable=super-init-not-called
+        pass
+
+    def translate_input_property(self, prop: str) -> str:
+        TranslatingResource.translated.append(prop)
+        return prop.upper()
+
+    def translate_output_property(self, prop: str) -> str:
+        TranslatingResource.translated.append(prop)
+        return prop.lower()
+
+
+class TranslationTests(unittest.TestCase):
+    def setUp(self):
+        TranslatingResource.translated = []
+        self.old_settings = settings.SETTINGS
+        settings.configure(settings.Settings())
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+
+    @async_test
+    async def test_translates_each_name_once(self):
+        for _ in range(3):
+            res = TranslatingResource()
+            struct = await rpc.serialize_properties({"a": {"b": 1, "a": [{"b": 2}]}}, {}, rpc.input_translator(res))
+            self.assertEqual({"A": {"B": 1, "A": [{"B": 2}]}}, rpc.deserialize_properties(struct))
+        self.assertEqual(["a", "b"], sorted(TranslatingResource.translated))
+
+        TranslatingResource.translated = []
+        for _ in range(3):
+            self.assertEqual({"x": [{"y": 1}], "y": 2},
+                             rpc.translate_output_properties(TranslatingResource(), {"X": [{"Y": 1}], "Y": 2}))
+        self.assertEqual(["X", "Y"], sorted(TranslatingResource.translated))
+
+    def test_untranslated(self):
+        res = CustomResource.__new__(CustomResource)
+        self.assertIsNone(rpc.input_translator(res))
+        self.assertEqual({"aB": [{"cD": 1}]}, rpc.translate_output_properties(res, {"aB": [{"cD": 1}]}))
+
+    def test_instance_override(self):
+        res = TranslatingResource()
+        res.translate_output_property = lambda prop: prop + "_"
+        self.assertEqual({"x_": [{"y_": 1}]}, rpc.translate_output_properties(res, {"x": [{"y": 1}]}))
+        # Other resources of the class still translate names the class's way.
+        self.assertEqual({"x": [{"y": 1}]}, rpc.translate_output_properties(TranslatingResource(), {"X": [{"Y": 1}]}))
+
+    def test_tables_bounded(self):
+        with mock.patch.object(rpc, "_MAX_TRANSLATED_NAMES", 2):
+            for _ in range(2):
+                self.assertEqual({"a": 1, "b": 2, "c": 3},
+                                 rpc.translate_output_properties(TranslatingResource(), {"A": 1, "B": 2, "C": 3}))
+        # The names that didn't fit in the table were translated again.
+        self.assertEqual(["A", "B", "C", "C"], TranslatingResource.translated)
+
+        # Tables are only kept for the run they were made in.
+        settings.configure(settings.Settings())
+        TranslatingResource.translated = []
+        rpc.translate_output_properties(TranslatingResource(), {"A": 1})
+        self.assertEqual(["A"], TranslatingResource.translated)
@@ -0,0 +1,373 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import unittest
+
+from pulumi.output import Output, UNKNOWN, _OutputState, _ResourceUnion
+from pulumi.runtime import rpc, settings
+
+
+def async_test(coro):
+    def wrapper(*args, **kwargs):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(coro(*args, **kwargs))
+        loop.close()
+    return wrapper
+
+
+def resolved(value) -> asyncio.Future:
+    fut = asyncio.Future()
+    fut.set_result(value)
+    return fut
+
+
+class OutputStateTests(unittest.TestCase):
+    @async_test
+    async def test_private_accessors(self):
+        out = Output({"res"}, resolved("value"), resolved(True), resolved(True))
+        self.assertEqual("value", await out._future)
+        self.assertTrue(await out._is_known)
+        self.assertTrue(await out._is_secret)
+        self.assertEqual({"res"}, await out._resources)
+        self.assertEqual({"res"}, await out.resources())
+
+    @async_test
+    async def test_combined_when_asked(self):
+        value, known = asyncio.Future(), asyncio.Future()
+        out = Output(set(), value, known)
+        await asyncio.sleep(0)
+        self.assertIsNone(out._state)
+
+        is_known = out.is_known()
+        value.set_result("value")
+        known.set_result(True)
+        self.assertTrue(await is_known)
+        self.assertEqual("value", await out.future())
+        self.assertFalse(await out.is_secret())
+
+    @async_test
+    async def test_coroutines_scheduled(self):
+        started = []
+
+        async def value():
+            started.append(True)
+            return "value"
+
+        async def is_known():
+            return True
+
+        out = Output(set(), value(), is_known())
+        await asyncio.sleep(0)
+        self.assertEqual([True], started)
+        self.assertEqual("value", await out.future())
+
+    @async_test
+    async def test_failure(self):
+        value = asyncio.Future()
+        value.set_exception(Exception("failed"))
+        out = Output(set(), value, resolved(True)).apply(lambda v: v + 1)
+        with self.assertRaisesRegex(Exception, "failed"):
+            await out.future()
+        with self.assertRaisesRegex(Exception, "failed"):
+            await out.is_known()
+
+    @async_test
+    async def test_all_and_secret(self):
+        out = Output.all(Output.secret("a"), Output({"res"}, resolved("b"), resolved(True)), "c")
+        self.assertEqual(["a", "b", "c"], await out.future())
+        self.assertTrue(await out.is_secret())
+        self.assertTrue(await out.is_known())
+        self.assertEqual({"res"}, await out.resources())
+
+
+class ResolvedOutputTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+        settings.configure(settings.Settings(dry_run=False))
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+
+    def assertResolved(self, out: Output):
+        self.assertIsNotNone(out._resolved_state(), "expected the output to have resolved without waiting")
+
+    @async_test
+    async def test_resolved_synchronously(self):
+        applied = Output.from_input(1).apply(lambda v: v + 1)
+        combined = Output.all(applied, Output.secret("b"))
+        concatenated = Output.concat("a", Output.from_input("b"), "c")
+        unwrapped = Output.from_input({"a": [Output.from_input(1), {"b": Output.secret(2)}]})
+        for out in [applied, combined, concatenated, unwrapped]:
+            self.assertResolved(out)
+
+        self.assertEqual(2, await applied.future())
+        self.assertEqual([2, "b"], await combined.future())
+        self.assertTrue(await combined.is_secret())
+        self.assertEqual("abc", await concatenated.future())
+        self.assertEqual({"a": [1, {"b": 2}]}, await unwrapped.future())
+        self.assertTrue(await unwrapped.is_secret())
+
+    @async_test
+    async def test_apply_returning_resolved_output(self):
+        out = Output({"res"}, resolved(1), resolved(True))
+        applied = out.apply(lambda v: Output.secret(v + 1))
+        self.assertResolved(applied)
+        self.assertEqual(2, await applied.future())
+        self.assertTrue(await applied.is_secret())
+        self.assertEqual({"res"}, await applied.resources())
+
+    @async_test
+    async def test_apply_waits_on_pending(self):
+        value = asyncio.Future()
+        out = Output(set(), value, resolved(True))
+        applied = out.apply(lambda v: v + 1)
+        self.assertIsNone(applied._resolved_state())
+
+        awaited = Output.from_input(1).apply(lambda v: resolved(v + 1))
+        value.set_result(1)
+        self.assertEqual(2, await applied.future())
+        self.assertEqual(2, await awaited.future())
+
+    @async_test
+    async def test_unknowns_during_preview(self):
+        settings.SETTINGS.dry_run = True
+        unknown = Output(set(), resolved(None), resolved(False))
+        calls = []
+
+        skipped = unknown.apply(calls.append)
+        self.assertResolved(skipped)
+        self.assertFalse(await skipped.is_known())
+        self.assertEqual([], calls)
+
+        ran = unknown.apply(calls.append, True)
+        self.assertResolved(ran)
+        self.assertEqual([UNKNOWN], calls)
+
+        combined = Output.all(unknown, "b")
+        self.assertResolved(combined)
+        self.assertFalse(await combined.is_known())
+
+    @async_test
+    async def test_exception(self):
+        def fail(_):
+            raise ValueError("apply failed")
+
+        out = Output.from_input(1).apply(fail)
+        with self.assertRaisesRegex(ValueError, "apply failed"):
+            await out.future()
+        with self.assertRaisesRegex(ValueError, "apply failed"):
+            await out.apply(lambda v: v).is_known()
+
+    def test_keyboard_interrupt(self):
+        def interrupt(_):
+            raise KeyboardInterrupt()
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            value = loop.create_future()
+            out = Output(set(), value, resolved(True)).apply(interrupt)
+            loop.call_soon(value.set_result, 1)
+            # The interrupt stops the event loop, as it would if the apply ran in a task, and fails the output.
+            with self.assertRaises(KeyboardInterrupt):
+                loop.run_until_complete(asyncio.sleep(0.1))
+
+            async def wait():
+                await out.future()
+
+            with self.assertRaises(KeyboardInterrupt):
+                loop.run_until_complete(wait())
+        finally:
+            loop.close()
+
+    @async_test
+    async def test_own_attributes(self):
+        out = Output.from_input(1)
+        out.description = "set by the program"
+        self.assertEqual("set by the program", out.description)
+        self.assertEqual(1, await out.future())
+
+
+class UnwrapTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+        settings.configure(settings.Settings(dry_run=False))
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+
+    @async_test
+    async def test_one_task(self):
+        states = [asyncio.Future() for _ in range(3)]
+        tags = {f"key{i}": Output._from_state(state) for i, state in enumerate(states)}
+
+        tasks = len(asyncio.all_tasks())
+        out = Output.from_input({"tags": tags, "list": [Output.from_input("a"), Output.secret("b")]})
+        self.assertEqual(tasks + 1, len(asyncio.all_tasks()))
+
+        for i, state in enumerate(states):
+            # Outputs may resolve to values that contain more Inputs.
+            value = [Output.from_input(i)] if i else i
+            state.set_result(_OutputState(value, True, False, {f"res{i}"}))
+        self.assertEqual({"tags": {"key0": 0, "key1": [1], "key2": [2]}, "list": ["a", "b"]}, await out.future())
+        self.assertEqual(["key0", "key1", "key2"], list((await out.future())["tags"]))
+        self.assertTrue(await out.is_secret())
+        self.assertEqual({"res0", "res1", "res2"}, await out.resources())
+
+    @async_test
+    async def test_awaitables(self):
+        async def value(v):
+            await asyncio.sleep(0)
+            return {"nested": Output.from_input(v)}
+
+        out = Output.all(value(1), [value(2)], resolved("c"))
+        self.assertEqual([{"nested": 1}, [{"nested": 2}], "c"], await out.future())
+        self.assertTrue(await out.is_known())
+
+    @async_test
+    async def test_unknowns_during_preview(self):
+        settings.SETTINGS.dry_run = True
+        state = asyncio.Future()
+        out = Output.from_input({"a": Output._from_state(state), "b": "b"})
+        state.set_result(_OutputState("value", False, False, set()))
+        self.assertEqual({"a": UNKNOWN, "b": "b"}, await out.future(with_unknowns=True))
+        self.assertFalse(await out.is_known())
+
+    @async_test
+    async def test_failure(self):
+        state = asyncio.Future()
+        out = Output.from_input([Output._from_state(state)])
+        state.set_exception(Exception("failed"))
+        with self.assertRaisesRegex(Exception, "failed"):
+            await out.future()
+
+
+class Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class ProjectionTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+        settings.configure(settings.Settings(dry_run=False))
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+
+    @async_test
+    async def test_fused_lookups(self):
+        state = asyncio.Future()
+        root = Output._from_state(state)
+        inner = root["a"]
+        out = inner["b"].c
+        await asyncio.sleep(0)
+        # Nothing is run until something asks for the result, and then only from the root.
+        self.assertIsNone(inner._state)
+        self.assertIsNone(out._state)
+
+        value = out.future()
+        state.set_result(_OutputState({"a": {"b": Obj(c="value")}}, True, True, {"res"}))
+        self.assertEqual("value", await value)
+        self.assertIsNone(inner._state)
+        self.assertTrue(await out.is_secret())
+        self.assertEqual({"res"}, await out.resources())
+        self.assertEqual("value", (await inner.future())["b"].c)
+
+    @async_test
+    async def test_lookup_returning_output(self):
+        state, nested = asyncio.Future(), asyncio.Future()
+        out = Output._from_state(state).child.name
+        state.set_result(_OutputState(Obj(child=Output._from_state(nested)), True, False, {"res"}))
+        nested.set_result(_OutputState(Obj(name="name"), True, True, {"child"}))
+        self.assertEqual("name", await out.future())
+        self.assertTrue(await out.is_secret())
+        self.assertEqual({"res", "child"}, await out.resources())
+
+    @async_test
+    async def test_lookups_during_preview(self):
+        settings.SETTINGS.dry_run = True
+        state = asyncio.Future()
+        out = Output._from_state(state)["a"].b
+        state.set_result(_OutputState(None, False, False, set()))
+        self.assertFalse(await out.is_known())
+
+    @async_test
+    async def test_lookup_failure(self):
+        state = asyncio.Future()
+        out = Output._from_state(state)["missing"]
+        state.set_result(_OutputState({}, True, False, set()))
+        with self.assertRaises(KeyError):
+            await out.future()
+
+    @async_test
+    async def test_apply_chain_without_tasks(self):
+        state = asyncio.Future()
+        calls = []
+
+        tasks = len(asyncio.all_tasks())
+        out = Output._from_state(state)
+        for _ in range(3):
+            out = out.apply(lambda v: calls.append(v) or v + 1)
+        self.assertEqual(tasks, len(asyncio.all_tasks()))
+
+        # Applies still run as soon as their output resolves, whether or not anything asks for their result.
+        state.set_result(_OutputState(1, True, False, set()))
+        for _ in range(3):
+            await asyncio.sleep(0)
+        self.assertEqual([1, 2, 3], calls)
+        self.assertEqual(4, await out.future())
+
+
+class Res:
+    pass
+
+
+class DependencyTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+        settings.configure(settings.Settings(dry_run=False))
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+
+    def leaf(self, res) -> Output:
+        return Output({res}, resolved("value"), resolved(True))
+
+    @async_test
+    async def test_shared_not_copied(self):
+        a, b = Res(), Res()
+        leaf_a = self.leaf(a)
+        out = leaf_a.apply(lambda v: v)
+        self.assertIs(leaf_a._state.result().resources, out._state.result().resources)
+
+        combined = Output.all(leaf_a, out, self.leaf(b))
+        resources = combined._state.result().resources
+        self.assertIsInstance(resources, _ResourceUnion)
+        self.assertEqual({a, b}, await combined.resources())
+        self.assertIs(await combined.resources(), await combined.resources())
+
+    @async_test
+    async def test_overlapping_graph(self):
+        leaves = [self.leaf(Res()) for _ in range(4)]
+        left = Output.all(*leaves[:3])
+        right = Output.all(*leaves[1:])
+        top = Output.all(left, right, left.apply(lambda v: leaves[0]))
+        self.assertEqual(4, len(await top.resources()))
+        self.assertEqual(3, len(await left.resources()))
+
+        deps = {}
+        await rpc.serialize_properties({"value": top}, deps, None)
+        self.assertEqual(await top.resources(), set(deps["value"]))
@@ -0,0 +1,72 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import unittest
+
+import grpc
+from google.protobuf import struct_pb2
+from pulumi.runtime import settings
+from pulumi.runtime.proto import resource_pb2
+
+
+class FeatureMonitor:
+    def __init__(self, supported_features):
+        self.supported_features = supported_features
+        self.requests = []
+
+    def SupportsFeature(self, request):
+        self.requests.append(request.id)
+        return type('SupportsFeatureResponse', (object,), {'hasSupport': request.id in self.supported_features})
+
+
+def async_test(coro):
+    def wrapper(*args, **kwargs):
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(coro(*args, **kwargs))
+        loop.close()
+    return wrapper
+
+
+def register_request(size: int) -> resource_pb2.RegisterResourceRequest:
+    obj = struct_pb2.Struct()
+    obj["value"] = "a" * size
+    return resource_pb2.RegisterResourceRequest(type="test:index:Resource", name="res", object=obj)
+
+
+class RequestCompressionTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+
+    @async_test
+    async def test_disabled_by_default(self):
+        monitor = FeatureMonitor({"gzipCompression"})
+        settings.configure(settings.Settings(monitor=monitor))
+        self.assertIsNone(await settings.request_compression(register_request(1024 * 1024)))
+        # Other features are negotiated without asking about compression.
+        await settings.monitor_supports_secrets()
+        self.assertNotIn("gzipCompression", monitor.requests)
+
+    @async_test
+    async def test_above_threshold(self):
+        settings.configure(settings.Settings(monitor=FeatureMonitor({"gzipCompression"}), compression_threshold=1024))
+        self.assertEqual(grpc.Compression.Gzip, await settings.request_compression(register_request(1024)))
+        self.assertIsNone(await settings.request_compression(register_request(16)))
+
+    @async_test
+    async def test_unsupported_by_monitor(self):
+        settings.configure(settings.Settings(monitor=FeatureMonitor({"secrets"}), compression_threshold=1024))
+        self.assertIsNone(await settings.request_compression(register_request(1024 * 1024)))
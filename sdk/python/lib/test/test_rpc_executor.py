@@ -0,0 +1,95 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import os
+import threading
+import unittest
+from concurrent import futures
+
+from pulumi.runtime import settings
+from pulumi.runtime.rpc_executor import RPCExecutor
+from pulumi.runtime.settings import Settings
+
+
+def async_test(coro):
+    def wrapper(*args, **kwargs):
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(coro(*args, **kwargs))
+        loop.close()
+    return wrapper
+
+
+class RPCExecutorTests(unittest.TestCase):
+    @async_test
+    async def test_counters(self):
+        executor = RPCExecutor(1)
+        release = threading.Event()
+        try:
+            first = executor.run(release.wait)
+            second = executor.run(lambda x: x + 1, 41)
+            await asyncio.sleep(0.05)
+            stats = executor.stats()
+            self.assertEqual(1, stats.active)
+            self.assertEqual(1, stats.queued)
+
+            release.set()
+            await first
+            self.assertEqual(42, await second)
+            stats = executor.stats()
+            self.assertEqual(0, stats.active)
+            self.assertEqual(0, stats.queued)
+            self.assertEqual(2, stats.completed)
+            self.assertGreater(stats.max_wait_time, 0)
+        finally:
+            executor.shutdown()
+
+    def test_size(self):
+        self.assertEqual(3, Settings(rpc_executor_size=3).rpc_executor_size)
+        self.assertEqual(16, Settings(parallel=16).rpc_executor_size)
+
+        os.environ["PULUMI_RPC_EXECUTOR_SIZE"] = "7"
+        try:
+            self.assertEqual(7, Settings(parallel=16).rpc_executor_size)
+        finally:
+            del os.environ["PULUMI_RPC_EXECUTOR_SIZE"]
+
+    @async_test
+    async def test_shutdown_when_replaced(self):
+        old_settings = settings.SETTINGS
+        program_pool = futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            replaced = Settings()
+            settings.configure(replaced)
+            self.assertEqual(1, await replaced.rpc_executor().run(lambda: 1))
+            self.assertEqual(2, await replaced.apply_executor().run(lambda x: x + 1, 1))
+            rpc_pool = replaced.rpc_executor()._executor
+            apply_pool = replaced.apply_executor()._executor
+
+            # Setting a pool for applies lets go of the one the runtime made.
+            settings.set_apply_executor(program_pool)
+            with self.assertRaises(RuntimeError):
+                apply_pool.submit(lambda: None)
+
+            settings.configure(Settings())
+            with self.assertRaises(RuntimeError):
+                rpc_pool.submit(lambda: None)
+            # The program's own pool is left for it to shut down.
+            self.assertEqual(3, program_pool.submit(lambda: 3).result())
+
+            # Settings that are used again get new pools.
+            settings.configure(replaced)
+            self.assertEqual(4, await replaced.rpc_executor().run(lambda: 4))
+        finally:
+            settings.configure(old_settings)
+            program_pool.shutdown()
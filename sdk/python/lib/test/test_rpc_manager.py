@@ -0,0 +1,125 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import unittest
+
+from pulumi.runtime.rpc_manager import RPCManager
+
+
+def async_test(coro):
+    def wrapper(*args, **kwargs):
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(coro(*args, **kwargs))
+        loop.close()
+    return wrapper
+
+
+class RPCManagerTests(unittest.TestCase):
+    @async_test
+    async def test_counts_outstanding(self):
+        manager = RPCManager()
+        gate = asyncio.get_event_loop().create_future()
+
+        async def call():
+            return await gate
+
+        rpc = manager.do_rpc("call", call)()
+        # RPCs are counted as soon as they're made, before the event loop runs them.
+        self.assertEqual(1, manager.count)
+        task = asyncio.ensure_future(rpc)
+        gate.set_result("result")
+        self.assertEqual(("result", None), await task)
+        self.assertEqual(0, manager.count)
+        self.assertEqual(1, manager.started)
+
+    @async_test
+    async def test_failure(self):
+        manager = RPCManager()
+
+        async def call():
+            raise ValueError("rpc failed")
+
+        result, exception = await manager.do_rpc("call", call)()
+        self.assertIsNone(result)
+        self.assertIs(exception, manager.unhandled_exception)
+        self.assertEqual(0, manager.count)
+
+    @async_test
+    async def test_waits_for_rpcs_started_later(self):
+        manager = RPCManager()
+        done = []
+
+        async def second():
+            done.append("second")
+
+        def start_second(_):
+            asyncio.ensure_future(manager.do_rpc("second", second)())
+
+        async def first():
+            # Like an apply on an output of a resource that makes another resource at the end of a long chain of
+            # applies, the second RPC is only made many turns of the event loop after this one completes, when none
+            # are outstanding.
+            hops = [asyncio.get_event_loop().create_future() for _ in range(1000)]
+            for hop, next_hop in zip(hops, hops[1:]):
+                hop.add_done_callback(lambda _, next_hop=next_hop: next_hop.set_result(None))
+            hops[-1].add_done_callback(start_second)
+            hops[0].set_result(None)
+            done.append("first")
+
+        asyncio.ensure_future(manager.do_rpc("first", first)())
+        await manager.wait_for_quiescence()
+        self.assertEqual(["first", "second"], done)
+        self.assertEqual(0, manager.count)
+
+    @async_test
+    async def test_cancelled_before_running(self):
+        manager = RPCManager()
+
+        async def call():
+            return "result"
+
+        rpc = manager.do_rpc("call", call)()
+        self.assertEqual(1, manager.count)
+        rpc.cancel()
+        # The RPC never ran, but it still stops being counted, so waiting for quiescence doesn't hang.
+        await asyncio.wait_for(manager.wait_for_quiescence(), 5)
+        self.assertEqual(0, manager.count)
+
+    @async_test
+    async def test_idle(self):
+        manager = RPCManager()
+        await manager.wait_for_quiescence()
+        self.assertEqual(0, manager.started)
+
+    @async_test
+    async def test_track_iteration(self):
+        manager = RPCManager()
+        closed = []
+
+        async def pages():
+            try:
+                for page in range(3):
+                    yield page
+            finally:
+                closed.append(True)
+
+        tracked = manager.track_iteration(pages())
+        # Iteration is only counted once it begins.
+        self.assertEqual(0, manager.count)
+        self.assertEqual(0, await tracked.__anext__())
+        self.assertEqual(1, manager.count)
+        # Closing the iteration early stops counting it and closes what it was reading.
+        await tracked.aclose()
+        self.assertEqual(0, manager.count)
+        self.assertEqual([True], closed)
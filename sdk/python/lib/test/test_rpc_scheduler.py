@@ -0,0 +1,94 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import unittest
+
+from pulumi.runtime.rpc_manager import RPCScheduler
+
+
+def async_test(coro):
+    def wrapper(*args, **kwargs):
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(coro(*args, **kwargs))
+        loop.close()
+    return wrapper
+
+
+class RPCSchedulerTests(unittest.TestCase):
+    @async_test
+    async def test_unbounded(self):
+        scheduler = RPCScheduler(parallel=0)
+        self.assertIsNone(scheduler.capacity())
+        async with scheduler.slot("RegisterResource"):
+            self.assertEqual(0, scheduler.in_flight)
+
+    @async_test
+    async def test_caps_in_flight(self):
+        scheduler = RPCScheduler(parallel=3)
+        peak = 0
+
+        async def rpc():
+            nonlocal peak
+            async with scheduler.slot("RegisterResource"):
+                peak = max(peak, scheduler.in_flight)
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*[rpc() for _ in range(20)])
+        self.assertEqual(3, peak)
+        self.assertEqual(0, scheduler.in_flight)
+        self.assertEqual(0, scheduler.queued())
+
+    @async_test
+    async def test_weights(self):
+        scheduler = RPCScheduler(parallel=4, weights={"ReadResource": 3})
+        await scheduler.acquire("RegisterResource")
+        read = asyncio.ensure_future(scheduler.acquire("ReadResource"))
+        await asyncio.sleep(0)
+        self.assertEqual(4, scheduler.in_flight)
+        register = asyncio.ensure_future(scheduler.acquire("RegisterResource"))
+        await asyncio.sleep(0)
+        self.assertFalse(register.done())
+        self.assertEqual(1, scheduler.queued())
+        scheduler.release(await read)
+        self.assertEqual(1, await register)
+
+    @async_test
+    async def test_priority_order(self):
+        scheduler = RPCScheduler(parallel=1)
+        started = []
+
+        async def rpc(kind):
+            async with scheduler.slot(kind):
+                started.append(kind)
+                await asyncio.sleep(0)
+
+        first = await scheduler.acquire("RegisterResource")
+        rpcs = [asyncio.ensure_future(rpc(kind)) for kind in ["RegisterResource", "ReadResource", "Invoke"]]
+        await asyncio.sleep(0)
+        scheduler.release(first)
+        await asyncio.gather(*rpcs)
+        self.assertEqual(["Invoke", "RegisterResource", "ReadResource"], started)
+
+    @async_test
+    async def test_cancelled_waiter(self):
+        scheduler = RPCScheduler(parallel=1)
+        first = await scheduler.acquire("RegisterResource")
+        waiter = asyncio.ensure_future(scheduler.acquire("RegisterResource"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        scheduler.release(first)
+        self.assertEqual(0, scheduler.in_flight)
+        self.assertEqual(0, scheduler.queued())
@@ -0,0 +1,69 @@
+# Copyright 2016-2020, Pulumi Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import time
+import unittest
+
+from pulumi import Output
+from pulumi.runtime import settings, stream_invoke
+from pulumi.runtime.mocks import MockEngine, MockMonitor, Mocks
+from pulumi.runtime.stack import run_pulumi_func
+
+
+def async_test(coro):
+    def wrapper(*args, **kwargs):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(coro(*args, **kwargs))
+        loop.close()
+    return wrapper
+
+
+class SlowListingMocks(Mocks):
+    def call(self, token, args, provider):
+        return {}
+
+    def stream_call(self, token, args, provider):
+        for page in range(int(args["pages"])):
+            # Each page takes far longer to arrive than the event loop takes to go idle.
+            time.sleep(0.05)
+            yield {"page": page}
+
+    def new_resource(self, type_, name, inputs, provider, id_):
+        return f"{name}-id", {}
+
+
+class StreamInvokeTests(unittest.TestCase):
+    def setUp(self):
+        self.old_settings = settings.SETTINGS
+        settings.configure(settings.Settings(monitor=MockMonitor(SlowListingMocks()), engine=MockEngine(None),
+                                             project="project", stack="stack", dry_run=False))
+        self.old_root = settings.ROOT
+        settings.ROOT = None
+
+    def tearDown(self):
+        settings.configure(self.old_settings)
+        settings.ROOT = self.old_root
+
+    @async_test
+    async def test_read_after_program_returns(self):
+        pages = []
+
+        async def read_pages(count):
+            async for page in stream_invoke("test:index:Listing", {"pages": count}):
+                pages.append(page["page"])
+
+        # The stream is only read by an apply, once the program itself has returned.
+        await run_pulumi_func(lambda: Output.from_input(3).apply(read_pages))
+        self.assertEqual([0, 1, 2], pages)
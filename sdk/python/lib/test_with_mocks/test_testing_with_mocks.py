@@ -23,6 +23,13 @@ class MyMocks(pulumi.runtime.Mocks):
         else:
             return {}
 
+    def stream_call(self, token, args, provider):
+        if token == 'test:index:MyListing':
+            for page in range(int(args['pages'])):
+                yield {'page': page}
+        else:
+            yield self.call(token, args, provider)
+
     def new_resource(self, type_, name, inputs, provider, id_):
         if type_ == 'aws:ec2/securityGroup:SecurityGroup':
             state = {
@@ -64,3 +71,11 @@ class TestingWithMocks(unittest.TestCase):
     @pulumi.runtime.test
     def test_invoke(self):
         return self.assertEqual(resources.invoke_result, 59)
+
+    @pulumi.runtime.test
+    def test_stream_invoke(self):
+        async def collect_pages():
+            return [result async for result in pulumi.runtime.stream_invoke('test:index:MyListing', {'pages': 3})]
+        def check_pages(pages):
+            self.assertEqual(pages, [{'page': 0}, {'page': 1}, {'page': 2}])
+        return pulumi.Output.from_input(collect_pages()).apply(check_pages)